@@ -65,6 +65,16 @@ def visualize_scores(path_csv: Path):
     plt.show()
 
 
+# ------------------------------------------------------------------------------
+def sums_by_sign(smif: vg.GridProxy) -> tuple[float, float]:
+    """Sum the negative and positive values of a lazy grid, chunk by chunk."""
+    sum_neg, sum_pos = 0.0, 0.0
+    for _,block in smif.iter_chunks():
+        sum_neg += float(np.sum(block[block < 0], dtype = np.float64))
+        sum_pos += float(np.sum(block[block > 0], dtype = np.float64))
+    return sum_neg, sum_pos
+
+
 # //////////////////////////////////////////////////////////////////////////////
 class PocketScoreCalculator:
     def __init__(self):
@@ -82,31 +92,28 @@ class PocketScoreCalculator:
 
             self.data_pdb.append(name_pdb)
 
-            ### boolean grid, points in space that are part of the pocket are "True"
-            pocket = vg.GridIO.read_cmap(path_ps, f"{name_pdb}.trimming").grid.astype(bool)
+            ### boolean grid, points in space that are part of the pocket are nonzero
+            ### the volume is given by the number of points in the pocket
+            pocket = vg.GridIO.read_cmap(path_ps, f"{name_pdb}.trimming", lazy = True).grid
+            volume = pocket.count_nonzero()
 
             keys = set(vg.GridIO.get_cmap_keys(path_ps))
             for key in keys:
                 if key.startswith(name_pdb + ".trimming"): continue
 
-                smif_ps = vg.GridIO.read_cmap(path_ps, key).grid
-                smif_wh = vg.GridIO.read_cmap(path_wh, key).grid
+                ### the grids are only reduced chunk by chunk, they're never fully loaded
+                smif_ps = vg.GridIO.read_cmap(path_ps, key, lazy = True).grid
+                smif_wh = vg.GridIO.read_cmap(path_wh, key, lazy = True).grid
                 kind = key.split('.')[-1]
 
                 if kind == "apbs":
-                    neg_ps = smif_ps.copy()
-                    pos_ps = smif_ps.copy()
-                    neg_wh = smif_wh.copy()
-                    pos_wh = smif_wh.copy()
-                    neg_ps[neg_ps > 0] = 0
-                    pos_ps[pos_ps < 0] = 0
-                    neg_wh[neg_wh > 0] = 0
-                    pos_wh[pos_wh < 0] = 0
-                    self._assign_score("apbs-neg", neg_ps, neg_wh, pocket)
-                    self._assign_score("apbs-pos", pos_ps, pos_wh, pocket)
+                    neg_ps, pos_ps = sums_by_sign(smif_ps)
+                    neg_wh, pos_wh = sums_by_sign(smif_wh)
+                    self._assign_score("apbs-neg", neg_ps, neg_wh, volume)
+                    self._assign_score("apbs-pos", pos_ps, pos_wh, volume)
 
                 else:
-                    self._assign_score(kind, smif_ps, smif_wh, pocket)
+                    self._assign_score(kind, smif_ps.sum(), smif_wh.sum(), volume)
 
 
     # --------------------------------------------------------------------------
@@ -119,10 +126,9 @@ class PocketScoreCalculator:
 
 
     # --------------------------------------------------------------------------
-    def _assign_score(self, smif_kind: str, smif_ps: vg.Grid, smif_wh: vg.Grid, pocket: vg.Grid) -> None:
-        volume = len(pocket[pocket]) # the volume is given by the number of points in the pocket
-        sum_ps = np.sum(smif_ps)     # the sum of the smif values in the pocket
-        sum_wh = np.sum(smif_wh)     # the sum of the smif values in the whole grid
+    def _assign_score(self, smif_kind: str, sum_ps: float, sum_wh: float, volume: int) -> None:
+        ### sum_ps: the sum of the smif values in the pocket
+        ### sum_wh: the sum of the smif values in the whole grid
         if volume == 0:
             raise ValueError("Warning: Pocket is empty, no points in the pocket.")
 
@@ -134,7 +140,7 @@ class PocketScoreCalculator:
         # score = np.abs(sum_ps) / volume
 
         ##### Option 2: SMIF integral is normalized by its maximum absolute value and by the volume of the pocket
-        # maximum_abs = np.max(np.abs(smif))
+        # maximum_abs = max(abs(smif_ps.min()), abs(smif_ps.max()))
         # score = np.abs(sum_ps) / (maximum_abs * volume) if maximum_abs > 0 else 0
 
         ##### Option 3: SMIF integral of the pocket normalized by the integral of the whole grid
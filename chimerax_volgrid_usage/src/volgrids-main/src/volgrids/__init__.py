@@ -1,5 +1,13 @@
+### utils go first: other modules use `lazy_import` at import time
+from ._framework._misc.utils import resolve_path, get_configs, set_configs, get_num_cpus, run_parallel, lazy_import
+from ._framework._core.run_context import RunContext
+
 from ._framework._core.grid import Grid
+from ._framework._core.grid_proxy import GridProxy
+from ._framework._core.grid_sparse import SparseBricks
 from ._framework._core.mol_system import MolSystem
+from ._framework._core.memory_plan import MemoryPlan
+from ._framework._core.mesh import Mesh
 
 from ._framework._kernels.kernel import Kernel
 from ._framework._kernels.boolean import \
@@ -8,25 +16,40 @@ from ._framework._kernels.gaussian import \
     KernelGaussianUnivariateDist, KernelGaussianBivariateAngleDist
 
 from ._framework._misc.math import Math
+from ._framework._misc.grid_stats import GridStats, GridStatsAccumulator
 from ._framework._misc.params_gaussian import ParamsGaussian, \
     ParamsGaussianUnivariate, ParamsGaussianBivariate
 from ._framework._misc.timer import Timer
-from ._framework._misc.utils import resolve_path
+from ._framework._misc.profiler import Profiler
 
 from ._framework._parsers.parser_ini import ParserIni
 from ._framework._parsers.parser_config import ParserConfig
 from ._framework._parsers.grid_io import GridFormat, GridIO
+from ._framework._parsers.grid_writer import GridWriter
+from ._framework._parsers.mesh_io import MeshFormat, MeshIO
 
 from ._framework._ui.param_handler import ParamHandler
 from ._framework._ui.app import App
+from ._framework._ui.server import JobServer, JobClient
 
 
 ############################# CONFIG FILE GLOBALS ##############################
 OUTPUT_FORMAT: GridFormat
+WRITER_QUEUE_SIZE: int
+SPARSE_BRICK_SIZE: int
+QUANTIZATION: str
+CMAP_PYRAMID_LEVELS: int
+CMAP_PYRAMID_MODE: str
+SAVE_GRID_STATS: bool
+STATS_HISTOGRAM_BINS: int
+MESH_ISOVALUES: str
+MESH_FORMAT: MeshFormat
 
 GZIP_COMPRESSION: int
 FLOAT_DTYPE: type
+GRID_LAYOUT: str
 WARNING_GRID_SIZE: float
+MEMORY_BUDGET: float = 0 # also used when reading grids outside an App, where config.ini is not loaded
 
 GRID_DX: float
 GRID_DY: float
@@ -48,3 +71,14 @@ __config_keys__ = set(__annotations__.keys())
 
 import pathlib as _pathlib
 PATH_CUSTOM_CONFIG: _pathlib.Path = None # "path/input/globals.ini"
+
+GRID_WRITER: GridWriter = None # background writer used by Grid.save_data while an App is running (None: write synchronously)
+
+PATH_PROFILE: _pathlib.Path = None # "path/output/profile.json" (--profile flag of every app)
+PROFILER: Profiler = None # instrumentation of the running App, if PATH_PROFILE is set (None: not profiled)
+
+MEMORY_BUDGET_SHARES: int = 1 # processes that share MEMORY_BUDGET at the same time (e.g. the workers of a batch)
+
+
+### the globals above are a compatibility shim over the current RunContext
+RunContext.install_shim(__name__)
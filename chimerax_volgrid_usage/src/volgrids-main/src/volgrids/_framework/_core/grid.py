@@ -13,9 +13,10 @@ class Grid:
         self.dx, self.dy, self.dz = ms.deltas
 
         if dtype is None: dtype = vg.FLOAT_DTYPE
-        self.grid = np.zeros(ms.resolution, dtype = dtype) if init_grid else None
+        self.grid = np.zeros(ms.resolution, dtype = dtype, order = Grid.get_numpy_order()) if init_grid else None
         self.dtype = dtype
         self.fmt: vg.GridFormat = None
+        self.quant_error: float = 0.0 # max absolute error introduced by quantization when the grid was stored (see QUANTIZATION)
 
 
     # --------------------------------------------------------------------------
@@ -65,16 +66,89 @@ class Grid:
 
     # --------------------------------------------------------------------------
     def copy(self):
-        obj = Grid(self.ms, init_grid = False)
-        obj.grid = np.copy(self.grid)
+        obj = Grid(self.ms, init_grid = False, dtype = self.dtype)
+        obj.grid = self.grid.copy() if self.is_sparse else np.copy(self.grid)
         return obj
 
 
     # --------------------------------------------------------------------------
     def is_empty(self):
+        if self.is_lazy: return self.grid.count_nonzero() == 0
+        if self.is_sparse: return not np.any(self.grid.bricks)
         return np.all(self.grid == 0)
 
 
+    # --------------------------------------------------------------------------
+    @property
+    def is_lazy(self) -> bool:
+        """Whether the data is still on disk, behind a GridProxy (see GridIO readers' `lazy` flag)."""
+        return isinstance(self.grid, vg.GridProxy)
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def is_sparse(self) -> bool:
+        """Whether the data is stored as non-empty bricks only (see `sparsify`)."""
+        return isinstance(self.grid, vg.SparseBricks)
+
+
+    # --------------------------------------------------------------------------
+    def materialize(self) -> "Grid":
+        """Load the data of a lazy grid into memory, or densify a sparse grid (no-op for regular grids)."""
+        if self.is_lazy: self.grid = self.grid.materialize()
+        if self.is_sparse: self.grid = self.grid.to_dense()
+        return self
+
+
+    # --------------------------------------------------------------------------
+    def sparsify(self, brick_size: int = None) -> "Grid":
+        """Switch to the block-sparse storage mode: only the bricks of `brick_size`
+        points per side (default: SPARSE_BRICK_SIZE) with nonzero values are kept.
+        Use `materialize` to get back a dense numpy array."""
+        if brick_size is None: brick_size = vg.SPARSE_BRICK_SIZE
+        if self.is_sparse and (self.grid.brick_size == brick_size): return self
+        self.grid = vg.SparseBricks.from_dense(np.asarray(self.grid), brick_size)
+        return self
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_numpy_order() -> str:
+        """Memory order of new grids: indexing is always [x,y,z], but with GRID_LAYOUT="zyx"
+        the buffer is Fortran-ordered, i.e. laid out like the ZYX arrays of CMAP/MRC files."""
+        return 'F' if vg.GRID_LAYOUT.lower() == "zyx" else 'C'
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def is_zyx_layout(arr) -> bool:
+        """Whether the [x,y,z]-indexed array is stored in ZYX order (x fastest varying)."""
+        return isinstance(arr, np.ndarray) and arr.flags.f_contiguous and not arr.flags.c_contiguous
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def layout(self) -> str:
+        return "zyx" if Grid.is_zyx_layout(self.grid) else "xyz"
+
+
+    # --------------------------------------------------------------------------
+    def get_zyx_view(self) -> np.ndarray:
+        """[z,y,x]-indexed view of the data. It's C-contiguous (i.e. can be handed to
+        writers without copies) when the layout is ZYX."""
+        return np.asarray(self.grid).transpose(2,1,0)
+
+
+    # --------------------------------------------------------------------------
+    def to_layout(self, layout: str) -> "Grid":
+        """Copy the data into the given memory layout ("xyz" or "zyx") if needed."""
+        self.materialize()
+        if   layout == "zyx": self.grid = np.asfortranarray(self.grid)
+        elif layout == "xyz": self.grid = np.ascontiguousarray(self.grid)
+        else: raise ValueError(f"Unknown grid layout: {layout}. Use 'xyz' or 'zyx'.")
+        return self
+
+
     # --------------------------------------------------------------------------
     def get_deltas    (self): return np.array((self.dx  , self.dy  , self.dz  ))
     def get_resolution(self): return np.array((self.xres, self.yres, self.zres))
@@ -88,17 +162,16 @@ class Grid:
         new_xmax, new_ymax, new_zmax = new_max
         new_xres, new_yres, new_zres = new_res
 
-        self.grid = vg.Math.interpolate_3d(
-            x0 = np.linspace(self.xmin, self.xmax, self.xres),
-            y0 = np.linspace(self.ymin, self.ymax, self.yres),
-            z0 = np.linspace(self.zmin, self.zmax, self.zres),
-            data_0 = self.grid,
-            new_coords = np.mgrid[
-                new_xmin : new_xmax : complex(0, new_xres),
-                new_ymin : new_ymax : complex(0, new_yres),
-                new_zmin : new_zmax : complex(0, new_zres),
-            ].T
-        ).astype(vg.FLOAT_DTYPE)
+        self.grid = vg.Math.resample_3d(
+            self.grid,
+            old_min = self.get_min_coords(),
+            old_max = self.get_max_coords(),
+            new_min = new_min,
+            new_max = new_max,
+            new_res = new_res,
+            order = Grid.get_numpy_order(),
+        )
+        self.dtype = vg.FLOAT_DTYPE
 
         self.xmin, self.ymin, self.zmin = new_xmin, new_ymin, new_zmin
         self.xmax, self.ymax, self.zmax = new_xmax, new_ymax, new_zmax
@@ -115,34 +188,69 @@ class Grid:
 
     # --------------------------------------------------------------------------
     def save_data(self, folder_out: Path, title: str):
+        """Write the grid (and its isosurfaces, if enabled). With an active background writer, the
+        grid itself is queued: it's read-only until it's written, so that modifying it in place
+        in the meantime raises instead of changing what's written (copy it first if it will be)."""
+        jobs = [self._get_write_job(folder_out, title)]
+        if (vg.MESH_ISOVALUES.lower() != "none") and not self.ms.do_traj:
+            jobs.append((vg.MeshIO.write_isosurfaces, (folder_out / f"{self.ms.molname}.{title}", self)))
+        jobs = [(vg.Profiler.wrap_write(func), args) for func, args in jobs]
+
+        if (vg.GRID_WRITER is None) or self.ms.memory_plan.sync_writes:
+            for func, args in jobs: func(*args)
+            return
+
+        ### sparse/lazy grids are read-only already
+        locked = self.grid if (isinstance(self.grid, np.ndarray) and self.grid.flags.writeable) else None
+        if locked is not None: locked.flags.writeable = False
+        try:
+            vg.GRID_WRITER.submit(_run_write_jobs, jobs, locked)
+        except BaseException:
+            if locked is not None: locked.flags.writeable = True
+            raise
+
+
+    # --------------------------------------------------------------------------
+    def _get_write_job(self, folder_out: Path, title: str) -> tuple[callable, tuple]:
         path_prefix = folder_out / f"{self.ms.molname}.{title}"
 
         if self.ms.do_traj:
             ### ignore the OUTPUT flag, CMAP is the only format that supports multiple frames
-            vg.GridIO.write_cmap(f"{path_prefix}.cmap", self, f"{self.ms.molname}.{self.ms.frame:04}")
-            return
+            return vg.GridIO.write_cmap, (f"{path_prefix}.cmap", self, f"{self.ms.molname}.{self.ms.frame:04}")
 
         if vg.OUTPUT_FORMAT == vg.GridFormat.DX:
-            vg.GridIO.write_dx(f"{path_prefix}.dx", self)
-            return
+            return vg.GridIO.write_dx, (f"{path_prefix}.dx", self)
 
         if vg.OUTPUT_FORMAT == vg.GridFormat.MRC:
-            vg.GridIO.write_mrc(f"{path_prefix}.mrc", self)
-            return
+            return vg.GridIO.write_mrc, (f"{path_prefix}.mrc", self)
 
         if vg.OUTPUT_FORMAT == vg.GridFormat.CCP4:
-            vg.GridIO.write_ccp4(f"{path_prefix}.ccp4", self)
-            return
+            return vg.GridIO.write_ccp4, (f"{path_prefix}.ccp4", self)
 
         if vg.OUTPUT_FORMAT == vg.GridFormat.CMAP:
-            vg.GridIO.write_cmap(f"{path_prefix}.cmap", self, self.ms.molname)
-            return
+            return vg.GridIO.write_cmap, (f"{path_prefix}.cmap", self, self.ms.molname)
 
         if vg.OUTPUT_FORMAT == vg.GridFormat.CMAP_PACKED:
-            vg.GridIO.write_cmap(folder_out / f"{self.ms.molname}.cmap", self, f"{self.ms.molname}.{title}")
-            return
+            return vg.GridIO.write_cmap, (folder_out / f"{self.ms.molname}.cmap", self, f"{self.ms.molname}.{title}")
+
+        if vg.OUTPUT_FORMAT == vg.GridFormat.SPARSE:
+            return vg.GridIO.write_sparse, (f"{path_prefix}.vgs", self)
+
+        if vg.OUTPUT_FORMAT == vg.GridFormat.NPY:
+            return vg.GridIO.write_npy, (f"{path_prefix}.npy", self)
 
         raise ValueError(f"Unknown output format: {vg.OUTPUT_FORMAT}.")
 
 
 # //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _run_write_jobs(jobs: list[tuple[callable, tuple]], locked: np.ndarray | None) -> None:
+    """Write jobs of a grid queued by `Grid.save_data`. Its array (`locked`) is writeable again once they're done."""
+    try:
+        for func, args in jobs: func(*args)
+    finally:
+        if locked is not None: locked.flags.writeable = True
+
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,115 @@
+import numpy as np
+
+import volgrids as vg
+
+# //////////////////////////////////////////////////////////////////////////////
+class GridProxy:
+    """Lazy, read-only stand-in for the `grid` array of a Grid, backed by a file.
+    Indexing follows the in-memory XYZ convention of Grid, while the data is read
+    from its on-disk layout (ZYX for CMAP and standard MRC/CCP4) only when needed.
+    Slicing, chunk-wise iteration and reductions never load the whole array;
+    `np.asarray(proxy)` (or `materialize`) does.
+    """
+    DEFAULT_CHUNK_SIZE = 16 # number of disk slabs (e.g. Z planes) read at once
+
+    def __init__(self, opener: callable, shape_disk: tuple[int], dtype, disk_is_zyx: bool = True,
+        scale: float = 1.0, zero_point: float = 0.0
+    ):
+        """
+        :param opener: callable returning a context manager that yields the on-disk
+            array-like (h5py dataset, mrcfile memmap...). It's called for every read,
+            so the proxy doesn't keep files open.
+        :param shape_disk: shape of the array in its on-disk layout.
+        :param dtype: dtype of the values returned by the proxy.
+        :param disk_is_zyx: whether the on-disk layout has the axes reversed (ZYX).
+        :param scale, zero_point: for quantized data, values are read as `(stored - zero_point) * scale`.
+        """
+        self._opener = opener
+        self._disk_is_zyx = disk_is_zyx
+        self._scale = scale
+        self._zero_point = zero_point
+        self.shape = tuple(shape_disk[::-1]) if disk_is_zyx else tuple(shape_disk)
+        self.dtype = np.dtype(dtype)
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def ndim(self) -> int: return len(self.shape)
+
+    @property
+    def size(self) -> int: return int(np.prod(self.shape))
+
+    @property
+    def slab_axis(self) -> int:
+        """Axis (in XYZ order) along which slabs are contiguous on disk (see `iter_chunks`)."""
+        return (self.ndim - 1) if self._disk_is_zyx else 0
+
+
+    # --------------------------------------------------------------------------
+    def __len__(self):
+        return self.shape[0]
+
+
+    # --------------------------------------------------------------------------
+    def __getitem__(self, key) -> np.ndarray:
+        """Basic (int/slice) indexing in XYZ order. Returns a numpy array."""
+        if not isinstance(key, tuple): key = (key,)
+        if any(k is Ellipsis for k in key):
+            i = key.index(Ellipsis)
+            key = key[:i] + (slice(None),) * (self.ndim - len(key) + 1) + key[i+1:]
+        key = key + (slice(None),) * (self.ndim - len(key))
+
+        for k in key:
+            if not isinstance(k, (slice, int, np.integer)):
+                raise TypeError(f"GridProxy only supports int and slice indexing, got {type(k)}. Materialize the grid first.")
+
+        with self._opener() as data:
+            if self._disk_is_zyx:
+                return vg.Math.dequantize(data[key[::-1]], self._scale, self._zero_point, self.dtype).transpose()
+            return vg.Math.dequantize(data[key], self._scale, self._zero_point, self.dtype)
+
+
+    # --------------------------------------------------------------------------
+    def __array__(self, dtype = None, copy = None):
+        arr = self[...]
+        return arr if dtype is None else arr.astype(dtype)
+
+
+    # --------------------------------------------------------------------------
+    def materialize(self) -> np.ndarray:
+        return self[...]
+
+
+    # --------------------------------------------------------------------------
+    def iter_chunks(self, chunk_size: int = None):
+        """Yield `(slices, block)` pairs covering the whole grid, where `block` is the
+        numpy array found at `grid[slices]`. Blocks are slabs along the slowest
+        on-disk axis (Z for ZYX data), so every read is contiguous on disk."""
+        if chunk_size is None: chunk_size = self.DEFAULT_CHUNK_SIZE
+        axis = self.slab_axis
+        n = self.shape[axis]
+        for start in range(0, n, chunk_size):
+            slices = [slice(None)] * self.ndim
+            slices[axis] = slice(start, min(start + chunk_size, n))
+            slices = tuple(slices)
+            yield slices, self[slices]
+
+
+    # --------------------------------------------------------------------------
+    def sum(self, chunk_size: int = None) -> float:
+        return sum(float(np.sum(block, dtype = np.float64)) for _,block in self.iter_chunks(chunk_size))
+
+    def min(self, chunk_size: int = None) -> float:
+        return min(float(np.min(block)) for _,block in self.iter_chunks(chunk_size))
+
+    def max(self, chunk_size: int = None) -> float:
+        return max(float(np.max(block)) for _,block in self.iter_chunks(chunk_size))
+
+    def mean(self, chunk_size: int = None) -> float:
+        return self.sum(chunk_size) / self.size
+
+    def count_nonzero(self, chunk_size: int = None) -> int:
+        return sum(int(np.count_nonzero(block)) for _,block in self.iter_chunks(chunk_size))
+
+
+# //////////////////////////////////////////////////////////////////////////////
@@ -0,0 +1,114 @@
+import numpy as np
+
+# //////////////////////////////////////////////////////////////////////////////
+class SparseBricks:
+    """Block-sparse storage for the `grid` array of a Grid. The grid is split in
+    cubic bricks of `brick_size` points per side; only the bricks with at least one
+    nonzero value are kept (`bricks`), together with their brick coordinates
+    (`index`, the occupancy index). Border bricks are zero-padded.
+    `np.asarray(obj)` (or `to_dense`) rebuilds the dense array.
+    """
+    def __init__(self, shape: tuple[int], dtype, brick_size: int, index: np.ndarray, bricks: np.ndarray):
+        self.shape = tuple(int(n) for n in shape)
+        self.dtype = np.dtype(dtype)
+        self.brick_size = int(brick_size)
+        self.index = np.asarray(index, dtype = np.int32).reshape(-1, 3) # (nbricks, 3)
+        self.bricks = bricks # (nbricks, brick_size, brick_size, brick_size)
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_dense(cls, arr: np.ndarray, brick_size: int) -> "SparseBricks":
+        b = int(brick_size)
+        blocks = _as_blocks(_pad_to_bricks(arr, b), b)
+        occupied = np.any(blocks, axis = (3,4,5))
+        return cls(arr.shape, arr.dtype, b, np.argwhere(occupied), blocks[occupied])
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def ndim(self) -> int: return len(self.shape)
+
+    @property
+    def size(self) -> int: return int(np.prod(self.shape))
+
+    @property
+    def nbricks(self) -> int: return len(self.index)
+
+    @property
+    def nbytes(self) -> int: return self.index.nbytes + self.bricks.nbytes
+
+    @property
+    def occupancy(self) -> float:
+        """Fraction of the bricks of the grid that are stored."""
+        total = np.prod(self._get_bricks_per_axis())
+        return self.nbricks / total if total > 0 else 0.0
+
+
+    # --------------------------------------------------------------------------
+    def __array__(self, dtype = None, copy = None):
+        arr = self.to_dense()
+        return arr if dtype is None else arr.astype(dtype)
+
+
+    # --------------------------------------------------------------------------
+    def to_dense(self) -> np.ndarray:
+        b = self.brick_size
+        padded = np.zeros(self._get_bricks_per_axis() * b, dtype = self.dtype)
+        blocks = _as_blocks(padded, b)
+        i, j, k = self.index.T
+        blocks[i, j, k] = self.bricks
+        sx, sy, sz = self.shape
+        if padded.shape == self.shape: return padded
+        return np.ascontiguousarray(padded[:sx, :sy, :sz])
+
+
+    # --------------------------------------------------------------------------
+    def get_slab(self, start: int, stop: int, axis: int = 0) -> np.ndarray:
+        """Dense copy of the points between `start` and `stop` along `axis`
+        (i.e. `np.asarray(self)[start:stop]` for axis 0), built from the bricks that overlap it."""
+        b = self.brick_size
+        first, last = start // b, -(-stop // b)
+        bricks_per_axis = self._get_bricks_per_axis()
+        bricks_per_axis[axis] = last - first
+
+        padded = np.zeros(bricks_per_axis * b, dtype = self.dtype)
+        blocks = _as_blocks(padded, b)
+        selected = (self.index[:,axis] >= first) & (self.index[:,axis] < last)
+        index = self.index[selected].copy()
+        index[:,axis] -= first
+        i, j, k = index.T
+        blocks[i, j, k] = self.bricks[selected]
+
+        slices = [slice(0, n) for n in self.shape]
+        slices[axis] = slice(start - first * b, stop - first * b)
+        return padded[tuple(slices)]
+
+
+    # --------------------------------------------------------------------------
+    def copy(self) -> "SparseBricks":
+        return SparseBricks(self.shape, self.dtype, self.brick_size, self.index.copy(), self.bricks.copy())
+
+
+    # --------------------------------------------------------------------------
+    def _get_bricks_per_axis(self) -> np.ndarray:
+        return -(-np.array(self.shape) // self.brick_size) # ceil division
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _pad_to_bricks(arr: np.ndarray, b: int) -> np.ndarray:
+    padding = [(0, (-n) % b) for n in arr.shape]
+    if not any(p for _,p in padding): return arr
+    return np.pad(arr, padding)
+
+
+# ------------------------------------------------------------------------------
+def _as_blocks(arr: np.ndarray, b: int) -> np.ndarray:
+    """View a (nx*b, ny*b, nz*b) array as (nx, ny, nz, b, b, b) bricks."""
+    nx, ny, nz = (n // b for n in arr.shape)
+    return arr.reshape(nx, b, ny, b, nz, b).transpose(0, 2, 4, 1, 3, 5)
+
+
+# ------------------------------------------------------------------------------
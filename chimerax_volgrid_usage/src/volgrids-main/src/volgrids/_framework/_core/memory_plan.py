@@ -0,0 +1,175 @@
+import os
+import numpy as np
+from dataclasses import dataclass, field
+
+import volgrids as vg
+
+# //////////////////////////////////////////////////////////////////////////////
+@dataclass
+class MemoryPlan:
+    """How the grids of a MolSystem are evaluated, so that the peak memory of the run stays
+    within MEMORY_BUDGET. The peak is estimated for every phase of the run (e.g. the trimming
+    and each SMIF, see `MolSystem.estimate_memory`) from the resolution, deltas and dtype.
+    When it doesn't fit, these actions are taken in order, until it does:
+      1. "chunked": coordinate temporaries (e.g. of the trimming sphere) are evaluated by slabs of points.
+      2. "sync writes": grids are written as soon as they're ready, instead of being queued for the background writer.
+      3. "float16": numeric grids are accumulated in half precision (files are still written as FLOAT_DTYPE).
+      4. "coarser deltas": fewer points for the same box.
+    The first two don't change the results. The last two do, so they're only taken for an explicit
+    MEMORY_BUDGET (> 0): the default budget depends on the memory free when the run starts, and the
+    same input must give the same grids whatever the load of the machine. When the plan still doesn't
+    fit (or for grids read from files, i.e. box data, which are never changed) a warning is printed instead.
+    The budget is split between the processes running at the same time (MEMORY_BUDGET_SHARES)."""
+    budget: float                # bytes available for the run (inf if unknown)
+    explicit_budget: bool        # whether the budget was set with MEMORY_BUDGET (only then the results may change to fit)
+    resolution: np.ndarray       # number of grid points in each dimension
+    deltas: np.ndarray           # size of each grid point in each dimension
+    dtype: type                  # dtype of the numeric grids
+    chunk_points: int = 0        # max grid points per slab of coordinate temporaries (0: not chunked)
+    sync_writes: bool = False    # whether to bypass the background writer
+    phases: dict[str, int] = field(default_factory = dict) # estimated peak bytes, by phase of the run
+    actions: list[str] = field(default_factory = list)     # actions taken to fit in the budget
+
+    CHUNK_POINTS = 1 << 20       # points per slab of the "chunked" action
+    BUDGET_AVAILABLE_FRACTION = 0.75 # fraction of the available memory used when MEMORY_BUDGET is 0
+    MAX_COARSENING_STEPS = 16
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def make(cls, ms: "vg.MolSystem", adjustable: bool = True) -> "MemoryPlan":
+        """Estimate the memory needed by `ms` with its current resolution and the dtype of its context.
+        If `adjustable`, take the actions described in the class docstring until it fits in the budget."""
+        plan = cls(
+            budget = cls.get_budget(ms.ctx.vg.MEMORY_BUDGET, ms.ctx.vg.MEMORY_BUDGET_SHARES),
+            explicit_budget = ms.ctx.vg.MEMORY_BUDGET > 0,
+            resolution = np.array(ms.resolution, dtype = int),
+            deltas = np.array(ms.deltas, dtype = float),
+            dtype = ms.ctx.vg.FLOAT_DTYPE,
+        )
+        plan._estimate(ms)
+        if not adjustable: return plan
+
+        actions = [plan._use_chunks, plan._use_sync_writes]
+        if plan.explicit_budget: actions += [plan._use_float16, plan._use_coarser_deltas]
+        for action in actions:
+            if plan.fits: break
+            action(ms)
+        return plan
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_budget(budget_gb: float, nshares: int = 1) -> float:
+        """Bytes of a MEMORY_BUDGET value (GB) for each of `nshares` processes. If it's 0 (or less), a
+        fraction of the memory currently available in the machine is used instead, or no limit if that's unknown."""
+        if budget_gb > 0: return budget_gb * 1e9 / max(1, nshares)
+        available = _get_available_memory()
+        return np.inf if (available is None) else available * MemoryPlan.BUDGET_AVAILABLE_FRACTION / max(1, nshares)
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def peak(self) -> int:
+        return max(self.phases.values(), default = 0)
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def fits(self) -> bool:
+        return self.peak <= self.budget
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def npoints(self) -> int:
+        return int(np.prod(self.resolution, dtype = np.int64))
+
+
+    # --------------------------------------------------------------------------
+    def describe(self) -> str:
+        rx, ry, rz = self.resolution
+        phase_peak = max(self.phases, key = self.phases.get, default = None)
+        str_budget = "unlimited" if np.isinf(self.budget) else _format_bytes(self.budget)
+        return ' '.join((
+            f"({rx}x{ry}x{rz}) grid of {self.npoints/1e6:.2f} million points,",
+            f"deltas {' '.join(f'{d:.3f}' for d in self.deltas)}, {np.dtype(self.dtype).name};",
+            f"estimated peak {_format_bytes(self.peak)} ({phase_peak}) for a budget of {str_budget}.",
+            f"Actions: {', '.join(self.actions) or 'none'}.",
+        ))
+
+
+    # --------------------------------------------------------------------------
+    def _estimate(self, ms: "vg.MolSystem") -> None:
+        self.phases = ms.estimate_memory(self)
+
+
+    # --------------------------------------------------------------------------
+    def _use_chunks(self, ms: "vg.MolSystem") -> None:
+        self._try_action(ms, "chunked", chunk_points = MemoryPlan.CHUNK_POINTS)
+
+
+    # --------------------------------------------------------------------------
+    def _use_sync_writes(self, ms: "vg.MolSystem") -> None:
+        self._try_action(ms, "sync writes", sync_writes = True)
+
+
+    # --------------------------------------------------------------------------
+    def _use_float16(self, ms: "vg.MolSystem") -> None:
+        if np.dtype(self.dtype).itemsize <= 2: return
+        self._try_action(ms, "float16", dtype = np.float16)
+
+
+    # --------------------------------------------------------------------------
+    def _use_coarser_deltas(self, ms: "vg.MolSystem") -> None:
+        box_size = ms.maxCoords - ms.minCoords
+        resolution0 = self.resolution
+        for _ in range(MemoryPlan.MAX_COARSENING_STEPS):
+            ### not every term scales with the number of points, hence the extra 5% per step
+            factor = 1.05 * (self.peak / self.budget) ** (1/3)
+            self.resolution = np.maximum(1, np.floor(self.resolution / factor)).astype(int)
+            self.deltas = box_size / self.resolution
+            self._estimate(ms)
+            if self.fits: break
+        self.actions.append(f"coarser deltas (from {'x'.join(str(r) for r in resolution0)} points)")
+
+
+    # --------------------------------------------------------------------------
+    def _try_action(self, ms: "vg.MolSystem", action: str, **changes) -> None:
+        """Apply the changes of an action, and keep them only if they reduce the estimate of some phase."""
+        old_values = {k: getattr(self, k) for k in changes}
+        old_phases = self.phases
+        for k,v in changes.items(): setattr(self, k, v)
+        self._estimate(ms)
+
+        if any(self.phases[k] < v for k,v in old_phases.items() if k in self.phases):
+            self.actions.append(action)
+            return
+        for k,v in old_values.items(): setattr(self, k, v)
+        self.phases = old_phases
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _get_available_memory() -> int | None:
+    """Bytes of memory available to new allocations (without swapping), or None if unknown."""
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+# ------------------------------------------------------------------------------
+def _format_bytes(nbytes: float) -> str:
+    return f"{nbytes/1e9:.2f} GB" if (nbytes >= 1e9) else f"{nbytes/1e6:.1f} MB"
+
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,166 @@
+import numpy as np
+
+import volgrids as vg
+
+# //////////////////////////////////////////////////////////////////////////////
+class Mesh:
+    """Triangle mesh, e.g. the isosurface of a Grid (see `from_grid`).
+    `vertices` are (nvertices, 3) world coordinates and `faces` are (nfaces, 3)
+    vertex indices, wound counter-clockwise when seen from the outside of the surface."""
+    DEFAULT_CHUNK_SIZE = 32 # number of X planes of cells processed at once
+
+    def __init__(self, vertices: np.ndarray, faces: np.ndarray):
+        self.vertices = np.asarray(vertices, dtype = np.float32).reshape(-1, 3)
+        self.faces = np.asarray(faces, dtype = np.uint32).reshape(-1, 3)
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def nvertices(self) -> int: return len(self.vertices)
+
+    @property
+    def nfaces(self) -> int: return len(self.faces)
+
+    @property
+    def is_empty(self) -> bool: return self.nfaces == 0
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_grid(cls, grid: "vg.Grid", level: float, chunk_size: int = None) -> "Mesh":
+        """Isosurface of the grid at `level`, extracted with a vectorized marching
+        tetrahedra (every cell is split in 6 tetrahedra along its main diagonal, so
+        the surface has no ambiguous cases nor holes). For positive levels the surface
+        encloses the points above `level`, for negative levels the points below it.
+        Cells are processed in slabs of `chunk_size` X planes to bound the memory usage."""
+        if chunk_size is None: chunk_size = cls.DEFAULT_CHUNK_SIZE
+        arr = np.asarray(grid.grid)
+        if arr.dtype == bool: arr = arr.astype(np.float32)
+        nx, ny, nz = arr.shape
+        if min(nx, ny, nz) < 2: return cls(np.empty((0,3)), np.empty((0,3)))
+
+        ### every surface vertex lies on an edge between two corners a, b of a cell, where
+        ### b = a + offset(b ^ a). The edge is identified by the key: flat_index(a) * 8 + (b ^ a)
+        edge_keys = []
+        for x0 in range(0, nx - 1, chunk_size):
+            x1 = min(x0 + chunk_size, nx - 1)
+            slab = arr[x0 : x1 + 1]
+            inside = (slab > level) if level >= 0 else (slab < level)
+            edge_keys.append(_get_slab_edge_keys(inside, x0, (ny, nz)))
+
+        edge_keys = np.concatenate(edge_keys)
+        if edge_keys.size == 0: return cls(np.empty((0,3)), np.empty((0,3)))
+        unique_keys, faces = np.unique(edge_keys, return_inverse = True)
+
+        ### place the vertices along their edges by linear interpolation
+        idx_a = np.array(np.unravel_index(unique_keys >> 3, arr.shape)).T
+        idx_b = idx_a + _CORNER_OFFSETS[unique_keys & 7]
+        val_a = arr[tuple(idx_a.T)].astype(np.float64)
+        val_b = arr[tuple(idx_b.T)].astype(np.float64)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            t = np.clip(np.nan_to_num((level - val_a) / (val_b - val_a), nan = 0.5), 0, 1)
+
+        positions = idx_a + t[:,None] * (idx_b - idx_a)
+        vertices = grid.get_min_coords() + positions * grid.get_deltas()
+        return cls(vertices, faces.reshape(-1, 3))
+
+
+    # --------------------------------------------------------------------------
+    def get_vertex_normals(self) -> np.ndarray:
+        """Unit normals of the vertices (area weighted average of the normals of their faces)."""
+        v0, v1, v2 = (self.vertices[self.faces[:,i]].astype(np.float64) for i in range(3))
+        face_normals = np.cross(v1 - v0, v2 - v0)
+        normals = np.zeros((self.nvertices, 3), dtype = np.float64)
+        for i in range(3):
+            np.add.at(normals, self.faces[:,i], face_normals)
+        norm = np.linalg.norm(normals, axis = 1, keepdims = True)
+        norm[norm == 0] = 1
+        return (normals / norm).astype(np.float32)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+### corners of a cell: c = x | y << 1 | z << 2
+_CORNER_OFFSETS = np.array([(c & 1, (c >> 1) & 1, (c >> 2) & 1) for c in range(8)], dtype = np.int64)
+
+### Kuhn decomposition of a cell: every tetrahedron goes from corner 0 to corner 7
+### through a path of unit steps, so all of their edges join a corner with a superset of it
+_TETRAHEDRA = ((0,1,3,7), (0,1,5,7), (0,2,3,7), (0,2,6,7), (0,4,5,7), (0,4,6,7))
+
+
+# ------------------------------------------------------------------------------
+def _build_triangle_table() -> list[list[list[tuple[int, int]]]]:
+    """For every tetrahedron and every mask of its corners being inside the surface
+    (bit i: corner i of the tetrahedron), the triangles to emit, as triplets of cell
+    edges (corner_a, corner_b) with corner_a < corner_b. The winding is chosen so the
+    normals point from the inside corners to the outside ones."""
+    def _edge(a, b): return (min(a,b), max(a,b))
+
+    table = []
+    for tetra in _TETRAHEDRA:
+        tetra_table = []
+        for mask in range(16):
+            ins  = [c for i,c in enumerate(tetra) if (mask >> i) & 1]
+            outs = [c for i,c in enumerate(tetra) if not (mask >> i) & 1]
+
+            if len(ins) in (1, 3):
+                lone, others = (ins[0], outs) if len(ins) == 1 else (outs[0], ins)
+                triangles = [[_edge(lone, c) for c in others]]
+            elif len(ins) == 2:
+                (a, b), (c, d) = ins, outs
+                triangles = [
+                    [_edge(a,c), _edge(a,d), _edge(b,d)],
+                    [_edge(a,c), _edge(b,d), _edge(b,c)],
+                ]
+            else:
+                triangles = []
+
+            if triangles: # fix the winding using the edge midpoints
+                direction = _CORNER_OFFSETS[outs].mean(axis = 0) - _CORNER_OFFSETS[ins].mean(axis = 0)
+                for tri in triangles:
+                    p0, p1, p2 = (_CORNER_OFFSETS[list(e)].mean(axis = 0) for e in tri)
+                    if np.dot(np.cross(p1 - p0, p2 - p0), direction) < 0:
+                        tri[1], tri[2] = tri[2], tri[1]
+            tetra_table.append(triangles)
+        table.append(tetra_table)
+    return table
+
+_TRIANGLE_TABLE = _build_triangle_table()
+
+
+# ------------------------------------------------------------------------------
+def _get_slab_edge_keys(inside: np.ndarray, x_start: int, shape_yz: tuple[int, int]) -> np.ndarray:
+    """Edge keys (see `Mesh.from_grid`) of the triangles of the cells between the
+    X planes of `inside` (a boolean slab starting at plane `x_start` of the grid)."""
+    ny, nz = shape_yz
+    cx, cy, cz = (n - 1 for n in inside.shape)
+    corners = [inside[ox : ox+cx, oy : oy+cy, oz : oz+cz] for ox,oy,oz in _CORNER_OFFSETS]
+
+    ### only cells with both inside and outside corners are crossed by the surface
+    n_inside = np.zeros((cx, cy, cz), dtype = np.uint8)
+    for corner in corners: n_inside += corner
+    cells = np.argwhere((n_inside > 0) & (n_inside < 8))
+    if cells.size == 0: return np.empty(0, dtype = np.int64)
+
+    corner_inside = [corner[tuple(cells.T)] for corner in corners]
+    cells[:,0] += x_start
+    cell_ids = (cells[:,0] * ny + cells[:,1]) * nz + cells[:,2] # flat index of corner 0
+    corner_ids = [(ox * ny + oy) * nz + oz for ox,oy,oz in _CORNER_OFFSETS]
+
+    keys = []
+    for tetra, tetra_table in zip(_TETRAHEDRA, _TRIANGLE_TABLE):
+        masks = sum(corner_inside[c].astype(np.uint8) << i for i,c in enumerate(tetra))
+        for mask in range(1, 15):
+            if not tetra_table[mask]: continue
+            ids = cell_ids[masks == mask]
+            if ids.size == 0: continue
+            for triangle in tetra_table[mask]:
+                keys.append(np.stack([
+                    (ids + corner_ids[a]) * 8 + (a ^ b) for a,b in triangle
+                ], axis = 1))
+
+    if not keys: return np.empty(0, dtype = np.int64)
+    return np.concatenate(keys).ravel()
+
+
+# ------------------------------------------------------------------------------
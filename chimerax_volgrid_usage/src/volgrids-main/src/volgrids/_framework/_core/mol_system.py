@@ -1,14 +1,17 @@
 import numpy as np
-import MDAnalysis as mda
 from pathlib import Path
 
 import volgrids as vg
 
+mda = vg.lazy_import("MDAnalysis")
+
 # //////////////////////////////////////////////////////////////////////////////
 class MolSystem:
+    _UNIVERSE_CACHE: dict[tuple, "mda.Universe"] = {} # topology of the last structure (without trajectory) loaded in this process
+
     def __init__(self,
         path_struct: Path = None, path_traj: Path = None,
-        box_data: dict = None
+        box_data: dict = None, ctx: "vg.RunContext" = None
     ):
         self.minCoords  : np.ndarray[float]   # minimum coordinates of the bounding box
         self.maxCoords  : np.ndarray[float]   # maximum coordinates of the bounding box
@@ -20,6 +23,10 @@ class MolSystem:
         self.do_traj    : None | bool         # whether this is a trajectory or a single structure (None if no structure is provided)
         self.system     : None | mda.Universe # MDAnalysis Universe object for the molecular system
         self.frame      : None | int          # current frame number (if trajectory is used)
+        self.ctx        : vg.RunContext       # configuration of the run (default: the current one)
+        self.memory_plan: vg.MemoryPlan       # how the grids are evaluated to fit in MEMORY_BUDGET
+
+        self._set_context(ctx)
 
         if path_struct is not None:
             ### molecular system with a molecular structure (optionally a trajectory)
@@ -57,23 +64,45 @@ class MolSystem:
         })
 
 
+    # --------------------------------------------------------------------------
+    def _set_context(self, ctx: "vg.RunContext" = None):
+        self.ctx = vg.RunContext.current() if ctx is None else ctx
+
+
     # --------------------------------------------------------------------------
     def _init_attrs_from_molecules(self, path_struct: Path, path_traj: Path = None):
         self.molname = path_struct.stem
         self.do_traj = path_traj is not None
 
-        if self.do_traj:
-            self.system = mda.Universe(str(path_struct), str(path_traj))
-            self.frame = 0
-        else:
-            self.system = mda.Universe(str(path_struct))
-            self.frame = None
+        with vg.Profiler.span("topology", structure = path_struct.name):
+            if self.do_traj:
+                self.system = mda.Universe(str(path_struct), str(path_traj))
+                self.frame = 0
+            else:
+                self.system = MolSystem._load_universe(path_struct)
+                self.frame = None
 
         self._infer_box_attributes()
 
         self._set_deltas_resolution()
 
-        self._warning_big_grid()
+        self._plan_memory(adjustable = True)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def _load_universe(path_struct: Path) -> "mda.Universe":
+        """Universe of a single structure. It's reused while the same (unmodified) file is
+        requested again in this process, e.g. by the jobs sent to a warm JobServer worker.
+        Trajectories are not cached, as iterating over them changes the state of the Universe."""
+        path_struct = Path(path_struct).resolve()
+        key = (path_struct, path_struct.stat().st_mtime_ns)
+        universe = MolSystem._UNIVERSE_CACHE.get(key)
+        if universe is None:
+            universe = mda.Universe(str(path_struct))
+            MolSystem._UNIVERSE_CACHE.clear()
+            MolSystem._UNIVERSE_CACHE[key] = universe
+        return universe
 
 
     # --------------------------------------------------------------------------
@@ -95,13 +124,13 @@ class MolSystem:
         self.deltas     = np.array(box_data["deltas"],     dtype = float)
         self._calc_radius_and_cog()
 
-        self._warning_big_grid()
+        self._plan_memory(adjustable = False)
 
 
     # --------------------------------------------------------------------------
     def _infer_box_attributes(self):
-        self.minCoords = np.min(self.system.coord.positions, axis = 0) - vg.EXTRA_BOX_SIZE
-        self.maxCoords = np.max(self.system.coord.positions, axis = 0) + vg.EXTRA_BOX_SIZE
+        self.minCoords = np.min(self.system.coord.positions, axis = 0) - self.ctx.vg.EXTRA_BOX_SIZE
+        self.maxCoords = np.max(self.system.coord.positions, axis = 0) + self.ctx.vg.EXTRA_BOX_SIZE
         self._calc_radius_and_cog()
 
 
@@ -114,24 +143,44 @@ class MolSystem:
     # --------------------------------------------------------------------------
     def _set_deltas_resolution(self):
         box_size = self.maxCoords - self.minCoords
-        if vg.USE_FIXED_DELTAS:
-            self.deltas = np.array([vg.GRID_DX, vg.GRID_DY, vg.GRID_DZ])
+        if self.ctx.vg.USE_FIXED_DELTAS:
+            self.deltas = np.array([self.ctx.vg.GRID_DX, self.ctx.vg.GRID_DY, self.ctx.vg.GRID_DZ])
             self.resolution = np.round(box_size / self.deltas).astype(int)
         else:
-            self.resolution = np.array([vg.GRID_XRES, vg.GRID_YRES, vg.GRID_ZRES], dtype = int)
+            self.resolution = np.array([self.ctx.vg.GRID_XRES, self.ctx.vg.GRID_YRES, self.ctx.vg.GRID_ZRES], dtype = int)
             self.deltas = box_size / self.resolution
 
 
     # --------------------------------------------------------------------------
-    def _warning_big_grid(self):
-        rx, ry, rz = self.resolution
-        grid_size = rx*ry*rz
-        if grid_size > vg.WARNING_GRID_SIZE:
-            print()
-            while True:
-                choice = input(f">>> WARNING: resulting ({rx}x{ry}x{rz}) grid would contain {grid_size/1e6:.2f} million points. Proceed? [Y/N]\n").upper()
-                if choice == 'Y': break
-                if choice == 'N': exit()
+    def estimate_memory(self, plan: "vg.MemoryPlan") -> dict[str, int]:
+        """Estimated peak bytes of each phase of the run, for the resolution, deltas and dtype of `plan`.
+        A generic run holds one grid, a temporary of the same size while writing it
+        and the grids queued in the background writer. Subclasses refine this."""
+        npoints = plan.npoints
+        itemsize = np.dtype(plan.dtype).itemsize
+        return {"grid": npoints * (2 * itemsize + self._get_writer_bytes_per_point(plan))}
+
+
+    # --------------------------------------------------------------------------
+    def _get_writer_bytes_per_point(self, plan: "vg.MemoryPlan") -> int:
+        """Grids held by the background writer, if any: the queued ones and the one being written."""
+        writer: vg.GridWriter = self.ctx.vg.GRID_WRITER
+        if plan.sync_writes or (writer is None): return 0
+        return (writer.queue_size + 1) * np.dtype(plan.dtype).itemsize
+
+
+    # --------------------------------------------------------------------------
+    def _plan_memory(self, adjustable: bool):
+        """Replace the resolution and deltas by the ones of the memory plan, and log it if
+        it needed any action, doesn't fit or the grid is bigger than WARNING_GRID_SIZE."""
+        plan = self.memory_plan = vg.MemoryPlan.make(self, adjustable)
+        self.resolution, self.deltas = plan.resolution, plan.deltas
+        vg.Profiler.count("grid_points", plan.npoints)
+
+        if not plan.fits:
+            print(f"...>>> WARNING: memory plan exceeds MEMORY_BUDGET: {plan.describe()}", flush = True)
+        elif plan.actions or (plan.npoints > self.ctx.vg.WARNING_GRID_SIZE):
+            print(f"...>>> Memory plan: {plan.describe()}", flush = True)
 
 
 # //////////////////////////////////////////////////////////////////////////////
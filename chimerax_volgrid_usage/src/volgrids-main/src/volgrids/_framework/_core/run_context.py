@@ -0,0 +1,148 @@
+import sys, types, contextvars
+from contextlib import contextmanager
+
+# //////////////////////////////////////////////////////////////////////////////
+class RunContext:
+    """Configuration and paths of one run: the values of the config file, command line and
+    numeric globals of the volgrids modules (`vg`, `sm`, `ve`, `vgt`), e.g. `ctx.sm.FOLDER_OUT`.
+
+    Every App creates its own context and passes it to the objects doing the work (MolSystem,
+    from which the Trimmer and the SMIFs take it as `ms.ctx`). The module globals are kept as a
+    compatibility shim: reading or setting e.g. `sm.FOLDER_OUT` uses the current context of the
+    thread (or asyncio task), i.e. the one of the App being initialized or run in it, or the
+    defaults of the module when there's none. This way several apps can be run at the same time
+    in one process (e.g. in threads) without seeing each other's configuration."""
+    ALIASES = {
+        "vg":  "volgrids",
+        "sm":  "volgrids.smiffer",
+        "ve":  "volgrids.veins",
+        "vgt": "volgrids.vgtools",
+    }
+    _KEYS: dict[str, frozenset[str]] = {} # names of the shimmed globals, by module name
+    _DEFAULTS: "RunContext" = None        # values of the globals outside any run
+
+    def __init__(self, values: dict[str, dict[str, any]] = None):
+        self._scopes: dict[str, _Scope] = {}
+        for name, scope_values in (values or {}).items():
+            self._scopes[name] = _Scope(dict(scope_values))
+
+
+    # --------------------------------------------------------------------------
+    def __getattr__(self, alias: str) -> "_Scope":
+        name = RunContext.ALIASES.get(alias)
+        if name is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{alias}'")
+        return self.scope(name)
+
+
+    # --------------------------------------------------------------------------
+    def scope(self, module: "types.ModuleType|str") -> "_Scope":
+        """Values of the globals of a module (given as the module object or its name),
+        e.g. `ctx.scope(sm).DO_SMIF_APBS = False` (same as `ctx.sm.DO_SMIF_APBS = False`)."""
+        name = module if isinstance(module, str) else module.__name__
+        scope = self._scopes.get(name)
+        if scope is None: # module imported after this context was created: start from its defaults
+            defaults = RunContext._DEFAULTS._scopes.get(name)
+            scope = self._scopes[name] = _Scope({} if defaults is None else dict(vars(defaults)))
+        return scope
+
+
+    # --------------------------------------------------------------------------
+    def copy(self) -> "RunContext":
+        return RunContext({name: vars(scope) for name, scope in self._scopes.items()})
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def current() -> "RunContext":
+        """Context of the run in this thread/task (the defaults if there's none)."""
+        ctx = _CURRENT.get()
+        return RunContext._DEFAULTS if ctx is None else ctx
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_defaults(cls) -> "RunContext":
+        """New context with the values the globals have outside any run, e.g. for a new App."""
+        return cls._DEFAULTS.copy()
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_current(cls) -> "RunContext":
+        """New context with the values of the current one, e.g. for an App run from within another."""
+        return cls.current().copy()
+
+
+    # --------------------------------------------------------------------------
+    def set_current(self) -> None:
+        """Make this the current context of this thread/task, until another one is set."""
+        _CURRENT.set(self)
+
+
+    # --------------------------------------------------------------------------
+    @contextmanager
+    def activate(self):
+        """Make this the current context of this thread/task inside a `with` block."""
+        token = _CURRENT.set(self)
+        try:
+            yield self
+        finally:
+            _CURRENT.reset(token)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def install_shim(name_module: str) -> None:
+        """Turn the uppercase globals of a module (annotated or assigned) into the compatibility
+        shim described in the class docstring. To be called at the end of the module's `__init__`."""
+        module = sys.modules[name_module]
+        keys = set(getattr(module, "__annotations__", {})) | {k for k in vars(module) if k.isupper()}
+        RunContext._KEYS[name_module] = frozenset(keys)
+        RunContext._DEFAULTS._scopes[name_module] = _Scope(
+            {k: module.__dict__.pop(k) for k in keys if k in module.__dict__}
+        )
+        module.__class__ = _ShimModule
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _Scope:
+    """Globals of one module in a RunContext. Its `__dict__` is the storage of the values."""
+    def __init__(self, values: dict[str, any]):
+        self.__dict__ = values
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(sorted(vars(self)))})"
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _ShimModule(types.ModuleType):
+    """Module whose shimmed globals are looked up in the current RunContext. They're not stored
+    in the module's `__dict__`, so `__getattr__` is only reached for them (and for missing names)."""
+    def __getattr__(self, key: str):
+        name = self.__name__
+        if key in RunContext._KEYS[name]:
+            values = vars(RunContext.current().scope(name))
+            if key in values: return values[key]
+        raise AttributeError(f"module '{name}' has no attribute '{key}'")
+
+
+    # --------------------------------------------------------------------------
+    def __setattr__(self, key: str, value: any):
+        if key in RunContext._KEYS[self.__name__]:
+            setattr(RunContext.current().scope(self.__name__), key, value)
+            return
+        super().__setattr__(key, value)
+
+
+    # --------------------------------------------------------------------------
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | RunContext._KEYS[self.__name__])
+
+
+# ------------------------------------------------------------------------------
+_CURRENT: contextvars.ContextVar[RunContext] = contextvars.ContextVar("volgrids_run_context", default = None)
+RunContext._DEFAULTS = RunContext()
+
+
+# ------------------------------------------------------------------------------
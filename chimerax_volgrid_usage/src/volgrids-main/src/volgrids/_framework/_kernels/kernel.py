@@ -16,6 +16,32 @@ def _clamp_indices(g_idx0, g_idx1, k_idx0, k_idx1, g_res, k_res):
     return g_idx0, g_idx1, k_idx0, k_idx1
 
 
+# ------------------------------------------------------------------------------
+def _get_geometry(kernel_res: np.ndarray, deltas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Coordinates, centered coordinates and distances to the center of the kernel points.
+    They only depend on the kernel shape, so they're computed once per process and reused
+    by every kernel with that shape (e.g. by the successive structures of a smiffer batch)."""
+    key = (tuple(int(n) for n in kernel_res), tuple(float(d) for d in deltas))
+    geometry = _GEOMETRY_CACHE.get(key)
+    if geometry is not None:
+        vg.Profiler.count("kernels_cached")
+        return geometry
+
+    vg.Profiler.count("kernels_built")
+    with vg.Profiler.span("kernel build", shape = list(key[0])):
+        if len(_GEOMETRY_CACHE) >= _GEOMETRY_CACHE_SIZE: _GEOMETRY_CACHE.clear()
+        center = np.floor(kernel_res / 2) * deltas
+        coords = vg.Math.get_coords_array(kernel_res, deltas)
+        shifted_coords = coords - center
+        dist = vg.Math.get_norm(shifted_coords)
+        for arr in (coords, shifted_coords, dist): arr.flags.writeable = False
+        geometry = _GEOMETRY_CACHE[key] = (coords, shifted_coords, dist)
+    return geometry
+
+_GEOMETRY_CACHE: dict[tuple, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+_GEOMETRY_CACHE_SIZE = 32
+
+
 # //////////////////////////////////////////////////////////////////////////////
 class Kernel:
     def __init__(self, radius, deltas, dtype, operation = "sum"):
@@ -28,12 +54,14 @@ class Kernel:
         self.grid = None
         self.grid_origin = None
         self.grid_res = None
+        self.grid_is_zyx = False
 
-        ##### initizalize auxiliary kernel of distance values
+        ##### initizalize auxiliary kernel of distance values (shared, read-only)
         self.center = np.floor(self.kernel_res / 2) * self.deltas
-        self.coords = vg.Math.get_coords_array(self.kernel_res, self.deltas)
-        self.shifted_coords = self.coords - self.center
-        self.dist = vg.Math.get_norm(self.shifted_coords)
+        self.coords, self.shifted_coords, self.dist = _get_geometry(self.kernel_res, self.deltas)
+
+        ##### stamp counters, if the run is profiled (see vg.Profiler)
+        self.counts = vg.Profiler.stamp_counts()
 
         ##### set operation
         self.operation: callable[np.array, np.array]
@@ -48,6 +76,7 @@ class Kernel:
         self.grid = grid
         self.grid_origin = grid_origin
         self.grid_res = np.array(grid.shape)
+        self.grid_is_zyx = vg.Grid.is_zyx_layout(grid)
 
 
     # --------------------------------------------------------------------------
@@ -62,8 +91,10 @@ class Kernel:
         idx_end = idx_start + self.kernel_res
 
         ##### skip cases where the kernel would be stamped outside the big grid
-        if (idx_end < 0).any(): return
-        if (idx_start > self.grid_res).any(): return
+        counts = self.counts
+        if (idx_end < 0).any() or (idx_start > self.grid_res).any():
+            if counts is not None: counts.outside += 1
+            return
 
         ##### initialize the grid (g_*) and kernel (k_*) indices
         g_i0, g_j0, g_k0 = idx_start
@@ -79,6 +110,14 @@ class Kernel:
         g_j0, g_j1, k_j0, k_j1 = _clamp_indices(g_j0, g_j1, k_j0, k_j1, g_ry, k_ry)
         g_k0, g_k1, k_k0, k_k1 = _clamp_indices(g_k0, g_k1, k_k0, k_k1, g_rz, k_rz)
 
+        if counts is not None:
+            counts.stamped += 1
+            if k_i0 or k_j0 or k_k0 or (k_i1 != k_rx) or (k_j1 != k_ry) or (k_k1 != k_rz): counts.clamped += 1
+
+        ##### keep the kernel in the same memory layout as the big grid (see GRID_LAYOUT)
+        if self.grid_is_zyx and not self.kernel.flags.f_contiguous:
+            self.kernel = np.asfortranarray(self.kernel)
+
         ##### stamp the kernel on the big grid
         subkernel = self.kernel[k_i0:k_i1, k_j0:k_j1, k_k0:k_k1]
         subgrid   = self.grid  [g_i0:g_i1, g_j0:g_j1, g_k0:g_k1]
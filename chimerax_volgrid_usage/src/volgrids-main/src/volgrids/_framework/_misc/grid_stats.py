@@ -0,0 +1,211 @@
+import json
+import numpy as np
+from typing import ClassVar
+from dataclasses import dataclass, field, asdict
+
+# //////////////////////////////////////////////////////////////////////////////
+@dataclass
+class GridStats:
+    """Summary of the values of a grid. It's computed by the GridIO writers while
+    saving (see SAVE_GRID_STATS and GridStatsAccumulator) and can be read back without
+    loading the grid data with `GridIO.read_stats`."""
+    ISOVALUE_FRACTIONS: ClassVar[tuple[float]] = (0.5, 0.9, 0.99)
+
+    npoints: int
+    nonzero: int
+    min: float
+    max: float
+    mean: float
+    hist_counts: list[int] = field(default_factory = list)   # histogram of the nonzero values
+    hist_edges:  list[float] = field(default_factory = list)
+    isovalues: dict[str, list[float]] = field(default_factory = dict)
+        ### "positive"/"negative": for each of ISOVALUE_FRACTIONS, the level that leaves
+        ### that fraction of the positive/negative points closer to zero
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_array(cls, arr: np.ndarray, nbins: int) -> "GridStats":
+        """Statistics of a whole array (e.g. when they're not stored in its file)."""
+        acc = GridStatsAccumulator()
+        arr = np.asarray(arr)
+        n = GridStatsAccumulator.slab_length(arr)
+        for i in range(0, len(arr), n):
+            acc.update(arr[i : i + n])
+        return acc.finish(nbins)
+
+
+    # --------------------------------------------------------------------------
+    def get_default_isovalues(self, fraction: float = 0.9) -> list[float]:
+        """One suggested isovalue per sign of the grid values (positive first), taken
+        at the given fraction of ISOVALUE_FRACTIONS."""
+        i = self.ISOVALUE_FRACTIONS.index(fraction)
+        return [self.isovalues[sign][i] for sign in ("positive", "negative") if sign in self.isovalues]
+
+
+    # --------------------------------------------------------------------------
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_json(cls, str_json: str) -> "GridStats":
+        return cls(**json.loads(str_json))
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class GridStatsAccumulator:
+    """GridStats computed slab by slab, by the writers that go through the grid anyway
+    (e.g. while formatting or compressing each slab), so that no extra pass over the
+    whole grid is needed. Min, max, mean and the nonzero count are exact. The histogram
+    and the isovalues are derived from a fine histogram of the float32 bit patterns
+    (128 buckets per power of two, i.e. within 0.8% of the exact values)."""
+    SLAB_POINTS = 1 << 20 # points per slab of the writers that don't have slabs of their own
+    _SHIFT = 16           # low bits of the float32 patterns dropped by the fine histogram
+    _NEG = 1 << 15        # first bucket of the negative values (sign bit)
+
+    def __init__(self):
+        self.npoints = 0
+        self.nonzero = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min_positive = np.inf
+        self.max_negative = -np.inf
+        self._buckets = np.zeros(1 << (32 - self._SHIFT), dtype = np.int64)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def slab_length(arr: np.ndarray) -> int:
+        """Length along the first axis of slabs of about SLAB_POINTS points of `arr`."""
+        points_per_row = max(1, int(np.prod(arr.shape[1:])))
+        return max(1, GridStatsAccumulator.SLAB_POINTS // points_per_row)
+
+
+    # --------------------------------------------------------------------------
+    def update(self, slab: np.ndarray) -> None:
+        slab = np.asarray(slab)
+        if slab.size == 0: return
+        if slab.dtype == bool: slab = slab.view(np.uint8)
+        values = slab.astype(np.float32, copy = False).ravel()
+
+        self.npoints += values.size
+        self.nonzero += int(np.count_nonzero(values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.sum += float(np.sum(values, dtype = np.float64))
+        self.sum_squares += float(np.dot(values, values.astype(np.float64)))
+        self.min_positive = min(self.min_positive, float(np.min(values, where = values > 0, initial = np.inf)))
+        self.max_negative = max(self.max_negative, float(np.max(values, where = values < 0, initial = -np.inf)))
+
+        ids = values.view(np.uint32) >> self._SHIFT
+        self._buckets += np.bincount(ids, minlength = len(self._buckets))
+
+
+    # --------------------------------------------------------------------------
+    def add_zeros(self, n: int) -> None:
+        """Account for `n` zeros that are not stored (e.g. the empty bricks of a sparse grid)."""
+        if n <= 0: return
+        self.npoints += n
+        self.min = min(self.min, 0.0)
+        self.max = max(self.max, 0.0)
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def mean(self) -> float:
+        return self.sum / self.npoints if self.npoints else 0.0
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def rms(self) -> float:
+        """Standard deviation of the values (the "rms" field of MRC headers)."""
+        if not self.npoints: return 0.0
+        return float(np.sqrt(max(0.0, self.sum_squares / self.npoints - self.mean**2)))
+
+
+    # --------------------------------------------------------------------------
+    def finish(self, nbins: int) -> GridStats:
+        if self.npoints == 0: return GridStats(0, 0, 0.0, 0.0, 0.0)
+
+        counts_pos, lower_pos, upper_pos = self._get_sign_buckets(positive = True)
+        counts_neg, lower_neg, upper_neg = self._get_sign_buckets(positive = False)
+
+        isovalues = {}
+        if counts_pos.sum():
+            isovalues["positive"] = [
+                _get_quantile(counts_pos, lower_pos, upper_pos, f, self.min_positive, self.max) for f in GridStats.ISOVALUE_FRACTIONS
+            ]
+        if counts_neg.sum():
+            isovalues["negative"] = [ # same fractions of the points, but counted from zero towards the minimum
+                -_get_quantile(counts_neg, lower_neg, upper_neg, f, -self.max_negative, -self.min) for f in GridStats.ISOVALUE_FRACTIONS
+            ]
+
+        hist_counts, hist_edges = [], []
+        if self.nonzero:
+            lo = self.min if (self.min < 0) else self.min_positive
+            hi = self.max if (self.max > 0) else self.max_negative
+            if lo == hi: lo, hi = lo - 0.5, hi + 0.5 # as np.histogram
+            edges = np.linspace(lo, hi, nbins + 1)
+            ### bucket counts spread uniformly over their range, negative buckets by their absolute values
+            cum = _get_cumulative(counts_pos, lower_pos, upper_pos, np.clip(edges, 0, None)) \
+                - _get_cumulative(counts_neg, lower_neg, upper_neg, np.clip(-edges, 0, None))
+            counts = np.round(np.diff(cum)).astype(np.int64)
+            counts[-1] += self.nonzero - counts.sum() # rounding
+            hist_counts, hist_edges = [int(c) for c in counts], [float(e) for e in edges]
+
+        return GridStats(
+            npoints = int(self.npoints),
+            nonzero = int(self.nonzero),
+            min = float(self.min),
+            max = float(self.max),
+            mean = float(self.mean),
+            hist_counts = hist_counts,
+            hist_edges = hist_edges,
+            isovalues = isovalues,
+        )
+
+
+    # --------------------------------------------------------------------------
+    def _get_sign_buckets(self, positive: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Counts of the nonzero buckets of one sign, and the (absolute) value range of each bucket."""
+        start = 0 if positive else self._NEG
+        counts = self._buckets[start : start + self._NEG].astype(np.float64)
+        counts[0] = 0 # zeros (and denormals, which are treated as zeros)
+        bits = np.arange(self._NEG, dtype = np.uint32) << self._SHIFT
+        with np.errstate(invalid = "ignore"): # nan patterns
+            bounds = np.append(bits.view(np.float32).astype(np.float64), np.inf)
+        bounds[~np.isfinite(bounds)] = np.finfo(np.float32).max # infs/nans stay in the last buckets
+        return counts, bounds[:-1], bounds[1:]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+# ------------------------------------------------------------------------------
+def _get_cumulative(counts: np.ndarray, lower: np.ndarray, upper: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Number of points with (absolute) value below each of `values`, interpolated within the buckets."""
+    cum = np.concatenate(([0.0], np.cumsum(counts)))
+    idx = np.clip(np.searchsorted(upper, values, side = "right"), 0, len(counts) - 1)
+    width = upper[idx] - lower[idx]
+    frac = np.clip((values - lower[idx]) / np.where(width > 0, width, 1), 0, 1)
+    return cum[idx] + frac * counts[idx]
+
+
+# ------------------------------------------------------------------------------
+def _get_quantile(counts: np.ndarray, lower: np.ndarray, upper: np.ndarray, fraction: float, vmin: float, vmax: float) -> float:
+    """(Absolute) value under which `fraction` of the points fall, clipped to the exact range `[vmin, vmax]`."""
+    cum = np.cumsum(counts)
+    target = fraction * cum[-1]
+    idx = min(int(np.searchsorted(cum, target, side = "left")), len(counts) - 1)
+    before = cum[idx] - counts[idx]
+    frac = (target - before) / counts[idx] if counts[idx] else 0.0
+    value = lower[idx] + frac * (upper[idx] - lower[idx])
+    return float(np.clip(value, vmin, vmax))
+
+
+# ------------------------------------------------------------------------------
@@ -1,8 +1,9 @@
 import numpy as np
-from scipy import interpolate
 
 import volgrids as vg
 
+ndimage = vg.lazy_import("scipy.ndimage")
+
 # //////////////////////////////////////////////////////////////////////////////
 class Math:
     @staticmethod
@@ -121,18 +122,74 @@ class Math:
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def interpolate_3d(x0, y0, z0, data_0, new_coords):
-        return interpolate.RegularGridInterpolator(
-            (x0, y0, z0), data_0, bounds_error = False, fill_value = 0
-        )(new_coords).T
+    def interpolate_3d(x0, y0, z0, data_0, new_coords, chunk_size: int = 16):
+        """
+        Trilinear interpolation of `data_0` (sampled at the evenly spaced x0, y0, z0)
+        on arbitrary points (e.g. the points of a rotated box). Points outside of the
+        data are set to 0. Prefer `resample_3d` for axis-aligned boxes, which doesn't
+        need the coordinates of every point.
+        input (new_coords): (..., 3)
+        output:             new_coords.shape[:-1] transposed
+        """
+        data_0 = np.asarray(data_0)
+        if data_0.dtype == bool: data_0 = data_0.astype(vg.FLOAT_DTYPE)
+        new_coords = np.asarray(new_coords)
+        origin = np.array((x0[0], y0[0], z0[0]), dtype = np.float64)
+        deltas = np.array([
+            (axis[-1] - axis[0]) / (len(axis) - 1) if len(axis) > 1 else 1.0 for axis in (x0, y0, z0)
+        ])
+
+        flat_coords = new_coords.reshape(-1, 3)
+        values = np.empty(len(flat_coords), dtype = np.float64)
+        step = chunk_size * int(np.prod(new_coords.shape[1:-1], dtype = np.int64)) or len(flat_coords)
+        for start in range(0, len(flat_coords), step):
+            indices = (flat_coords[start : start + step] - origin) / deltas
+            values[start : start + step] = ndimage.map_coordinates(
+                data_0, indices.T, order = 1, mode = "constant", cval = 0, prefilter = False
+            )
+        return values.reshape(new_coords.shape[:-1]).T
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def get_coords_array(resolution, deltas, minCoords = None):
+    def resample_3d(data_0, old_min, old_max, new_min, new_max, new_res, chunk_size: int = 16, order = 'C'):
+        """
+        Trilinear resampling of `data_0` (whose first and last points are at old_min and
+        old_max) into the axis-aligned box going from new_min to new_max with new_res
+        points. Points outside of the original box are set to 0.
+        The interpolation is separable: it's done one axis at a time on slabs of
+        `chunk_size` output X planes, so the coordinates of the new points are never
+        built and only the needed input planes are read (`data_0` can be a GridProxy).
+        input:  (xres, yres, zres)
+        output: new_res, of FLOAT_DTYPE
+        """
+        if not isinstance(data_0, (np.ndarray, vg.GridProxy)): data_0 = np.asarray(data_0)
+        axes = [
+            _get_axis_weights(np.linspace(a0, a1, n0), np.linspace(b0, b1, int(n1)))
+            for a0, a1, n0, b0, b1, n1 in zip(old_min, old_max, data_0.shape, new_min, new_max, new_res)
+        ]
+        (ix0, ix1, wx0, wx1), (iy0, iy1, wy0, wy1), (iz0, iz1, wz0, wz1) = axes
+
+        out = np.empty(tuple(int(n) for n in new_res), dtype = vg.FLOAT_DTYPE, order = order)
+        for start in range(0, out.shape[0], chunk_size):
+            stop = min(start + chunk_size, out.shape[0])
+            lo = int(min(ix0[start:stop].min(), ix1[start:stop].min()))
+            hi = int(max(ix0[start:stop].max(), ix1[start:stop].max())) + 1
+            slab = np.asarray(data_0[lo:hi], dtype = np.float64)
+
+            slab = _interpolate_axis(slab, ix0[start:stop] - lo, ix1[start:stop] - lo, wx0[start:stop], wx1[start:stop], 0)
+            slab = _interpolate_axis(slab, iy0, iy1, wy0, wy1, 1)
+            slab = _interpolate_axis(slab, iz0, iz1, wz0, wz1, 2)
+            out[start:stop] = slab
+        return out
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_coords_array(resolution, deltas, minCoords = None, x_slice: slice = None):
         """
         input:  resolution (3,)
                 deltas (3,)
                 minCoords (3,)
+                x_slice: only this slab of the x axis, e.g. to evaluate big grids by chunks
         output: coords (xres, yres, zres, 3)
         """
         xres, yres, zres = resolution
@@ -142,6 +199,9 @@ class Math:
         xrange = x0 + np.linspace(0, dx * (xres - 1), xres)
         yrange = y0 + np.linspace(0, dy * (yres - 1), yres)
         zrange = z0 + np.linspace(0, dz * (zres - 1), zres)
+        if x_slice is not None: # sliced after linspace, so the values are the same as in the whole array
+            xrange = xrange[x_slice]
+            xres = len(xrange)
         x,y,z = np.meshgrid(xrange, yrange, zrange, indexing = "ij")
 
         grid = np.empty((xres, yres, zres, 3), dtype = vg.FLOAT_DTYPE)
@@ -150,5 +210,102 @@ class Math:
         grid[:,:,:,2] = z
         return grid
 
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def quantize(arr, dtype) -> tuple[np.ndarray, float, float, float]:
+        """
+        Lossy compression of a float array into `dtype` (e.g. int8, int16 or float16).
+        For integer dtypes, the value range of `arr` (extended to include 0, so that
+        zeros stay exact) is mapped linearly onto the integer range.
+        output: (quantized, scale, zero_point, max_error), with arr ~ (quantized - zero_point) * scale
+        """
+        arr = np.asarray(arr)
+        dtype = np.dtype(dtype)
+        if np.issubdtype(dtype, np.floating):
+            quantized, scale, zero_point = arr.astype(dtype), 1.0, 0.0
+        elif np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            vmin = min(float(arr.min()), 0.0) if arr.size else 0.0
+            vmax = max(float(arr.max()), 0.0) if arr.size else 0.0
+            scale = ((vmax - vmin) / (int(info.max) - int(info.min))) or 1.0
+            zero_point = float(np.round(info.min - vmin / scale))
+            quantized = np.clip(np.round(arr / scale + zero_point), info.min, info.max).astype(dtype)
+        else:
+            raise TypeError(f"Unsupported dtype for quantization: {dtype}")
+
+        ### measured on the values as they'll be read back (FLOAT_DTYPE)
+        max_error = float(np.max(np.abs(
+            Math.dequantize(quantized, scale, zero_point).astype(np.float64) - arr
+        ))) if arr.size else 0.0
+        if not np.isfinite(max_error):
+            raise ValueError(f"Values out of range for quantization to {dtype}.")
+        return quantized, float(scale), zero_point, max_error
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def dequantize(quantized, scale = 1.0, zero_point = 0.0, dtype = None):
+        """Inverse of `quantize`. Always returns a new array of `dtype` (default: FLOAT_DTYPE)."""
+        if dtype is None: dtype = vg.FLOAT_DTYPE
+        arr = np.array(quantized, dtype = dtype)
+        if zero_point != 0.0: arr -= zero_point
+        if scale != 1.0: arr *= scale
+        return arr
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def downsample(arr, factor: int, operation = "mean"):
+        """
+        Reduce every block of factor*factor*factor points into one, using its "mean" or "max".
+        Border blocks may be partial, only the points inside the grid are used.
+        input:  (xres, yres, zres)
+        output: (ceil(xres/factor), ceil(yres/factor), ceil(zres/factor))
+        """
+        arr = np.asarray(arr)
+        shape_out = [-(-n // factor) for n in arr.shape]
+        padding = [(0, n_out * factor - n) for n, n_out in zip(arr.shape, shape_out)]
+        blocks_shape = [v for n_out in shape_out for v in (n_out, factor)]
+
+        if operation == "max":
+            fill = False if (arr.dtype == bool) else \
+                (np.iinfo(arr.dtype).min if np.issubdtype(arr.dtype, np.integer) else -np.inf)
+            padded = np.pad(arr, padding, constant_values = fill)
+            return padded.reshape(blocks_shape).max(axis = (1,3,5))
+
+        if operation == "mean":
+            padded = np.pad(arr, padding)
+            sums = padded.reshape(blocks_shape).sum(axis = (1,3,5), dtype = np.float64)
+            counts = [np.minimum(factor, n - np.arange(n_out) * factor) for n, n_out in zip(arr.shape, shape_out)]
+            counts = counts[0][:,None,None] * counts[1][None,:,None] * counts[2][None,None,:]
+            return (sums / counts).astype(vg.FLOAT_DTYPE)
+
+        raise ValueError(f"Unknown downsampling operation: {operation}. Use 'mean' or 'max'.")
+
 
 # //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _get_axis_weights(old_axis: np.ndarray, new_axis: np.ndarray) -> tuple[np.ndarray]:
+    """For every point of `new_axis`, the indices of its two neighbours in `old_axis`
+    and their linear interpolation weights. Both weights are 0 for points out of range."""
+    n = len(old_axis)
+    i0 = np.clip(np.searchsorted(old_axis, new_axis, side = "right") - 1, 0, max(n - 2, 0))
+    i1 = np.minimum(i0 + 1, n - 1)
+    span = old_axis[i1] - old_axis[i0]
+    w1 = np.divide(new_axis - old_axis[i0], span, out = np.zeros_like(new_axis), where = span != 0)
+    w0 = 1 - w1
+
+    outside = (new_axis < old_axis[0]) | (new_axis > old_axis[-1])
+    w0[outside] = 0
+    w1[outside] = 0
+    return i0, i1, w0, w1
+
+
+# ------------------------------------------------------------------------------
+def _interpolate_axis(arr: np.ndarray, i0, i1, w0, w1, axis: int) -> np.ndarray:
+    shape = [1, 1, 1]
+    shape[axis] = -1
+    return np.take(arr, i0, axis = axis) * w0.reshape(shape) + \
+           np.take(arr, i1, axis = axis) * w1.reshape(shape)
+
+
+# ------------------------------------------------------------------------------
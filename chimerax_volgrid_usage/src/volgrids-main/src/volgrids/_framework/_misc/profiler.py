@@ -0,0 +1,257 @@
+import os, sys, json, time, platform, threading
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from collections import defaultdict
+
+import volgrids as vg
+
+try:
+    import resource
+except ImportError: # e.g. Windows: no peak RSS samples
+    resource = None
+
+# //////////////////////////////////////////////////////////////////////////////
+class Profiler:
+    """Instrumentation of a run, enabled by the `--profile` flag of the apps (see `vg.PROFILER`).
+    It records:
+      - Hierarchical spans: wall time of the steps of the run (e.g. "config", "topology", "trimming",
+        each SMIF and its "stamping", "kernel build", each "write"), nested by thread. Each span is
+        identified by its path, e.g. "run/frame/smif.stacking/stamping", to compare runs of different versions.
+      - Counters: particles stamped, stamps clamped at the borders of the grid (or fully outside it),
+        kernel geometries built vs reused from the cache, bytes written...
+      - Peak RSS samples, taken at the end of every span.
+    The instrumented code uses the static methods (`span`, `count`, `stamp_counts`, `wrap_write`),
+    which do nothing when there's no profiler in the current RunContext. `save` exports the profile
+    as JSON and in Chrome's trace event format (for chrome://tracing or https://ui.perfetto.dev)."""
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.t0 = time.perf_counter_ns()
+        self.started = time.time()
+        self.spans: list[_Span] = []
+        self.counters: dict[str, int] = defaultdict(int)
+        self.rss_samples: list[tuple[int, int]] = [] # (ns since t0, peak RSS in bytes)
+        self._stamp_counts: list[_StampCounts] = []
+        self._thread_names: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local() # stack of open spans of each thread
+        self._sample_rss()
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def span(name: str, **args):
+        """Context manager timing a step of the current run (if profiled),
+        e.g. `with vg.Profiler.span("trimming"): ...`. `args` are stored with the span."""
+        profiler: Profiler = vg.PROFILER
+        if profiler is None: return nullcontext()
+        return profiler._span(name, args)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def count(name: str, value: int = 1) -> None:
+        """Add `value` to a counter of the current run (if profiled)."""
+        profiler: Profiler = vg.PROFILER
+        if profiler is None: return
+        with profiler._lock:
+            profiler.counters[name] += value
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def stamp_counts() -> "_StampCounts | None":
+        """Stamp counters for a new kernel (None if the run is not profiled). They're plain
+        attributes incremented by `Kernel.stamp`, so that profiling barely slows the stamping."""
+        profiler: Profiler = vg.PROFILER
+        if profiler is None: return None
+        counts = _StampCounts(profiler._get_path())
+        with profiler._lock:
+            profiler._stamp_counts.append(counts)
+        return counts
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def wrap_write(func: callable) -> callable:
+        """Writer `func(path_out, grid, *args)` recording a "write" span and the bytes written
+        (if the run is profiled). The span belongs to the thread doing the write (e.g. the GridWriter)."""
+        profiler: Profiler = vg.PROFILER
+        if profiler is None: return func
+
+        def _write(path_out, *args):
+            size0 = _get_file_size(path_out)
+            with profiler._span("write", {"path": str(path_out), "writer": func.__name__}):
+                result = func(path_out, *args)
+            nbytes = max(0, _get_file_size(path_out) - size0)
+            with profiler._lock:
+                profiler.counters["bytes_written"] += nbytes
+                profiler.counters["files_written"] += 1
+            return result
+        return _write
+
+
+    # --------------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        """Profile as a JSON-serializable dict: the spans, their summary by path, the counters and RSS samples."""
+        with self._lock:
+            spans = sorted(self.spans, key = lambda s: s.start)
+            counters = dict(self.counters)
+            stamps_by_path = defaultdict(lambda: defaultdict(int))
+            for counts in self._stamp_counts:
+                for key, value in counts.as_dict().items():
+                    counters[key] = counters.get(key, 0) + value
+                    stamps_by_path[counts.path][key] += value
+            rss_samples = list(self.rss_samples)
+
+        summary = {}
+        for s in spans:
+            entry = summary.setdefault(s.path, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            entry["count"] += 1
+            entry["total_s"] += s.duration / 1e9
+            entry["max_s"] = max(entry["max_s"], s.duration / 1e9)
+
+        return {
+            "app": self.name,
+            "started": self.started,
+            "wall_s": (time.perf_counter_ns() - self.t0) / 1e9,
+            "peak_rss_bytes": max((rss for _,rss in rss_samples), default = None),
+            "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": vg.get_num_cpus()},
+            "summary": summary,
+            "counters": counters,
+            "stamps_by_path": {path: dict(counts) for path, counts in stamps_by_path.items()},
+            "spans": [s.as_dict(self.t0) for s in spans],
+            "rss_samples": [[(t - self.t0) / 1e9, rss] for t,rss in rss_samples],
+        }
+
+
+    # --------------------------------------------------------------------------
+    def to_chrome_trace(self) -> dict:
+        """Profile in the Chrome trace event format: a complete ("X") event per span,
+        a counter ("C") event per RSS sample and the names of the threads."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            rss_samples = list(self.rss_samples)
+            thread_names = dict(self._thread_names)
+
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name or "volgrids"}},
+            *({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+              for tid, name in thread_names.items()),
+        ]
+        for s in spans:
+            events.append({
+                "name": s.name, "cat": s.path.split('/', 1)[0], "ph": "X", "pid": pid, "tid": s.thread,
+                "ts": (s.start - self.t0) / 1e3, "dur": s.duration / 1e3, "args": {"path": s.path, **s.args},
+            })
+        for t, rss in rss_samples:
+            events.append({
+                "name": "peak RSS", "ph": "C", "pid": pid, "ts": (t - self.t0) / 1e3, "args": {"MB": rss / 1e6},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+    # --------------------------------------------------------------------------
+    def save(self, path_json: Path) -> tuple[Path, Path]:
+        """Write the JSON profile to `path_json` and the Chrome trace next to it (suffix ".trace.json")."""
+        self._sample_rss()
+        path_json = Path(path_json)
+        path_trace = path_json.with_name(f"{path_json.name.removesuffix('.json')}.trace.json")
+        with open(path_json, 'w') as file:
+            json.dump(self.to_dict(), file, indent = 2)
+        with open(path_trace, 'w') as file:
+            json.dump(self.to_chrome_trace(), file)
+        return path_json, path_trace
+
+
+    # --------------------------------------------------------------------------
+    @contextmanager
+    def _span(self, name: str, args: dict):
+        stack = self._get_stack()
+        path = '/'.join((*stack, name))
+        stack.append(name)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            stack.pop()
+            thread = threading.current_thread()
+            with self._lock:
+                self.spans.append(_Span(path, name, start, end - start, thread.ident, args))
+                self._thread_names.setdefault(thread.ident, thread.name)
+            self._sample_rss(end)
+
+
+    # --------------------------------------------------------------------------
+    def _get_stack(self) -> list[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None: stack = self._local.stack = []
+        return stack
+
+
+    # --------------------------------------------------------------------------
+    def _get_path(self) -> str:
+        return '/'.join(self._get_stack())
+
+
+    # --------------------------------------------------------------------------
+    def _sample_rss(self, t: int = None) -> None:
+        rss = _get_peak_rss()
+        if rss is None: return
+        with self._lock:
+            self.rss_samples.append((time.perf_counter_ns() if t is None else t, rss))
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _Span:
+    __slots__ = ("path", "name", "start", "duration", "thread", "args")
+
+    def __init__(self, path: str, name: str, start: int, duration: int, thread: int, args: dict):
+        self.path = path
+        self.name = name
+        self.start = start       # ns (perf_counter)
+        self.duration = duration # ns
+        self.thread = thread
+        self.args = args
+
+    def as_dict(self, t0: int) -> dict:
+        return {
+            "path": self.path, "start_s": (self.start - t0) / 1e9, "duration_s": self.duration / 1e9,
+            "thread": self.thread, **({"args": self.args} if self.args else {}),
+        }
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _StampCounts:
+    """Stamps of one kernel, and the path of the span where the kernel was created."""
+    __slots__ = ("path", "stamped", "clamped", "outside")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stamped = 0 # particles stamped (even partially) on the grid
+        self.clamped = 0 # ... of which the kernel was cut by the borders of the grid
+        self.outside = 0 # particles skipped, as the kernel would be completely outside the grid
+
+    def as_dict(self) -> dict[str, int]:
+        return {"particles_stamped": self.stamped, "stamps_clamped": self.clamped, "stamps_outside": self.outside}
+
+
+# ------------------------------------------------------------------------------
+def _get_peak_rss() -> int | None:
+    """Peak resident set size of this process in bytes (None if unknown)."""
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if (sys.platform == "darwin") else peak * 1024 # bytes in macOS, KiB elsewhere
+
+
+# ------------------------------------------------------------------------------
+def _get_file_size(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError: # not written yet, or not a single file (e.g. the prefix of the mesh files)
+        return 0
+
+
+# ------------------------------------------------------------------------------
@@ -1,4 +1,6 @@
+import os, sys, types, itertools, threading, importlib, importlib.util
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # ------------------------------------------------------------------------------
 def resolve_path(path: Path):
@@ -7,4 +9,116 @@ def resolve_path(path: Path):
     return project_root / path
 
 
+# ------------------------------------------------------------------------------
+def get_configs(*modules) -> dict[str, dict[str, any]]:
+    """Snapshot of the config globals of the given modules (e.g. `vg`, `sm`), by module name."""
+    return {
+        module.__name__: {k: getattr(module, k) for k in module.__config_keys__ if hasattr(module, k)}
+        for module in modules
+    }
+
+
+# ------------------------------------------------------------------------------
+def set_configs(configs: dict[str, dict[str, any]]) -> None:
+    """Restore a snapshot taken with `get_configs` (e.g. in a worker process), in the current RunContext."""
+    for name, values in configs.items():
+        module = importlib.import_module(name)
+        for k,v in values.items(): setattr(module, k, v)
+
+
+# ------------------------------------------------------------------------------
+def lazy_import(name: str):
+    """Module object for `name` whose actual import is deferred until one of its
+    attributes is first accessed. Used for the heavy dependencies (MDAnalysis, scipy,
+    pandas, h5py...) so that e.g. `--help` or the vgtools operations that don't need
+    them don't pay for their import time. Unlike `importlib.util.LazyLoader` (before
+    Python 3.12), the actual import is thread-safe, e.g. for apps run in threads."""
+    if name in sys.modules: return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None: raise ModuleNotFoundError(f"No module named '{name}'", name = name)
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+    return module
+
+
+# ------------------------------------------------------------------------------
+def get_num_cpus() -> int:
+    """CPUs available to this process (which can be less than the machine's)."""
+    if hasattr(os, "sched_getaffinity"): return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# ------------------------------------------------------------------------------
+def run_parallel(func: callable, jobs: list[tuple], num_workers: int = 0, config_modules: tuple = ()):
+    """Run `func(*args)` for every `args` of `jobs` in a pool of `num_workers` processes
+    (0: one per CPU; 1: sequentially in this process). Returns an iterator yielding
+    `(idx, result, error)` as each job finishes, where `idx` is its position in `jobs`.
+    A failing job doesn't stop the others: its exception is yielded as `error` (and `result`
+    is None). The config globals of `config_modules` are copied to the workers.
+    At most `2 * num_workers` jobs are submitted at a time: the next one is submitted as each
+    one finishes, so that the workers can't get far ahead of a slow consumer (e.g. a single
+    writer) and only a few results are held in memory, each one until it's yielded.
+    The worker processes are started by this call, before the iteration begins (e.g. before
+    the caller opens the output files)."""
+    if num_workers <= 0: num_workers = get_num_cpus()
+    num_workers = min(num_workers, len(jobs))
+
+    if num_workers <= 1:
+        return _iter_sequential(func, jobs)
+
+    pool = ProcessPoolExecutor(num_workers, initializer = set_configs, initargs = (get_configs(*config_modules),))
+    queued = enumerate(jobs)
+    pending = {pool.submit(func, *args): idx for idx, args in itertools.islice(queued, 2 * num_workers)}
+    return _iter_futures(pool, func, queued, pending)
+
+
+# ------------------------------------------------------------------------------
+class _LazyModule(types.ModuleType):
+    """Module of `lazy_import`, executed at its first attribute access. Other threads wait
+    for the import to finish, instead of seeing the module while it's still being executed."""
+    def __getattribute__(self, attr):
+        with _LAZY_IMPORT_LOCK:
+            if (type(self) is _LazyModule) and (id(self) not in _LAZY_IMPORTING):
+                _LAZY_IMPORTING.add(id(self)) # attributes accessed by the import itself are looked up normally
+                try:
+                    types.ModuleType.__getattribute__(self, "__spec__").loader.exec_module(self)
+                    self.__class__ = types.ModuleType
+                finally:
+                    _LAZY_IMPORTING.discard(id(self))
+        return types.ModuleType.__getattribute__(self, attr)
+
+_LAZY_IMPORT_LOCK = threading.RLock() # reentrant: importing a module can trigger other lazy imports
+_LAZY_IMPORTING: set[int] = set()
+
+
+# ------------------------------------------------------------------------------
+def _iter_sequential(func: callable, jobs: list[tuple]):
+    for idx, args in enumerate(jobs):
+        try:
+            yield idx, func(*args), None
+        except Exception as e:
+            yield idx, None, e
+
+
+# ------------------------------------------------------------------------------
+def _iter_futures(pool: ProcessPoolExecutor, func: callable, queued, pending: dict):
+    """`pending` maps the submitted futures to their index, `queued` yields the `(idx, args)` not submitted yet."""
+    with pool:
+        try:
+            while pending:
+                done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    idx = pending.pop(future)
+                    error = future.exception()
+                    result = None if error else future.result()
+                    ### keep the workers busy while the caller handles this result
+                    for next_idx, args in itertools.islice(queued, 1):
+                        pending[pool.submit(func, *args)] = next_idx
+                    yield idx, result, error
+                del done, future, result
+        finally:
+            for future in pending: future.cancel()
+
+
 # ------------------------------------------------------------------------------
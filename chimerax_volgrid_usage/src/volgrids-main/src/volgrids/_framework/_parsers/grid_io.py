@@ -1,11 +1,17 @@
-import os, h5py
+import os, json, zlib, itertools
 import numpy as np
-import gridData as gd
 from pathlib import Path
 from enum import Enum, auto
+from functools import partial
+from contextlib import contextmanager, nullcontext
+from typing import Iterable
+from dataclasses import dataclass, asdict
 
 import volgrids as vg
 
+h5py = vg.lazy_import("h5py")
+gd = vg.lazy_import("gridData")
+
 # //////////////////////////////////////////////////////////////////////////////
 class GridFormat(Enum):
     DX = auto()
@@ -13,13 +19,18 @@ class GridFormat(Enum):
     CCP4 = auto()
     CMAP = auto()
     CMAP_PACKED = auto()
+    SPARSE = auto()
+    NPY = auto()
 
 
 # //////////////////////////////////////////////////////////////////////////////
 class GridIO:
+    EXTENSIONS = (".dx", ".mrc", ".ccp4", ".cmap", ".vgs", ".npy") # recognized by `read_auto`
+
     # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++ MAIN I/O OPERATIONS
     @staticmethod
-    def read_dx(path_dx) -> "vg.Grid":
+    def read_dx(path_dx, lazy: bool = False) -> "vg.Grid":
+        ### DX is a text format, it's always read completely ('lazy' is ignored)
         parser_dx = gd.Grid(path_dx)
         ms = vg.MolSystem.from_box_data(
             resolution = parser_dx.grid.shape,
@@ -34,21 +45,21 @@ class GridIO:
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def read_mrc(path_mrc) -> "vg.Grid":
-        with gd.mrc.mrcfile.open(path_mrc) as parser:
+    def read_mrc(path_mrc, lazy: bool = False) -> "vg.Grid":
+        with gd.mrc.mrcfile.open(path_mrc, header_only = True) as parser:
             ##### assume that MRC always follows the origin follows the "real space" MRC convention
             orig = parser.header["origin"]
             used_origin = np.array([orig['x'], orig['y'], orig['z']])
 
-        obj = _read_mrc_ccp4(path_mrc, used_origin)
+        obj = _read_mrc_ccp4(path_mrc, used_origin, lazy)
         obj.fmt = vg.GridFormat.MRC
         return obj
 
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def read_ccp4(path_ccp4) -> "vg.Grid":
-        with gd.mrc.mrcfile.open(path_ccp4) as parser:
+    def read_ccp4(path_ccp4, lazy: bool = False) -> "vg.Grid":
+        with gd.mrc.mrcfile.open(path_ccp4, header_only = True) as parser:
             orig = parser.header["origin"]
             if (orig['x'] == 0.0 and orig['y'] == 0.0 and orig['z'] == 0.0):
                 ##### assume the origin follows the "integer offset" CCP4 convention, so use that one
@@ -62,26 +73,47 @@ class GridIO:
                 ##### assume the origin follows the "real space" MRC convention, so use that one
                 used_origin = np.array([orig['x'], orig['y'], orig['z']])
 
-        obj = _read_mrc_ccp4(path_ccp4, used_origin)
+        obj = _read_mrc_ccp4(path_ccp4, used_origin, lazy)
         obj.fmt = vg.GridFormat.CCP4
         return obj
 
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def read_cmap(path_cmap, key) -> "vg.Grid":
+    def read_cmap(path_cmap, key, lazy: bool = False, level: int = 1) -> "vg.Grid":
+        """Read the grid stored under `key`. If `lazy`, the data is not loaded:
+        the returned Grid holds a GridProxy over the HDF5 dataset instead.
+        `level` is the subsampling factor of the pyramid level to read (1: full resolution,
+        see `write_cmap` and `get_cmap_levels`)."""
         with h5py.File(path_cmap, 'r') as parser:
             frame = parser["Chimera"][key]
-            rz, ry, rx = frame["data_zyx"].shape
+            name = _get_cmap_dataset_name(level)
+            if name not in frame:
+                raise ValueError(
+                    f"No subsampling level {level} for key '{key}' in {path_cmap}. " +\
+                    f"Available levels: {_get_cmap_levels(frame)}."
+                )
+            rz, ry, rx = frame[name].shape
             ox, oy, oz = frame.attrs["origin"]
-            dz, dy, dx = frame.attrs["step"]
+            dz, dy, dx = frame.attrs["step"] * level
             ms = vg.MolSystem.from_box_data(
                 resolution = np.array([rx, ry, rz]),
                 origin = np.array([ox, oy, oz]),
                 deltas = np.array([dx, dy, dz])
             )
             obj = vg.Grid(ms, init_grid = False)
-            obj.grid = frame["data_zyx"][()].transpose(2,1,0)
+            dataset = frame[name]
+            scale, zero_point, obj.quant_error = _get_quantization_attrs(dataset)
+            dtype = dataset.dtype if _is_plain_float(dataset) else vg.FLOAT_DTYPE
+            if lazy:
+                obj.grid = vg.GridProxy(
+                    partial(_open_cmap_dataset, path_cmap, key, name),
+                    shape_disk = (rz, ry, rx), dtype = dtype, scale = scale, zero_point = zero_point
+                )
+            elif _is_plain_float(dataset):
+                obj.grid = dataset[()].transpose(2,1,0)
+            else:
+                obj.grid = vg.Math.dequantize(dataset[()], scale, zero_point, dtype).transpose(2,1,0)
 
             n_keys = len(parser["Chimera"].keys())
             obj.fmt = vg.GridFormat.CMAP_PACKED \
@@ -94,21 +126,22 @@ class GridIO:
     def write_dx(path_dx, data: "vg.Grid"):
         ints = (int, np.int8, np.int16, np.int32, np.int64)
         floats = (float, np.float16, np.float32, np.float64)
+        grid = np.asarray(data.grid) # densify sparse/lazy grids
 
-        if data.grid.dtype in floats:
-            grid_data = data.grid
+        if grid.dtype in floats:
+            grid_data = grid.astype(vg.FLOAT_DTYPE, copy = False) # e.g. float16 grids of a memory plan
             dtype = '"float"'
             fmt = "%.3f"
-        elif data.grid.dtype in ints:
-            grid_data = data.grid
+        elif grid.dtype in ints:
+            grid_data = grid
             dtype = '"int"'
             fmt = "%i"
-        elif data.grid.dtype == bool:
-            grid_data = data.grid.astype(int)
+        elif grid.dtype == bool:
+            grid_data = grid.astype(int)
             dtype = '"int"'
             fmt = "%i"
         else:
-            raise TypeError(f"Unsupported data type for DX output: {data.grid.dtype}")
+            raise TypeError(f"Unsupported data type for DX output: {grid.dtype}")
 
         header = '\n'.join((
             "# OpenDX density file written by volgrids",
@@ -133,44 +166,50 @@ class GridIO:
             'component "data" value 3',
         ))
 
-        ########### reshape the grid array
-        grid_size = np.prod(grid_data.shape)
-        dx_rows = grid_size // 3
-
-        truncated_arr, extra_arr = np.split(grid_data.flatten(), [3*dx_rows])
-        data_out = truncated_arr.reshape(dx_rows, 3)
-        last_row = extra_arr.reshape(1, len(extra_arr))
-
-        ########### export reshaped data
+        ########### export the data in rows of 3 values, slab by slab (the statistics are gathered from the same slabs)
+        values = grid_data.reshape(-1)
+        originals = grid.reshape(-1)
+        n_rows_values = 3 * (len(values) // 3)
+        n_slab = 3 * (vg.GridStatsAccumulator.SLAB_POINTS // 3)
+        stats = _new_stats()
         with open(path_dx, "wb") as file:
+            for i in range(0, max(n_rows_values, 1), n_slab):
+                j = min(i + n_slab, n_rows_values)
+                np.savetxt(
+                    file, values[i:j].reshape(-1, 3), fmt = fmt, delimiter = '\t',
+                    header = header if (i == 0) else '', comments = ''
+                )
+                if stats is not None: stats.update(originals[i:j])
             np.savetxt(
-                file, data_out, fmt = fmt, delimiter = '\t',
-                header = header, comments = ''
-            )
-            np.savetxt(
-                file, last_row, fmt = fmt, delimiter = '\t',
+                file, values[n_rows_values:].reshape(1, -1), fmt = fmt, delimiter = '\t',
                 footer = footer, comments = ''
             )
+            if stats is not None: stats.update(originals[n_rows_values:])
+
+        _write_stats_sidecar(path_dx, stats)
 
 
     # --------------------------------------------------------------------------
     @staticmethod
     def write_mrc(path_mrc, data: "vg.Grid"):
+        arr = _get_mrc_array(data)
         with gd.mrc.mrcfile.new(path_mrc, overwrite = True) as parser:
-            parser.set_data(data.grid.astype(vg.FLOAT_DTYPE).transpose(2,1,0))
+            parser.set_data(arr.transpose(2,1,0))
             parser.voxel_size = [data.dx, data.dy, data.dz]
             parser.header["origin"]['x'] = data.xmin # MRC convention
             parser.header["origin"]['y'] = data.ymin
             parser.header["origin"]['z'] = data.zmin
             parser.update_header_from_data()
-            parser.update_header_stats()
+            stats = _update_mrc_header_stats(parser, arr)
+        _write_stats_sidecar(path_mrc, stats)
 
 
     # --------------------------------------------------------------------------
     @staticmethod
     def write_ccp4(path_ccp4, data: "vg.Grid"):
+        arr = _get_mrc_array(data)
         with gd.mrc.mrcfile.new(path_ccp4, overwrite = True) as parser:
-            parser.set_data(data.grid.astype(vg.FLOAT_DTYPE).transpose(2,1,0))
+            parser.set_data(arr.transpose(2,1,0))
             parser.voxel_size = [data.dx, data.dy, data.dz]
             parser.header["origin"]['x'] = data.xmin # MRC convention
             parser.header["origin"]['y'] = data.ymin
@@ -179,73 +218,307 @@ class GridIO:
             parser.header["nystart"] = int(data.ymin / data.dy)
             parser.header["nzstart"] = int(data.zmin / data.dz)
             parser.update_header_from_data()
-            parser.update_header_stats()
+            stats = _update_mrc_header_stats(parser, arr)
+        _write_stats_sidecar(path_ccp4, stats)
 
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def write_cmap(path_cmap, data: "vg.Grid", key):
-        ### imitate the Chimera cmap format, as "specified" in this sample:
-        ### https://github.com/RBVI/ChimeraX/blob/develop/testdata/cell15_timeseries.cmap
-        def _add_generic_attrs(group, c = "GROUP"):
-            group.attrs["CLASS"] = np.bytes_(c)
-            group.attrs["TITLE"] = np.bytes_("")
-            group.attrs["VERSION"] = np.bytes_("1.0")
-
-        if not os.path.exists(path_cmap):
-            with h5py.File(path_cmap, 'w') as h5:
-                h5.attrs["PYTABLES_FORMAT_VERSION"] = np.bytes_("2.0")
-                _add_generic_attrs(h5)
-
-                chim = h5.create_group("Chimera")
-                _add_generic_attrs(chim)
+    def write_cmap(path_cmap, data: "vg.Grid", key, pyramid_levels: int = None, pyramid_mode: str = None):
+        """Write the grid under `key`. Additionally, `pyramid_levels` subsampled copies
+        (2x, 4x, 8x...) are stored next to it, reduced with the block "mean" or "max"
+        (`pyramid_mode`). Both default to the CMAP_PYRAMID_LEVELS/CMAP_PYRAMID_MODE config."""
+        if pyramid_levels is None: pyramid_levels = vg.CMAP_PYRAMID_LEVELS
+        if pyramid_mode is None: pyramid_mode = vg.CMAP_PYRAMID_MODE
+
+        _init_cmap_file(path_cmap)
+        with h5py.File(path_cmap, 'a') as parser:
+            frame = _get_cmap_frame(parser, key, *_get_cmap_origin_step(data))
+
+            grid = np.asarray(data.grid)
+            stats = _new_stats()
+            for i in range(pyramid_levels + 1):
+                factor = 2**i
+                level, arr, attrs = _get_cmap_level(grid, factor, pyramid_mode)
+                framedata = frame.create_dataset(
+                    _get_cmap_dataset_name(factor), shape = arr.shape, dtype = arr.dtype,
+                    compression = "gzip", compression_opts = vg.GZIP_COMPRESSION
+                )
+                ### written by slabs of whole chunks, gathering the statistics of the full-resolution level on the way
+                n_slab = framedata.chunks[0] * max(1, vg.GridStatsAccumulator.slab_length(arr) // framedata.chunks[0])
+                for j in range(0, len(arr), n_slab):
+                    framedata[j : j + n_slab] = arr[j : j + n_slab]
+                    if (stats is not None) and (factor == 1): stats.update(level[j : j + n_slab])
+                _add_generic_attrs(framedata, "CARRAY")
+                framedata.attrs.update(attrs)
+
+            if stats is not None: frame["data_zyx"].attrs["volgrids_stats"] = stats.finish(vg.STATS_HISTOGRAM_BINS).to_json()
+
 
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def encode_cmap(data: "vg.Grid", pyramid_levels: int = None, pyramid_mode: str = None) -> "_CmapFrameData":
+        """Everything that `write_cmap` stores for the grid (pyramid levels, quantization,
+        statistics), with the data already split in gzip-compressed HDF5 chunks (of the shape
+        h5py would choose). Used by `vgtools pack`, where this expensive part is computed in
+        worker processes (the result is picklable) while `write_cmap_encoded` copies the bytes into the file."""
+        if pyramid_levels is None: pyramid_levels = vg.CMAP_PYRAMID_LEVELS
+        if pyramid_mode is None: pyramid_mode = vg.CMAP_PYRAMID_MODE
+
+        grid = np.asarray(data.grid)
+        stats = _new_stats()
+        datasets = []
+        for i in range(pyramid_levels + 1):
+            factor = 2**i
+            level, arr, attrs = _get_cmap_level(grid, factor, pyramid_mode)
+            datasets.append(_encode_cmap_dataset(
+                _get_cmap_dataset_name(factor), arr, attrs,
+                stats = stats if (factor == 1) else None, stats_source = level,
+            ))
+
+        if stats is not None: datasets[0].attrs["volgrids_stats"] = stats.finish(vg.STATS_HISTOGRAM_BINS).to_json()
+
+        origin, step = _get_cmap_origin_step(data)
+        return _CmapFrameData(origin = origin, step = step, datasets = datasets)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_cmap_encoded(path_cmap, frames: Iterable[tuple[str, "_CmapFrameData"]]):
+        """Write `(key, frame)` pairs, where the frames come from `encode_cmap`, keeping the file
+        open in between. `frames` can be a generator (e.g. of results from worker processes).
+        The chunks are stored as they were compressed, see `vgtools pack`."""
+        _init_cmap_file(path_cmap)
         with h5py.File(path_cmap, 'a') as parser:
-            chim = parser["Chimera"]
-            if key in chim.keys():
-                frame = chim[key]
-                if "data_zyx" in frame.keys():
-                    del frame["data_zyx"]
-            else:
-                frame = parser.create_group(f"/Chimera/{key}")
-                frame.attrs["chimera_map_version"] = np.int64(1)
-                frame.attrs["chimera_version"] = np.bytes_(b'1.12_b40875')
-                frame.attrs["name"] = np.bytes_(key)
-                frame.attrs["origin"] = np.array([data.xmin, data.ymin, data.zmin], dtype = vg.FLOAT_DTYPE)
-                frame.attrs["step"] = np.array([data.dz, data.dy, data.dx], dtype = vg.FLOAT_DTYPE)
-                _add_generic_attrs(frame)
-
-            framedata = frame.create_dataset(
-                "data_zyx", data = data.grid.transpose(2,1,0), dtype = vg.FLOAT_DTYPE,
+            for key, encoded in frames:
+                _write_cmap_frame(parser, key, encoded)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_sparse(path_sparse, data: "vg.Grid", brick_size: int = None):
+        """Store only the non-empty bricks of the grid (see SparseBricks) in an HDF5 file.
+        Dense grids are split in bricks of `brick_size` (default: SPARSE_BRICK_SIZE)."""
+        if isinstance(data.grid, vg.SparseBricks) and brick_size in (None, data.grid.brick_size):
+            sparse = data.grid
+        else:
+            if brick_size is None: brick_size = vg.SPARSE_BRICK_SIZE
+            sparse = vg.SparseBricks.from_dense(np.asarray(data.grid), brick_size)
+
+        b = sparse.brick_size
+        if sparse.dtype == bool: # lossless bit-packing, 8 points per byte
+            bricks, quant_attrs = np.packbits(sparse.bricks.reshape(sparse.nbricks, -1), axis = 1), {}
+        else:
+            bricks, quant_attrs = _encode_hdf5_array(sparse.bricks)
+
+        ### several bricks per HDF5 chunk (~64 KiB), so gzip has enough data to work with
+        nbricks_chunk = min(max(1, (1 << 16) // max(1, bricks[:1].nbytes)), sparse.nbricks)
+        chunks = (nbricks_chunk, *bricks.shape[1:])
+
+        with h5py.File(path_sparse, 'w') as h5:
+            h5.attrs["format"] = np.bytes_(_SPARSE_FORMAT_NAME)
+            h5.attrs["version"] = np.int64(_SPARSE_FORMAT_VERSION)
+            h5.attrs["shape"] = np.array(sparse.shape, dtype = np.int64)
+            h5.attrs["brick_size"] = np.int64(b)
+            h5.attrs["origin"] = np.array([data.xmin, data.ymin, data.zmin], dtype = np.float64)
+            h5.attrs["step"] = np.array([data.dx, data.dy, data.dz], dtype = np.float64)
+            h5.attrs["dtype"] = np.bytes_(sparse.dtype.str)
+            h5.create_dataset("index", data = sparse.index)
+            dataset = h5.create_dataset(
+                "bricks", shape = bricks.shape, dtype = bricks.dtype,
+                chunks = chunks if sparse.nbricks > 0 else None,
                 compression = "gzip", compression_opts = vg.GZIP_COMPRESSION
             )
-            _add_generic_attrs(framedata, "CARRAY")
+            dataset.attrs.update(quant_attrs)
+
+            ### written by slabs of bricks, gathering the statistics on the way
+            stats = _new_stats()
+            n_slab = max(1, vg.GridStatsAccumulator.SLAB_POINTS // b**3)
+            for i in range(0, sparse.nbricks, n_slab):
+                dataset[i : i + n_slab] = bricks[i : i + n_slab]
+                if stats is not None: stats.update(sparse.bricks[i : i + n_slab])
+
+            if stats is not None:
+                stats.add_zeros(sparse.size - stats.npoints) # the points of the empty bricks
+                h5.attrs["volgrids_stats"] = stats.finish(vg.STATS_HISTOGRAM_BINS).to_json()
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def read_sparse(path_sparse, lazy: bool = False) -> "vg.Grid":
+        """Read a file written by `write_sparse`. If `lazy`, the grid is kept in its
+        block-sparse form (a SparseBricks) instead of being densified."""
+        with h5py.File(path_sparse, 'r') as h5:
+            if h5.attrs.get("format", b"") != np.bytes_(_SPARSE_FORMAT_NAME):
+                raise ValueError(f"Not a volgrids sparse grid file: {path_sparse}")
+            shape = h5.attrs["shape"]
+            b = int(h5.attrs["brick_size"])
+            dataset = h5["bricks"]
+            scale, zero_point, quant_error = _get_quantization_attrs(dataset)
+            dtype = np.dtype(_decode_attr(h5.attrs.get("dtype", dataset.dtype.str)))
+            if (dtype == bool) and (dataset.dtype != bool):
+                n = b**3
+                bricks = np.unpackbits(dataset[()], axis = 1, count = n).astype(bool).reshape(-1, b, b, b)
+            elif _is_plain_float(dataset):
+                bricks = dataset[()]
+            else:
+                bricks = vg.Math.dequantize(dataset[()], scale, zero_point)
+            sparse = vg.SparseBricks(shape, bricks.dtype, b, index = h5["index"][()], bricks = bricks)
+            ms = vg.MolSystem.from_box_data(
+                resolution = np.array(shape),
+                origin = h5.attrs["origin"],
+                deltas = h5.attrs["step"]
+            )
+
+        obj = vg.Grid(ms, init_grid = False, dtype = sparse.dtype)
+        obj.grid = sparse if lazy else sparse.to_dense()
+        obj.quant_error = quant_error
+        obj.fmt = vg.GridFormat.SPARSE
+        return obj
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_npy(path_npy, data: "vg.Grid"):
+        """Raw .npy array in the in-memory (XYZ) axis order, plus a JSON sidecar (`path_npy` + ".json")
+        with the box information. Floating grids are stored as FLOAT_DTYPE, other grids keep their dtype."""
+        grid = np.asarray(data.grid)
+        if np.issubdtype(grid.dtype, np.floating): grid = grid.astype(vg.FLOAT_DTYPE, copy = False) # e.g. float16 grids of a memory plan
+        stats = _new_stats()
+        header_npy = np.lib.format.header_data_from_array_1_0(grid)
+        ### written slab by slab along the slowest axis of the stored order (the same bytes as `np.save`), gathering the statistics on the way
+        with open(path_npy, "wb") as file:
+            np.lib.format.write_array_header_1_0(file, header_npy)
+            if header_npy["fortran_order"]:
+                n_slab = vg.GridStatsAccumulator.slab_length(grid.T)
+                slabs = (grid[..., i : i + n_slab] for i in range(0, grid.shape[-1], n_slab))
+            else:
+                n_slab = vg.GridStatsAccumulator.slab_length(grid)
+                slabs = (grid[i : i + n_slab] for i in range(0, len(grid), n_slab))
+            for slab in slabs:
+                file.write(slab.tobytes(order = 'F' if header_npy["fortran_order"] else 'C'))
+                if stats is not None: stats.update(slab)
+
+        header = {
+            "format": _NPY_FORMAT_NAME,
+            "version": _NPY_FORMAT_VERSION,
+            "axis_order": "xyz",
+            "origin": [float(data.xmin), float(data.ymin), float(data.zmin)],
+            "deltas": [float(data.dx), float(data.dy), float(data.dz)],
+        }
+        if stats is not None: header["stats"] = asdict(stats.finish(vg.STATS_HISTOGRAM_BINS))
+        with open(_get_npy_header_path(path_npy), 'w') as file:
+            json.dump(header, file, indent = 4)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def read_npy(path_npy, lazy: bool = False) -> "vg.Grid":
+        """Read a file written by `write_npy`. If `lazy`, the grid is a read-only
+        `np.memmap` (zero-copy, pages are loaded on access and shared between processes)."""
+        with open(_get_npy_header_path(path_npy), 'r') as file:
+            header = json.load(file)
+        if header.get("format") != _NPY_FORMAT_NAME:
+            raise ValueError(f"Not a volgrids NPY header: {_get_npy_header_path(path_npy)}")
+
+        ### the array is always in XYZ order: a Fortran-ordered (ZYX on disk) one is described by the .npy header itself
+        if header.get("axis_order", "xyz") != "xyz":
+            raise ValueError(f"Unsupported axis order in NPY header: {header['axis_order']}.")
+        arr = np.load(path_npy, mmap_mode = 'r' if lazy else None)
+
+        ms = vg.MolSystem.from_box_data(
+            resolution = np.array(arr.shape),
+            origin = np.array(header["origin"]),
+            deltas = np.array(header["deltas"])
+        )
+        obj = vg.Grid(ms, init_grid = False, dtype = arr.dtype)
+        obj.grid = arr
+        obj.fmt = vg.GridFormat.NPY
+        return obj
 
 
     # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++ OTHER I/O UTILITIES
     @staticmethod
-    def read_auto(path_grid: Path) -> "vg.Grid":
-        """Detect the format of the grid file based on its extension and then read it."""
+    def read_auto(path_grid: Path, lazy: bool = False) -> "vg.Grid":
+        """Detect the format of the grid file based on its extension and then read it.
+        If `lazy`, binary formats return a Grid backed by a GridProxy (see `read_cmap`)."""
         ext = path_grid.suffix.lower()
 
         # [TODO] improve the format detection?
         if ext == ".dx":
-            return GridIO.read_dx(path_grid)
+            return GridIO.read_dx(path_grid, lazy)
 
         if ext == ".mrc":
-            return GridIO.read_mrc(path_grid)
+            return GridIO.read_mrc(path_grid, lazy)
 
         if ext == ".ccp4":
-            return GridIO.read_ccp4(path_grid)
+            return GridIO.read_ccp4(path_grid, lazy)
 
         if ext == ".cmap":
             keys = GridIO.get_cmap_keys(path_grid)
             if not keys: raise ValueError(f"Empty cmap file: {path_grid}")
-            return GridIO.read_cmap(path_grid, keys[0])
+            return GridIO.read_cmap(path_grid, keys[0], lazy)
+
+        if ext == ".vgs":
+            return GridIO.read_sparse(path_grid, lazy)
+
+        if ext == ".npy":
+            return GridIO.read_npy(path_grid, lazy)
 
         raise ValueError(f"Unrecognized file format: {ext}")
 
 
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def read_stats(path_grid: Path, key: str = None) -> "vg.GridStats | None":
+        """Statistics stored when the grid was written (see SAVE_GRID_STATS), read from
+        the file metadata or its sidecar, without loading the grid data.
+        For CMAP files, `key` defaults to the first grid. Returns None if there are none."""
+        path_grid = Path(path_grid)
+        ext = path_grid.suffix.lower()
+
+        if ext == ".cmap":
+            with h5py.File(path_grid, 'r') as h5:
+                if key is None: key = next(iter(h5["Chimera"].keys()))
+                str_json = h5["Chimera"][key]["data_zyx"].attrs.get("volgrids_stats", None)
+            return None if (str_json is None) else vg.GridStats.from_json(_decode_attr(str_json))
+
+        if ext == ".vgs":
+            with h5py.File(path_grid, 'r') as h5:
+                str_json = h5.attrs.get("volgrids_stats", None)
+            return None if (str_json is None) else vg.GridStats.from_json(_decode_attr(str_json))
+
+        if ext == ".npy":
+            with open(_get_npy_header_path(path_grid), 'r') as file:
+                stats = json.load(file).get("stats", None)
+            return None if (stats is None) else vg.GridStats(**stats)
+
+        path_sidecar = _get_stats_sidecar_path(path_grid)
+        if not path_sidecar.exists(): return None
+        return vg.GridStats.from_json(path_sidecar.read_text())
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def copy_cmap(path_in, key_in, path_out, key_out = None):
+        """Copy the grid stored under `key_in` into the CMAP file `path_out` (as `key_out`,
+        default `key_in`), replacing any grid with that key. The HDF5 objects are copied
+        as they are: the compressed chunks are not decoded nor re-encoded, so the stored
+        encoding (QUANTIZATION, pyramid levels, statistics...) of the source is kept."""
+        if key_out is None: key_out = key_in
+        _init_cmap_file(path_out)
+
+        same_file = Path(path_in).resolve() == Path(path_out).resolve()
+        if same_file and (key_in == key_out): return
+
+        with h5py.File(path_out, 'a') as h5_out:
+            with (nullcontext(h5_out) if same_file else h5py.File(path_in, 'r')) as h5_in:
+                chim = h5_out["Chimera"]
+                if key_out in chim: del chim[key_out]
+                h5_in.copy(h5_in["Chimera"][key_in], chim, name = key_out)
+                chim[key_out].attrs["name"] = np.bytes_(key_out)
+
+
     # --------------------------------------------------------------------------
     @staticmethod
     def get_cmap_keys(path_cmap) -> list[str]:
@@ -253,11 +526,258 @@ class GridIO:
             return list(h5["Chimera"].keys())
 
 
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_cmap_levels(path_cmap, key) -> list[int]:
+        """Subsampling factors available for `key` (1 is the full resolution grid)."""
+        with h5py.File(path_cmap, 'r') as h5:
+            return _get_cmap_levels(h5["Chimera"][key])
+
+
 # //////////////////////////////////////////////////////////////////////////////
+_SPARSE_FORMAT_NAME = "volgrids-sparse"
+_SPARSE_FORMAT_VERSION = 1
+_NPY_FORMAT_NAME = "volgrids-npy"
+_NPY_FORMAT_VERSION = 1
+
+# ------------------------------------------------------------------------------
+def _encode_hdf5_array(arr: np.ndarray) -> tuple[np.ndarray, dict]:
+    """Array to be stored in a HDF5 dataset, and the dataset attributes needed to decode it.
+    Boolean grids are stored losslessly as uint8. Numeric grids are stored as FLOAT_DTYPE,
+    or quantized to QUANTIZATION when it's not "none" (with the max error it introduced)."""
+    if arr.dtype == bool:
+        return arr.astype(np.uint8), {}
+
+    if vg.QUANTIZATION.lower() == "none":
+        return arr.astype(vg.FLOAT_DTYPE, copy = False), {}
+
+    quantized, scale, zero_point, max_error = vg.Math.quantize(arr, vg.QUANTIZATION)
+    return quantized, {
+        "volgrids_scale": scale,
+        "volgrids_zero_point": zero_point,
+        "volgrids_max_error": max_error,
+    }
+
+
+# ------------------------------------------------------------------------------
+def _get_quantization_attrs(dataset) -> tuple[float, float, float]:
+    """(scale, zero_point, max_error) of a dataset written with `_encode_hdf5_array`."""
+    return (
+        float(dataset.attrs.get("volgrids_scale", 1.0)),
+        float(dataset.attrs.get("volgrids_zero_point", 0.0)),
+        float(dataset.attrs.get("volgrids_max_error", 0.0)),
+    )
+
+
+# ------------------------------------------------------------------------------
+def _is_plain_float(dataset) -> bool:
+    """Whether the dataset can be used as-is (not quantized, nor stored as integers)."""
+    return np.issubdtype(dataset.dtype, np.floating) and ("volgrids_scale" not in dataset.attrs)
+
+
+# ------------------------------------------------------------------------------
+def _new_stats() -> "vg.GridStatsAccumulator | None":
+    """Accumulator for the statistics of a grid being written, if SAVE_GRID_STATS is enabled."""
+    return vg.GridStatsAccumulator() if vg.SAVE_GRID_STATS else None
+
+
+# ------------------------------------------------------------------------------
+def _update_mrc_header_stats(parser, arr: np.ndarray) -> "vg.GridStatsAccumulator | None":
+    """Set the dmin/dmax/dmean/rms fields of a MRC/CCP4 header. With SAVE_GRID_STATS, they come
+    from the same reduction as the stored statistics, instead of a separate one by mrcfile."""
+    stats = _new_stats()
+    if stats is None:
+        parser.update_header_stats()
+        return None
+
+    n_slab = vg.GridStatsAccumulator.slab_length(arr)
+    for i in range(0, len(arr), n_slab):
+        stats.update(arr[i : i + n_slab])
+    if stats.npoints == 0:
+        parser.reset_header_stats()
+        return stats
+    parser.header.dmin = np.float32(stats.min)
+    parser.header.dmax = np.float32(stats.max)
+    parser.header.dmean = np.float32(stats.mean)
+    parser.header.rms = np.float32(stats.rms)
+    return stats
+
+
+# ------------------------------------------------------------------------------
+def _write_stats_sidecar(path_grid, stats: "vg.GridStatsAccumulator | None") -> None:
+    if stats is None: return
+    _get_stats_sidecar_path(path_grid).write_text(stats.finish(vg.STATS_HISTOGRAM_BINS).to_json())
+
+
+# ------------------------------------------------------------------------------
+def _get_stats_sidecar_path(path_grid) -> Path:
+    path_grid = Path(path_grid)
+    return path_grid.with_name(f"{path_grid.name}.stats.json")
+
+
+# ------------------------------------------------------------------------------
+def _get_npy_header_path(path_npy) -> Path:
+    path_npy = Path(path_npy)
+    return path_npy.with_name(f"{path_npy.name}.json")
+
+
+# ------------------------------------------------------------------------------
+def _decode_attr(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+# ------------------------------------------------------------------------------
+def _get_mrc_array(data: "vg.Grid") -> np.ndarray:
+    ### boolean grids are stored losslessly as int8 (MRC mode 0)
+    arr = np.asarray(data.grid)
+    if arr.dtype == bool: return arr.astype(np.int8)
+    return arr.astype(vg.FLOAT_DTYPE, copy = False)
+
+
+# ------------------------------------------------------------------------------
+def _add_generic_attrs(group, c = "GROUP"):
+    group.attrs["CLASS"] = np.bytes_(c)
+    group.attrs["TITLE"] = np.bytes_("")
+    group.attrs["VERSION"] = np.bytes_("1.0")
+
+
+# ------------------------------------------------------------------------------
+def _init_cmap_file(path_cmap) -> None:
+    ### imitate the Chimera cmap format, as "specified" in this sample:
+    ### https://github.com/RBVI/ChimeraX/blob/develop/testdata/cell15_timeseries.cmap
+    if os.path.exists(path_cmap): return
+    with h5py.File(path_cmap, 'w') as h5:
+        h5.attrs["PYTABLES_FORMAT_VERSION"] = np.bytes_("2.0")
+        _add_generic_attrs(h5)
+
+        chim = h5.create_group("Chimera")
+        _add_generic_attrs(chim)
+
 
 # ------------------------------------------------------------------------------
-def _read_mrc_ccp4(path_mrc, origin: np.ndarray) -> "vg.Grid":
-    with gd.mrc.mrcfile.open(path_mrc) as parser:
+@dataclass
+class _CmapDatasetData:
+    name: str
+    shape: tuple[int]
+    dtype: np.dtype
+    chunks: tuple[int]
+    chunk_data: list[tuple[tuple[int], bytes]] # (offset, gzip-compressed bytes) of the non-empty chunks
+    compression: int
+    attrs: dict
+
+
+# ------------------------------------------------------------------------------
+@dataclass
+class _CmapFrameData:
+    origin: np.ndarray
+    step: np.ndarray
+    datasets: list[_CmapDatasetData]
+
+
+# ------------------------------------------------------------------------------
+def _get_cmap_origin_step(data: "vg.Grid") -> tuple[np.ndarray, np.ndarray]:
+    return (
+        np.array([data.xmin, data.ymin, data.zmin], dtype = vg.FLOAT_DTYPE),
+        np.array([data.dz, data.dy, data.dx], dtype = vg.FLOAT_DTYPE),
+    )
+
+
+# ------------------------------------------------------------------------------
+def _get_cmap_level(grid: np.ndarray, factor: int, pyramid_mode: str) -> tuple[np.ndarray, np.ndarray, dict]:
+    """Values of a pyramid level (the grid itself for `factor` 1), the array stored for
+    it and the attributes of its dataset. Both arrays are in the on-disk layout (zyx)."""
+    level = grid if (factor == 1) else vg.Math.downsample(grid, factor, pyramid_mode)
+    arr, attrs = _encode_hdf5_array(level)
+    if factor > 1: # recognized by Chimera(X) as a subsampled copy of data_zyx
+        attrs["subsample_spacing"] = np.array([factor, factor, factor], dtype = np.int64)
+    return level.transpose(2,1,0), arr.transpose(2,1,0), attrs
+
+
+# ------------------------------------------------------------------------------
+def _get_cmap_frame(parser: "h5py.File", key: str, origin: np.ndarray, step: np.ndarray) -> "h5py.Group":
+    """Group of the grid `key`, created if needed. The datasets of an existing one are removed."""
+    chim = parser["Chimera"]
+    if key in chim.keys():
+        frame = chim[key]
+        for name in list(frame.keys()):
+            if name.startswith("data_zyx"): del frame[name]
+        return frame
+
+    frame = parser.create_group(f"/Chimera/{key}")
+    frame.attrs["chimera_map_version"] = np.int64(1)
+    frame.attrs["chimera_version"] = np.bytes_(b'1.12_b40875')
+    frame.attrs["name"] = np.bytes_(key)
+    frame.attrs["origin"] = origin
+    frame.attrs["step"] = step
+    _add_generic_attrs(frame)
+    return frame
+
+
+# ------------------------------------------------------------------------------
+def _encode_cmap_dataset(name: str, arr: np.ndarray, attrs: dict,
+    stats: "vg.GridStatsAccumulator" = None, stats_source: np.ndarray = None
+) -> _CmapDatasetData:
+    """Split `arr` (in its on-disk layout) in HDF5 chunks and compress them like the gzip
+    filter does. Chunks with only zeros are not stored (HDF5 reads them as the fill value 0).
+    If `stats` is given, it's updated with each slab of chunks of `stats_source` (the values
+    before encoding, in the same layout) as the slab is compressed."""
+    level = vg.GZIP_COMPRESSION
+    chunks = h5py.filters.guess_chunk(arr.shape, None, arr.dtype.itemsize)
+    chunk_data = []
+    for offset in itertools.product(*(range(0, n, c) for n,c in zip(arr.shape, chunks))):
+        if (stats is not None) and not any(offset[1:]): # first chunk of a slab along the first axis
+            stats.update(stats_source[offset[0] : offset[0] + chunks[0]])
+        block = arr[tuple(slice(o, o + c) for o,c in zip(offset, chunks))]
+        if not block.any(): continue
+        if block.shape != chunks: # border chunks are stored full-size
+            block = np.pad(block, [(0, c - n) for c,n in zip(chunks, block.shape)])
+        chunk_data.append((offset, zlib.compress(np.ascontiguousarray(block).tobytes(), level)))
+    return _CmapDatasetData(name, arr.shape, arr.dtype, chunks, chunk_data, level, attrs)
+
+
+# ------------------------------------------------------------------------------
+def _write_cmap_frame(parser: "h5py.File", key: str, encoded: _CmapFrameData) -> None:
+    frame = _get_cmap_frame(parser, key, encoded.origin, encoded.step)
+    for dataset in encoded.datasets:
+        framedata = frame.create_dataset(
+            dataset.name, shape = dataset.shape, dtype = dataset.dtype, chunks = dataset.chunks,
+            compression = "gzip", compression_opts = dataset.compression
+        )
+        for offset, chunk in dataset.chunk_data:
+            framedata.id.write_direct_chunk(offset, chunk)
+        _add_generic_attrs(framedata, "CARRAY")
+        framedata.attrs.update(dataset.attrs)
+
+
+# ------------------------------------------------------------------------------
+def _get_cmap_dataset_name(level: int) -> str:
+    return "data_zyx" if level == 1 else f"data_zyx_{level}"
+
+
+# ------------------------------------------------------------------------------
+def _get_cmap_levels(frame) -> list[int]:
+    levels = [int(np.max(frame[name].attrs.get("subsample_spacing", 1))) for name in frame.keys() if name.startswith("data_zyx")]
+    return sorted(levels)
+
+
+# ------------------------------------------------------------------------------
+@contextmanager
+def _open_cmap_dataset(path_cmap, key, name = "data_zyx"):
+    with h5py.File(path_cmap, 'r') as h5:
+        yield h5["Chimera"][key][name]
+
+
+# ------------------------------------------------------------------------------
+@contextmanager
+def _open_mrc_memmap(path_mrc):
+    with gd.mrc.mrcfile.mmap(path_mrc, mode = 'r') as parser:
+        yield parser.data
+
+
+# ------------------------------------------------------------------------------
+def _read_mrc_ccp4(path_mrc, origin: np.ndarray, lazy: bool = False) -> "vg.Grid":
+    open_func = gd.mrc.mrcfile.mmap if lazy else gd.mrc.mrcfile.open
+    with open_func(path_mrc, mode = 'r') as parser:
         # machine_stamp = parser.header.machst
         ### [68 68 0 0] or [68 65 0 0] for little-endian <--- tested
         ### [17 17 0 0] for big-endian <--- what happens in these cases?
@@ -274,9 +794,16 @@ def _read_mrc_ccp4(path_mrc, origin: np.ndarray) -> "vg.Grid":
             parser.header["mz"],
         ], dtype = int)
 
-        data: np.ndarray = parser.data.astype(vg.FLOAT_DTYPE)
         origin = origin.astype(vg.FLOAT_DTYPE)
 
+        def _get_data(disk_is_zyx: bool):
+            if lazy: return vg.GridProxy(
+                partial(_open_mrc_memmap, path_mrc), shape_disk = parser.data.shape,
+                dtype = vg.FLOAT_DTYPE, disk_is_zyx = disk_is_zyx
+            )
+            data: np.ndarray = parser.data.astype(vg.FLOAT_DTYPE)
+            return data.transpose(2,1,0) if disk_is_zyx else data
+
         axes_correspondance =\
             parser.header.mapc, parser.header.mapr, parser.header.maps
 
@@ -285,7 +812,7 @@ def _read_mrc_ccp4(path_mrc, origin: np.ndarray) -> "vg.Grid":
                 resolution = res.copy(), origin = origin.copy(), deltas = vsize.copy()
             )
             obj = vg.Grid(ms, init_grid = False)
-            obj.grid = data.transpose(2,1,0)
+            obj.grid = _get_data(disk_is_zyx = True)
             return obj
 
         if axes_correspondance == (3, 2, 1):
@@ -293,7 +820,7 @@ def _read_mrc_ccp4(path_mrc, origin: np.ndarray) -> "vg.Grid":
                 resolution = res[::-1], origin = origin[::-1], deltas = vsize[::-1]
             )
             obj = vg.Grid(ms, init_grid = False)
-            obj.grid = data
+            obj.grid = _get_data(disk_is_zyx = False)
             return obj
 
         raise NotImplementedError(
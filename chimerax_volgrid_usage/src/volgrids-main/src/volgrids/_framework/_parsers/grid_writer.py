@@ -0,0 +1,78 @@
+import queue, threading, contextvars
+
+# //////////////////////////////////////////////////////////////////////////////
+class GridWriter:
+    """Write-behind output stage. Write jobs are put in a bounded queue and
+    executed in order by a single background thread, which is then the only one
+    touching the output files. Submitting blocks while the queue is full.
+    Each job runs in the context (e.g. the RunContext of the App) of the thread that submitted it."""
+    _SENTINEL = None
+
+    def __init__(self, queue_size: int):
+        self._queue = queue.Queue(maxsize = max(1, queue_size))
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target = self._work, name = "GridWriter", daemon = True)
+        self._thread.start()
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def queue_size(self) -> int:
+        return self._queue.maxsize
+
+
+    # --------------------------------------------------------------------------
+    def submit(self, func: callable, *args) -> None:
+        """Queue the call `func(*args)`. Blocks while the queue is full (back-pressure)."""
+        self._raise_pending_error()
+        if not self._thread.is_alive():
+            raise RuntimeError("GridWriter is closed, can't submit more write jobs.")
+        self._queue.put((contextvars.copy_context(), func, args))
+
+
+    # --------------------------------------------------------------------------
+    def flush(self) -> None:
+        """Barrier: wait until every queued write job has been executed."""
+        self._queue.join()
+        self._raise_pending_error()
+
+
+    # --------------------------------------------------------------------------
+    def close(self) -> None:
+        """Flush the pending jobs and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._SENTINEL)
+            self._thread.join()
+        self._raise_pending_error()
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def is_running(self) -> bool:
+        """False once closed, and in forked processes (they don't inherit the background thread)."""
+        return self._thread.is_alive()
+
+
+    # --------------------------------------------------------------------------
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is self._SENTINEL: return
+                if self._error is not None: continue # discard the remaining jobs after a failure
+                context, func, args = job
+                context.run(func, *args)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+
+    # --------------------------------------------------------------------------
+    def _raise_pending_error(self) -> None:
+        if self._error is None: return
+        error, self._error = self._error, None
+        raise RuntimeError("A background write job failed.") from error
+
+
+# //////////////////////////////////////////////////////////////////////////////
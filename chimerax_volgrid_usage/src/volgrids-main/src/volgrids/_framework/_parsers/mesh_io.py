@@ -0,0 +1,174 @@
+import json, struct
+import numpy as np
+from pathlib import Path
+from enum import Enum, auto
+
+import volgrids as vg
+
+# //////////////////////////////////////////////////////////////////////////////
+class MeshFormat(Enum):
+    GLB = auto()
+    OBJ = auto()
+    PLY = auto()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class MeshIO:
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++ MAIN I/O OPERATIONS
+    @staticmethod
+    def write_glb(path_glb, mesh: "vg.Mesh"):
+        """Binary glTF 2.0 (one mesh with positions, normals and uint32 indices).
+        Opened natively by ChimeraX and most 3D viewers."""
+        name = Path(path_glb).stem
+        gltf = {
+            "asset": {"version": "2.0", "generator": "volgrids"},
+            "scene": 0,
+            "scenes": [{"nodes": [0]}] if not mesh.is_empty else [{}],
+        }
+        bin_chunk = b''
+        if not mesh.is_empty:
+            positions = mesh.vertices.astype("<f4").tobytes()
+            normals = mesh.get_vertex_normals().astype("<f4").tobytes()
+            indices = mesh.faces.astype("<u4").tobytes()
+            bin_chunk = positions + normals + indices
+            gltf.update({
+                "nodes": [{"mesh": 0, "name": name}],
+                "meshes": [{"name": name, "primitives": [{
+                    "attributes": {"POSITION": 0, "NORMAL": 1}, "indices": 2, "mode": 4, # triangles
+                }]}],
+                "buffers": [{"byteLength": len(bin_chunk)}],
+                "bufferViews": [
+                    {"buffer": 0, "byteOffset": 0, "byteLength": len(positions), "target": 34962},
+                    {"buffer": 0, "byteOffset": len(positions), "byteLength": len(normals), "target": 34962},
+                    {"buffer": 0, "byteOffset": len(positions) + len(normals), "byteLength": len(indices), "target": 34963},
+                ],
+                "accessors": [
+                    {"bufferView": 0, "componentType": 5126, "count": mesh.nvertices, "type": "VEC3",
+                        "min": mesh.vertices.min(axis = 0).tolist(), "max": mesh.vertices.max(axis = 0).tolist()},
+                    {"bufferView": 1, "componentType": 5126, "count": mesh.nvertices, "type": "VEC3"},
+                    {"bufferView": 2, "componentType": 5125, "count": 3 * mesh.nfaces, "type": "SCALAR"},
+                ],
+            })
+
+        json_chunk = _pad4(json.dumps(gltf, separators = (',', ':')).encode(), b' ')
+        bin_chunk = _pad4(bin_chunk, b'\x00')
+        length = 12 + 8 + len(json_chunk) + (8 + len(bin_chunk) if bin_chunk else 0)
+
+        with open(path_glb, "wb") as file:
+            file.write(struct.pack("<4sII", b"glTF", 2, length))
+            file.write(struct.pack("<I4s", len(json_chunk), b"JSON"))
+            file.write(json_chunk)
+            if bin_chunk:
+                file.write(struct.pack("<I4s", len(bin_chunk), b"BIN\x00"))
+                file.write(bin_chunk)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_ply(path_ply, mesh: "vg.Mesh"):
+        """Binary little-endian PLY with vertex positions and normals."""
+        header = '\n'.join((
+            "ply",
+            "format binary_little_endian 1.0",
+            "comment written by volgrids",
+            f"element vertex {mesh.nvertices}",
+            "property float x", "property float y", "property float z",
+            "property float nx", "property float ny", "property float nz",
+            f"element face {mesh.nfaces}",
+            "property list uchar uint vertex_indices",
+            "end_header",
+        )) + '\n'
+
+        vertices = np.hstack((mesh.vertices, mesh.get_vertex_normals())).astype("<f4")
+        faces = np.empty(mesh.nfaces, dtype = [("n", "u1"), ("idx", "<u4", (3,))])
+        faces["n"] = 3
+        faces["idx"] = mesh.faces
+
+        with open(path_ply, "wb") as file:
+            file.write(header.encode("ascii"))
+            file.write(vertices.tobytes())
+            file.write(faces.tobytes())
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_obj(path_obj, mesh: "vg.Mesh"):
+        """Wavefront OBJ (text, heavier than GLB/PLY but understood everywhere)."""
+        with open(path_obj, "w") as file:
+            file.write("# OBJ file written by volgrids\n")
+            np.savetxt(file, mesh.vertices, fmt = "v %.4f %.4f %.4f")
+            np.savetxt(file, mesh.get_vertex_normals(), fmt = "vn %.4f %.4f %.4f")
+            np.savetxt(file, np.repeat(mesh.faces.astype(np.int64) + 1, 2, axis = 1), fmt = "f %d//%d %d//%d %d//%d")
+
+
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++ OTHER I/O UTILITIES
+    @staticmethod
+    def write_auto(path_mesh: Path, mesh: "vg.Mesh"):
+        """Detect the format of the mesh file based on its extension and then write it."""
+        fmt = MeshIO.get_format(path_mesh)
+        {
+            MeshFormat.GLB: MeshIO.write_glb,
+            MeshFormat.PLY: MeshIO.write_ply,
+            MeshFormat.OBJ: MeshIO.write_obj,
+        }[fmt](path_mesh, mesh)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_isosurfaces(path_prefix, data: "vg.Grid", isovalues: list[float] = None, fmt: MeshFormat = None) -> list[Path]:
+        """Extract the isosurfaces of the grid and write one mesh file per isovalue,
+        named "{path_prefix}.iso_{isovalue}.{ext}". `isovalues` default to the MESH_ISOVALUES
+        config (see `get_isovalues`) and `fmt` to MESH_FORMAT. Returns the written paths."""
+        if isovalues is None: isovalues = MeshIO.get_isovalues(data)
+        if fmt is None: fmt = vg.MESH_FORMAT
+
+        paths = []
+        for isovalue in isovalues:
+            path_mesh = Path(f"{path_prefix}.iso_{isovalue:g}.{fmt.name.lower()}")
+            MeshIO.write_auto(path_mesh, vg.Mesh.from_grid(data, isovalue))
+            paths.append(path_mesh)
+        return paths
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_isovalues(data: "vg.Grid", str_isovalues: str = None, stats: "vg.GridStats" = None) -> list[float]:
+        """Parse an isovalues specification (default: the MESH_ISOVALUES config):
+        "none" (no isosurfaces), "auto" (the suggested isovalues of the grid statistics,
+        see `GridStats.get_default_isovalues`) or a comma-separated list of floats.
+        If not given, `stats` are computed from the grid data when needed."""
+        if str_isovalues is None: str_isovalues = vg.MESH_ISOVALUES
+        str_isovalues = str_isovalues.strip().lower()
+
+        if str_isovalues == "none": return []
+        if str_isovalues != "auto":
+            try:
+                return [float(value) for value in str_isovalues.split(',') if value.strip()]
+            except ValueError:
+                raise ValueError(f"Invalid isovalues: '{str_isovalues}'. Use 'none', 'auto' or a comma-separated list of floats.")
+
+        if data.grid.dtype == bool: return [0.5]
+        if stats is None: stats = vg.GridStats.from_array(np.asarray(data.grid), vg.STATS_HISTOGRAM_BINS)
+        ### an isovalue at the extreme value would give an empty surface (e.g. for
+        ### masks stored as 0/1 numbers), use the half-way value instead
+        return [v / 2 if v in (stats.min, stats.max) else v for v in stats.get_default_isovalues()]
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_format(path_mesh: Path) -> MeshFormat:
+        ext = Path(path_mesh).suffix.lower().lstrip('.')
+        for fmt in MeshFormat:
+            if fmt.name.lower() == ext: return fmt
+        raise ValueError(f"Unrecognized mesh format: .{ext}. Use one of: {', '.join(f'.{f.name.lower()}' for f in MeshFormat)}.")
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _pad4(chunk: bytes, fill: bytes) -> bytes:
+    """GLB chunks must be 4-byte aligned."""
+    return chunk + fill * ((-len(chunk)) % 4)
+
+
+# ------------------------------------------------------------------------------
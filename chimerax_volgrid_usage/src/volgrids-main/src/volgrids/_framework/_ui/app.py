@@ -6,21 +6,92 @@ import volgrids as vg
 # //////////////////////////////////////////////////////////////////////////////
 class App(ABC):
     PATH_DEFAULT_CONFIG = vg.resolve_path("config.ini")
+    _owns_profiler = False # whether this app started the profiler of its context (and saves it after running)
 
     # --------------------------------------------------------------------------
     def __init__(self, *args, **kwargs):
-        handler = self._CLASS_PARAM_HANDLER(*args, **kwargs)
-        handler.assign_globals()
-        self.load_configs(vg.PATH_CUSTOM_CONFIG)
+        ### the arguments and configs of this app go to its own context, which is the current one of this thread
+        ### only while the app is initialized (here and in the subclasses, see `self.ctx.activate`) or run
+        self.ctx = vg.RunContext.from_defaults()
+        with self.ctx.activate():
+            handler = self._CLASS_PARAM_HANDLER(*args, **kwargs)
+            handler.assign_globals()
+            handler.assign_profile()
+            if vg.PATH_PROFILE is not None:
+                vg.PROFILER = vg.Profiler(type(self).__name__)
+                self._owns_profiler = True
+
+            with vg.Profiler.span("config"):
+                self.load_configs(vg.PATH_CUSTOM_CONFIG)
 
 
     # --------------------------------------------------------------------------
     @classmethod
-    def from_cli(cls):
-        params_pos, params_kwd = cls._CLASS_PARAM_HANDLER.parse_cli_args()
+    def from_cli(cls, cli_args: list[str] = None):
+        """App configured by command line arguments (default: the ones of this process)."""
+        params_pos, params_kwd = cls._CLASS_PARAM_HANDLER.parse_cli_args(cli_args)
         return cls(*params_pos, **params_kwd)
 
 
+    # --------------------------------------------------------------------------
+    @classmethod
+    def make_context(cls, path_config: Path = None) -> "vg.RunContext":
+        """Context with the configs of the default config file (overridden by the ones of `path_config`)
+        but no command line arguments, e.g. for using the library APIs (see `sm.SmifOperations`)."""
+        obj = cls.__new__(cls)
+        obj.ctx = vg.RunContext.from_defaults()
+        with obj.ctx.activate():
+            obj.load_configs(path_config)
+        return obj.ctx
+
+
+    # --------------------------------------------------------------------------
+    def run(self):
+        """Run the app. Grids saved during the run are handed to a background
+        writer (if WRITER_QUEUE_SIZE > 0), which is flushed before returning.
+        Apps run from within another app (e.g. the jobs of a batch) reuse its writer, and its profiler.
+        The context of the app is the current one while it runs, whatever the thread.
+        If the run fails, the error of a pending write is logged instead of replacing it."""
+        with self.ctx.activate():
+            has_writer = (vg.GRID_WRITER is not None) and vg.GRID_WRITER.is_running
+            owns_writer = (not has_writer) and (vg.WRITER_QUEUE_SIZE > 0)
+            if owns_writer:
+                vg.GRID_WRITER = vg.GridWriter(vg.WRITER_QUEUE_SIZE)
+
+            failed = False
+            try:
+                with vg.Profiler.span("run"):
+                    self._run()
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                try:
+                    if owns_writer: self._close_writer(log_errors = failed)
+                finally:
+                    self._save_profile()
+
+
+    # --------------------------------------------------------------------------
+    def _close_writer(self, log_errors: bool) -> None:
+        """Flush and stop the background writer started by `run`. A failed write
+        raises, unless `log_errors` (the run already failed), in which case it's printed."""
+        writer, vg.GRID_WRITER = vg.GRID_WRITER, None
+        try:
+            writer.close()
+        except Exception as e:
+            if not log_errors: raise
+            print(f">>> {e} ({e.__cause__!r})", flush = True)
+
+
+    # --------------------------------------------------------------------------
+    def _save_profile(self) -> None:
+        """Export the profile of the run, if this app is the one that started it."""
+        if not self._owns_profiler: return
+        path_json, path_trace = vg.PROFILER.save(vg.PATH_PROFILE)
+        print(f">>> Profile saved: {path_json} (Chrome trace: {path_trace})", flush = True)
+
+
     # --------------------------------------------------------------------------
     def load_configs(self, path_custom: Path | None):
         self._load_config_file(self.PATH_DEFAULT_CONFIG, is_default = True)
@@ -36,7 +107,7 @@ class App(ABC):
         for section, scope_module in self.CONFIG_MODULES.items():
             parser.apply_config(
                 section = section,
-                scope_module = scope_module.__dict__,
+                scope_module = vars(self.ctx.scope(scope_module)),
                 scope_dependencies = scope_dependencies,
                 valid_config_keys = scope_module.__config_keys__.copy(),
                 all_configs_mandatory = is_default
@@ -61,7 +132,7 @@ class App(ABC):
 
     # --------------------------------------------------------------------------
     @abstractmethod
-    def run(self):
+    def _run(self):
         raise NotImplementedError()
 
 
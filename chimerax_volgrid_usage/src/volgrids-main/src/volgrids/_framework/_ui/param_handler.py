@@ -2,6 +2,8 @@ import os, sys
 from pathlib import Path
 from abc import ABC, abstractmethod
 
+import volgrids as vg
+
 # //////////////////////////////////////////////////////////////////////////////
 class ParamHandler(ABC):
     def __init__(self, *params_pos: str, **params_kwd: list[str]):
@@ -16,6 +18,15 @@ class ParamHandler(ABC):
         return
 
 
+    # --------------------------------------------------------------------------
+    def assign_profile(self):
+        """`--profile [path]`, common to every app: record a vg.Profiler of the run and save it
+        to `path` (default: profile.json), plus its Chrome trace next to it."""
+        if not self._has_param_kwds("profile"): return
+        values = self._params_kwd["profile"]
+        vg.PATH_PROFILE = self._safe_path_file_out(values[0] if values else "profile.json")
+
+
     # --------------------------------------------------------------------------
     @property
     @abstractmethod
@@ -25,10 +36,10 @@ class ParamHandler(ABC):
 
     # --------------------------------------------------------------------------
     @classmethod
-    def parse_cli_args(cls) -> tuple[list[str], dict[str, list[str]]]:
+    def parse_cli_args(cls, cli_args: list[str] = None) -> tuple[list[str], dict[str, list[str]]]:
         """_EXPECTED_CLI_FLAGS is a dict where keys are flag identifiers, each associated with a list of aliases for said flag.
-        This method then outputs a dict where the keys are the flag identifiers actually found in self._args,
-        together with their correspondant values."""
+        This method then outputs a dict where the keys are the flag identifiers actually found in `cli_args`
+        (default: the arguments of this process), together with their correspondant values."""
 
         if cls._EXPECTED_CLI_FLAGS is None:
             raise NotImplementedError("The _EXPECTED_CLI_FLAGS attribute must be defined in the subclass.")
@@ -39,7 +50,7 @@ class ParamHandler(ABC):
 
         current_name = '' # '' is used for options at the start that are not associated with any flag
         params_kwd: dict[str, list[str]] = {current_name: []}
-        cli_args = sys.argv[1:]
+        cli_args = list(sys.argv[1:] if cli_args is None else cli_args)
 
         while cli_args:
             arg = cli_args.pop(0)
@@ -173,4 +184,23 @@ class ParamHandler(ABC):
             self._exit_with_help(-1, f"The value for the flag '{name}' must be a float.")
 
 
+    # --------------------------------------------------------------------------
+    def _safe_kwd_int(self, name: str, default: int = 0) -> int:
+        if not self._has_param_kwds(name):
+            return default
+        val = self._safe_get_param_kwd(name, 0)
+        try:
+            return int(val)
+        except ValueError:
+            self._exit_with_help(-1, f"The value for the flag '{name}' must be an integer.")
+
+
+    # --------------------------------------------------------------------------
+    def _safe_kwd_float_list(self, name: str) -> list[float]:
+        try:
+            return [float(val) for val in self._safe_get_param_kwd_list(name)]
+        except ValueError:
+            self._exit_with_help(-1, f"The values for the flag '{name}' must be floats.")
+
+
 # //////////////////////////////////////////////////////////////////////////////
@@ -0,0 +1,312 @@
+import io, os, sys, hmac, json, time, queue, socket, secrets, warnings, importlib, itertools, threading, socketserver
+import multiprocessing
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import volgrids as vg
+
+# //////////////////////////////////////////////////////////////////////////////
+class JobServer:
+    """Local compute service: a pool of worker processes that keep volgrids (and its heavy
+    dependencies) imported, together with the per-process caches (kernel geometries, chemical
+    tables, structure topologies, resampled APBS maps), so that the viewer plugins can submit
+    jobs without paying for a new Python process each time.
+
+    The server listens on a localhost TCP port and talks JSON lines: every request is a JSON
+    object in one line, and every response event is a JSON object in one line.
+    Every request must include `"token": str`, the random token that the server writes to a file that
+    only its user can read (see `get_path_token`), so that other local users can't submit jobs.
+      - `{"op": "run", "app": "smiffer", "args": ["prot", "x.pdb", "-o", "out"]}`: run a job,
+        where `args` are the same command line arguments of `run/{app}.py` (apps: smiffer, veins, vgtools),
+        except for the operations that never finish (`vgtools serve`), which are rejected with an "error" event.
+        Events: `{"event": "accepted", "job": id}`, then one `{"event": "output", "job": id, "line": str}`
+        per line printed by the job, then `{"event": "done", "job": id, "ok": bool, "error": str|null, "seconds": float}`.
+      - `{"op": "ping"}`: answered with `{"event": "pong", "workers": n, "volgrids": str}`, where "volgrids" is the
+        resolved folder of the volgrids package the server runs (clients may want a specific install).
+      - `{"op": "shutdown"}`: answered with `{"event": "bye"}`, then the server stops.
+    Several requests can be sent through the same connection, one after the other."""
+    HOST = "127.0.0.1"
+    DEFAULT_PORT = 47810
+    APPS = {
+        "smiffer": ("volgrids.smiffer", "AppSmiffer"),
+        "veins":   ("volgrids.veins",   "AppVeins"),
+        "vgtools": ("volgrids.vgtools", "AppVGTools"),
+    }
+    BLOCKING_OPERATIONS = {"vgtools": ("serve",)} # they never finish, so they can't run as jobs
+    FOLDER_TOKENS = Path.home() / ".volgrids" # user-private folder of the token files
+
+    def __init__(self, port: int = None, num_workers: int = 0):
+        if port is None: port = JobServer.DEFAULT_PORT
+        if num_workers <= 0: num_workers = vg.get_num_cpus()
+        self.num_workers = num_workers
+
+        ### "spawn": the workers must not inherit the threads of the server
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        self._pool: ProcessPoolExecutor = None
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._job_queues: dict[int, queue.Queue] = {}
+
+        self._server = _TCPServer((JobServer.HOST, port), _RequestHandler)
+        self._server.job_server = self
+        self.port = self._server.server_address[1]
+        self.token = secrets.token_hex(32)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_path_token(port: int) -> Path:
+        """File with the token of the server listening on `port` (while it serves)."""
+        return JobServer.FOLDER_TOKENS / f"server_{port}.token"
+
+
+    # --------------------------------------------------------------------------
+    def serve_forever(self, on_ready: callable = None) -> None:
+        """Start the workers (importing everything in them) and serve until a shutdown request
+        arrives. `on_ready()` is called once the workers are started."""
+        self._start_pool()
+        router = threading.Thread(target = self._route_events, name = "JobServerEvents", daemon = True)
+        router.start()
+        path_token = JobServer.get_path_token(self.port)
+        _write_private_file(path_token, self.token)
+        if on_ready is not None: on_ready()
+        try:
+            self._server.serve_forever()
+        finally:
+            path_token.unlink(missing_ok = True)
+            self._server.server_close()
+            self._pool.shutdown(wait = True, cancel_futures = True)
+            self._events.put((None, None))
+            router.join()
+
+
+    # --------------------------------------------------------------------------
+    def shutdown(self) -> None:
+        """Stop serving (from another thread than the one running `serve_forever`)."""
+        threading.Thread(target = self._server.shutdown, daemon = True).start()
+
+
+    # --------------------------------------------------------------------------
+    def run_job(self, app: str, args: list[str]):
+        """Submit a job to the pool and yield its events (see the class docstring), as they happen."""
+        if app not in JobServer.APPS:
+            raise ValueError(f"Unknown app '{app}'. Use one of: {', '.join(JobServer.APPS)}.")
+        args = [str(arg) for arg in args]
+        if args and (args[0] in JobServer.BLOCKING_OPERATIONS.get(app, ())):
+            raise ValueError(f"'{app} {args[0]}' doesn't finish, so it can't be run as a job.")
+
+        job_id = next(self._job_ids)
+        events = queue.Queue()
+        self._job_queues[job_id] = events
+        t0 = time.perf_counter()
+        try:
+            future = self._submit(job_id, app, args)
+            yield {"event": "accepted", "job": job_id}
+
+            while True:
+                try:
+                    line = events.get(timeout = 0.2)
+                except queue.Empty:
+                    ### a crashed worker never sends the end of its job
+                    if future.done() and isinstance(future.exception(), BrokenProcessPool): break
+                    continue
+                if line is None: break
+                yield {"event": "output", "job": job_id, "line": line}
+
+            error = future.exception()
+            yield {
+                "event": "done", "job": job_id, "ok": error is None,
+                "error": None if (error is None) else f"{type(error).__name__}: {error}",
+                "seconds": round(time.perf_counter() - t0, 3),
+            }
+        finally:
+            del self._job_queues[job_id]
+
+
+    # --------------------------------------------------------------------------
+    def _start_pool(self) -> None:
+        self._pool = ProcessPoolExecutor(
+            self.num_workers, mp_context = self._context,
+            initializer = _init_worker, initargs = (self._events,),
+        )
+        ### start all the workers now, instead of at the first jobs
+        for future in [self._pool.submit(time.sleep, 0) for _ in range(self.num_workers)]:
+            future.result()
+
+
+    # --------------------------------------------------------------------------
+    def _submit(self, job_id: int, app: str, args: list[str]):
+        with self._lock:
+            try:
+                return self._pool.submit(_run_job, job_id, app, args)
+            except BrokenProcessPool: # a worker died (e.g. killed for lack of memory), replace the pool
+                self._pool.shutdown(wait = False, cancel_futures = True)
+                self._start_pool()
+                return self._pool.submit(_run_job, job_id, app, args)
+
+
+    # --------------------------------------------------------------------------
+    def _route_events(self) -> None:
+        """Hand the lines printed by the workers to the connection waiting for each job."""
+        while True:
+            job_id, line = self._events.get()
+            if job_id is None: return
+            events = self._job_queues.get(job_id)
+            if events is not None: events.put(line)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class JobClient:
+    """Client for a running JobServer, e.g. `for event in JobClient().run("smiffer", args): ...`"""
+    def __init__(self, port: int = None, timeout: float = 5.0):
+        self.port = JobServer.DEFAULT_PORT if port is None else port
+        self.timeout = timeout
+
+
+    # --------------------------------------------------------------------------
+    def is_available(self) -> bool:
+        try:
+            return next(self._request({"op": "ping"}))["event"] == "pong"
+        except (OSError, ValueError, StopIteration):
+            return False
+
+
+    # --------------------------------------------------------------------------
+    def run(self, app: str, args: list[str]):
+        """Submit a job and yield its events until (and including) the "done" one."""
+        for event in self._request({"op": "run", "app": app, "args": [str(arg) for arg in args]}, wait = True):
+            yield event
+            if event["event"] in ("done", "error"): return
+
+
+    # --------------------------------------------------------------------------
+    def shutdown(self) -> None:
+        next(self._request({"op": "shutdown"}))
+
+
+    # --------------------------------------------------------------------------
+    def _request(self, request: dict, wait: bool = False):
+        ### a missing token file (no server on this port) raises FileNotFoundError, an OSError
+        request = {**request, "token": JobServer.get_path_token(self.port).read_text().strip()}
+        with socket.create_connection((JobServer.HOST, self.port), timeout = self.timeout) as sock:
+            if wait: sock.settimeout(None) # jobs can take any time
+            sock.sendall((json.dumps(request) + '\n').encode())
+            with sock.makefile("r", encoding = "utf-8") as file:
+                for line in file:
+                    yield json.loads(line)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: JobServer = self.server.job_server
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+                if not hmac.compare_digest(str(request.get("token")).encode(), server.token.encode()):
+                    self._send({"event": "error", "error": "PermissionError: missing or invalid token."})
+                    return
+                op = request.get("op")
+                if op == "ping":
+                    self._send({"event": "pong", "workers": server.num_workers, "volgrids": str(_PATH_PACKAGE)})
+                elif op == "shutdown":
+                    self._send({"event": "bye"})
+                    server.shutdown()
+                    return
+                elif op == "run":
+                    for event in server.run_job(request["app"], request.get("args", [])):
+                        self._send(event)
+                else:
+                    raise ValueError(f"Unknown operation: {op}. Use 'run', 'ping' or 'shutdown'.")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._send({"event": "error", "error": f"{type(e).__name__}: {e}"})
+            except (BrokenPipeError, ConnectionResetError): # the client went away, the job goes on
+                return
+
+
+    # --------------------------------------------------------------------------
+    def _send(self, event: dict) -> None:
+        self.wfile.write((json.dumps(event) + '\n').encode())
+        self.wfile.flush()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _EventStream(io.TextIOBase):
+    """stdout/stderr of a job in a worker: complete lines are sent to the server."""
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self._buffer = ''
+
+    def writable(self) -> bool: return True
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines: _EVENTS.put((self.job_id, line))
+        return len(text)
+
+    def close_job(self) -> None:
+        if self._buffer: _EVENTS.put((self.job_id, self._buffer))
+        self._buffer = ''
+        _EVENTS.put((self.job_id, None))
+
+
+# ------------------------------------------------------------------------------
+_EVENTS: "multiprocessing.Queue" = None
+
+_WARM_MODULES = ("MDAnalysis", "scipy.ndimage", "pandas", "h5py", "gridData")
+
+_PATH_PACKAGE = Path(vg.__file__).resolve().parent
+
+
+# ------------------------------------------------------------------------------
+def _write_private_file(path: Path, text: str) -> None:
+    """Write `text` to a new file that only the current user can read, in a folder only they can list."""
+    path.parent.mkdir(mode = 0o700, parents = True, exist_ok = True)
+    os.chmod(path.parent, 0o700)
+    path.unlink(missing_ok = True) # a leftover file keeps its permissions, create a new one instead
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as file:
+        file.write(text)
+
+
+# ------------------------------------------------------------------------------
+def _init_worker(events: "multiprocessing.Queue") -> None:
+    """Import everything once per worker."""
+    global _EVENTS
+    _EVENTS = events
+    warnings.filterwarnings("ignore", module = "MDAnalysis.*")
+
+    for name, _ in JobServer.APPS.values(): importlib.import_module(name)
+    for name in _WARM_MODULES:
+        if name in sys.modules: getattr(sys.modules[name], "__doc__") # resolve the lazy imports
+
+
+# ------------------------------------------------------------------------------
+def _run_job(job_id: int, app: str, args: list[str]) -> None:
+    """Run an app in a worker as if it was called from the command line."""
+    ### no need to reset the globals set by a previous job: every app starts
+    ### from the defaults of the modules, in its own RunContext
+    name_module, name_class = JobServer.APPS[app]
+    cls_app: type["vg.App"] = getattr(importlib.import_module(name_module), name_class)
+
+    stream = _EventStream(job_id)
+    try:
+        with redirect_stdout(stream), redirect_stderr(stream):
+            try:
+                cls_app.from_cli(args).run()
+            except SystemExit as e: # e.g. the help message or invalid arguments
+                if e.code not in (None, 0): raise RuntimeError(f"'{app}' exited with code {e.code}.") from None
+    finally:
+        stream.close_job()
+
+
+# ------------------------------------------------------------------------------
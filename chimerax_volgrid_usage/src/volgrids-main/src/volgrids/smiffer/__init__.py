@@ -1,5 +1,7 @@
 from ._core.mol_system import MolType, MolSystemSmiffer
 from ._core.trimmer import Trimmer
+from ._core.job import SmifferJob
+from ._core.operations import SmifOperations
 
 from ._parsers.parser_chem_table import ParserChemTable
 
@@ -45,6 +47,7 @@ TRIM_FARAWAY_DIST: float
 
 APBS_MIN_CUTOFF: int
 APBS_MAX_CUTOFF: int
+APBS_CACHE_FOLDER: str
 
 ENERGY_SCALE: float
 
@@ -107,3 +110,10 @@ PS_INFO: tuple[float, float, float, float] = None # pocket sphere info: [radius,
 CURRENT_MOLTYPE: MolType = MolType.NONE           # type of the current molecule
 
 USE_STRUCTURE_HYDROGENS = False # whether to use hydrogens from the structure to calculate hbond smifs
+
+BATCH_JOBS: list[SmifferJob] = None # structures to process in batch mode (None: single structure mode)
+NUM_WORKERS: int = 0                # processes used in batch mode (0: one per CPU)
+
+
+### the globals above are a compatibility shim over the current RunContext
+_vg.RunContext.install_shim(__name__)
@@ -0,0 +1,122 @@
+import csv, json
+from pathlib import Path
+from dataclasses import dataclass
+
+import volgrids.smiffer as sm
+
+# //////////////////////////////////////////////////////////////////////////////
+@dataclass
+class SmifferJob:
+    """One structure to process in batch mode, i.e. the equivalent of a single
+    `run/smiffer.py` call. See `read_manifest` for the manifest columns."""
+    path_structure: Path
+    moltype: "sm.MolType"
+    folder_out: Path
+    path_apbs: Path = None
+    path_traj: Path = None
+    path_table: Path = None
+    ps_info: tuple[float, float, float, float] = None # pocket sphere info: [radius, x, y, z]
+
+    _MOLTYPES = {"prot": "PROT", "rna": "RNA", "ligand": "LIGAND"}
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def name(self) -> str:
+        return self.path_structure.name
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def cost(self) -> int:
+        """Rough estimation of the work of this job (bytes of its input structure and trajectory),
+        used to start with the largest jobs so that the workers finish at about the same time."""
+        return sum(path.stat().st_size for path in (self.path_structure, self.path_traj) if path is not None)
+
+
+    # --------------------------------------------------------------------------
+    def assign_globals(self) -> None:
+        """Set the command line globals of the smiffer module, as the ParamHandler does for a single run."""
+        sm.PATH_STRUCTURE = self.path_structure
+        sm.PATH_TRAJECTORY = self.path_traj
+        sm.PATH_APBS = self.path_apbs
+        sm.PATH_TABLE = self.path_table
+        sm.FOLDER_OUT = self.folder_out
+        sm.PS_INFO = self.ps_info
+        sm.CURRENT_MOLTYPE = self.moltype
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def read_manifest(cls, path_manifest: Path, folder_out: Path = None) -> list["SmifferJob"]:
+        """Jobs listed in a CSV file (with header) or a JSON file (list of objects) with the keys:
+        "structure" and "moltype" (prot, rna or ligand) are mandatory; "apbs", "traj", "table",
+        "pocket" (radius and X, Y, Z coordinates of the pocket sphere, space-separated) and
+        "output" (folder, defaults to `folder_out` or else to the folder of the structure) are optional.
+        Relative paths are taken from the current working directory, as in the command line."""
+        path_manifest = Path(path_manifest)
+        if path_manifest.suffix.lower() == ".json":
+            entries = json.loads(path_manifest.read_text())
+            if not isinstance(entries, list):
+                raise ValueError(f"The JSON manifest '{path_manifest}' must contain a list of jobs.")
+        else:
+            with open(path_manifest, newline = '') as file:
+                entries = list(csv.DictReader(
+                    line for line in file if line.strip() and not line.lstrip().startswith('#')
+                ))
+
+        jobs = []
+        for i, entry in enumerate(entries, 1):
+            try:
+                jobs.append(cls._from_entry(entry, folder_out))
+            except (ValueError, KeyError, TypeError, FileNotFoundError) as e:
+                raise ValueError(f"Invalid job {i} in the manifest '{path_manifest}': {e}") from e
+        return jobs
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def _from_entry(cls, entry: dict, folder_out: Path = None) -> "SmifferJob":
+        entry = {str(k).strip().lower(): v for k,v in entry.items() if k is not None}
+        def _get(key: str):
+            value = entry.get(key)
+            if isinstance(value, str): value = value.strip()
+            return value if value not in (None, '') else None
+
+        def _get_path(key: str, is_folder: bool = False) -> Path:
+            value = _get(key)
+            if value is None: return None
+            path = Path(value)
+            if not is_folder and not path.is_file():
+                raise FileNotFoundError(f"the {key} file '{path}' does not exist")
+            return path
+
+        path_structure = _get_path("structure")
+        if path_structure is None: raise ValueError("no structure file provided")
+
+        str_moltype = str(_get("moltype")).lower()
+        if str_moltype not in cls._MOLTYPES:
+            raise ValueError(f"invalid moltype '{str_moltype}', expected one of: {', '.join(cls._MOLTYPES)}")
+        moltype = sm.MolType[cls._MOLTYPES[str_moltype]]
+
+        path_table = _get_path("table")
+        if (moltype == sm.MolType.LIGAND) and (path_table is None):
+            raise ValueError("no table file provided for ligand mode")
+
+        pocket = _get("pocket")
+        if isinstance(pocket, str): pocket = pocket.replace(',', ' ').split()
+        if (pocket is not None) and (len(pocket) != 4):
+            raise ValueError("the pocket sphere must be given as: radius x y z")
+
+        return cls(
+            path_structure = path_structure,
+            moltype = moltype,
+            folder_out = _get_path("output", is_folder = True) or folder_out or path_structure.parent,
+            path_apbs = _get_path("apbs"),
+            path_traj = _get_path("traj"),
+            path_table = path_table,
+            ps_info = None if pocket is None else tuple(float(v) for v in pocket),
+        )
+
+
+# //////////////////////////////////////////////////////////////////////////////
@@ -15,16 +15,34 @@ class MolType(Enum):
 
 # //////////////////////////////////////////////////////////////////////////////
 class MolSystemSmiffer(vg.MolSystem):
-    def __init__(self, path_struct: Path, path_traj: Path = None):
-        self.do_ps = sm.PS_INFO is not None
-        self.chemtable = sm.ParserChemTable(self._get_path_table())
+    ### bytes per point of the temporaries counted by `estimate_memory`, as the number of (FLOAT_DTYPE, float64, 1-byte) arrays
+    ### they're made of. numpy's intermediate results are float64 even for FLOAT_DTYPE inputs, because the parameters are floats.
+    KERNEL_GEOMETRY   = (3, 4, 0) # coords; shifted coords and distances to the center, cached per kernel shape (see vg.Kernel)
+    KERNEL_VALUES     = (0, 1, 0) # gaussian values, kept while the SMIF is stamped
+    KERNEL_UNIVARIATE = (1, 2, 0) # initial zeros; `dist - mu` and its square, while computing the values
+    KERNEL_BIVARIATE  = (0, 8, 0) # angles, the (angle, dist) matrix, its difference to mu, two terms of the quadratic form and the new values
+    KERNEL_STAMP      = (0, 2, 0) # kernel scaled by the multiplication factor and the sum with the subgrid
+    KERNEL_SPHERE     = (0, 0, 2) # boolean values and the `dist < radius` mask
+    TRIM_SPHERE       = (3, 5, 0) # coords; coords shifted to the COG, two squares of their norm and the distances
+    TRIM_RNDS         = (0, 1, 2) # search distances; visited points and their negation
+    TRIM_RNDS_QUEUE   = (0, 0, 24) # queued points as tuples in a set (~96 bytes each), at most a fourth of the grid
+    TRIM_FARAWAY      = (0, 0, 2) # neighbourhood of the atoms and its negation
+    WRITING           = (2, 1, 0) # cast to FLOAT_DTYPE, the copy of mrcfile and a float64 temporary of its header statistics
+    WRITING_STATS     = (1, 2, 8) # per point of a statistics slab: values; their squares and the bin indices (uint32 and intp)
+
+
+    # --------------------------------------------------------------------------
+    def __init__(self, path_struct: Path, path_traj: Path = None, ctx: "vg.RunContext" = None):
+        self._set_context(ctx)
+        self.do_ps = self.ctx.sm.PS_INFO is not None
+        self.chemtable = sm.ParserChemTable.from_cached(self._get_path_table())
         self._init_attrs_from_molecules(path_struct, path_traj)
 
 
     # --------------------------------------------------------------------------
     def get_relevant_atoms(self):
         if self.do_ps:
-            radius, xcog, ycog, zcog = sm.PS_INFO
+            radius, xcog, ycog, zcog = self.ctx.sm.PS_INFO
             return self.system.select_atoms(
                 f"{self.chemtable.selection_query} and point {xcog} {ycog} {zcog} {radius}"
             )
@@ -35,7 +53,7 @@ class MolSystemSmiffer(vg.MolSystem):
     # --------------------------------------------------------------------------
     def get_relevant_atoms_broad(self, trimming_dist):
         if self.do_ps:
-            radius, xcog, ycog, zcog = sm.PS_INFO
+            radius, xcog, ycog, zcog = self.ctx.sm.PS_INFO
             return self.system.select_atoms(
                 f"{self.chemtable.selection_query} and point {xcog} {ycog} {zcog} {radius + trimming_dist}"
             )
@@ -43,10 +61,89 @@ class MolSystemSmiffer(vg.MolSystem):
         return self.system.select_atoms(self.chemtable.selection_query)
 
 
+    # --------------------------------------------------------------------------
+    def estimate_memory(self, plan: "vg.MemoryPlan") -> dict[str, int]:
+        """Estimated peak bytes of the trimming and of each SMIF, in the order of `sm.SmifOperations.iter_smifs`.
+        Every phase holds the trimming masks (1 byte per point each), the grids kept for the later
+        SMIFs, the grids queued in the background writer, the kernel geometries cached so far and
+        the temporaries of writing a grid, plus its own grid and kernels (or the temporaries of the
+        trimming operations). The temporaries are listed as class constants, by the arrays they're made of."""
+        cfg = self.ctx.sm
+        npoints = plan.npoints
+        b = np.dtype(plan.dtype).itemsize              # numeric grids
+        bc = np.dtype(self.ctx.vg.FLOAT_DTYPE).itemsize # coordinates and kernels, which are never float16
+        cached = {} # bytes of the kernel geometries, by kernel shape
+
+        def _per_point(arrays: tuple[int, int, int]) -> int:
+            nfloat, nfloat64, nbytes = arrays
+            return nfloat * bc + nfloat64 * 8 + nbytes
+
+        def _kernel(radius) -> int: # number of kernel points, whose geometry is cached from now on
+            shape = tuple(int(n) for n in np.ceil(radius / plan.deltas) * 2 + 1)
+            kpoints = int(np.prod(shape))
+            cached[shape] = kpoints * _per_point(self.KERNEL_GEOMETRY)
+            return kpoints
+
+        base = npoints * (len(sm.Trimmer.get_trimming_dists(self.ctx)) + self._get_writer_bytes_per_point(plan))
+        writing = npoints * _per_point(self.WRITING)
+        if self.ctx.vg.SAVE_GRID_STATS:
+            writing += min(npoints, vg.GridStatsAccumulator.SLAB_POINTS) * _per_point(self.WRITING_STATS)
+
+        phases = {}
+        temps = [0]
+        if cfg.DO_TRIMMING_OCCUPANCY:
+            temps += [_kernel(r) * _per_point(self.KERNEL_SPHERE) for r in sm.Trimmer.get_trimming_dists(self.ctx).values()]
+        if self.do_ps and cfg.DO_TRIMMING_FARAWAY:
+            temps.append(npoints * _per_point(self.TRIM_FARAWAY) + _kernel(cfg.TRIM_FARAWAY_DIST) * _per_point(self.KERNEL_SPHERE))
+        if self.do_ps and cfg.DO_TRIMMING_SPHERE:
+            npoints_chunk = npoints if (plan.chunk_points <= 0) else min(npoints, plan.chunk_points)
+            temps.append(npoints_chunk * _per_point(self.TRIM_SPHERE))
+        if self.do_ps and cfg.DO_TRIMMING_RNDS:
+            temps.append(npoints * (_per_point(self.TRIM_RNDS) + _per_point(self.TRIM_RNDS_QUEUE)))
+        phases["trimming"] = base + (npoints if self.do_ps else 0) + sum(cached.values()) + max(temps)
+        if cfg.SAVE_TRIMMING_MASK:
+            phases["trimming"] = max(phases["trimming"], base + npoints + sum(cached.values()) + writing)
+
+        ### the previous grid is written in the background while a SMIF is computed, synchronous writes come after it
+        writes_in_background = (self.ctx.vg.GRID_WRITER is not None) and not plan.sync_writes
+        gks = cfg.GAUSSIAN_KERNEL_SIGMAS
+        kept = 0
+        keep_hydro = cfg.DO_SMIF_HYDROPHOBIC and cfg.DO_SMIF_HYDROPHILIC and cfg.DO_SMIF_HYDRODIFF
+        for title, enabled, kernel_temps, radii in (
+            ("stacking",    cfg.DO_SMIF_STACKING,    self.KERNEL_BIVARIATE,  (cfg.MU_DIST_STACKING + gks * cfg.SIGMA_DIST_STACKING,)),
+            ("hbacceptors", cfg.DO_SMIF_HBA,         self.KERNEL_BIVARIATE,  (cfg.MU_DIST_HBA + gks * cfg.SIGMA_DIST_HBA,)),
+            ("hbdonors",    cfg.DO_SMIF_HBD,         self.KERNEL_BIVARIATE,  (cfg.MU_DIST_HBD_FREE + gks * cfg.SIGMA_DIST_HBD_FREE,
+                                                                              cfg.MU_DIST_HBD_FIXED + gks * cfg.SIGMA_DIST_HBD_FIXED)),
+            ("hydrophobic", cfg.DO_SMIF_HYDROPHOBIC, self.KERNEL_UNIVARIATE, (cfg.MU_HYDROPHOBIC + gks * cfg.SIGMA_HYDROPHOBIC,)),
+            ("hydrophilic", cfg.DO_SMIF_HYDROPHILIC, self.KERNEL_UNIVARIATE, (cfg.MU_HYDROPHILIC + gks * cfg.SIGMA_HYDROPHILIC,)),
+        ):
+            if not enabled: continue
+            kpoints = [_kernel(r) for r in radii] # the kernels are alive at the same time, but recalculated/stamped one by one
+            kernels = sum(kpoints) * _per_point(self.KERNEL_VALUES) + \
+                max(kpoints) * max(_per_point(kernel_temps), _per_point(self.KERNEL_STAMP))
+            temps = (kernels + writing) if writes_in_background else max(kernels, writing)
+            phases[title] = base + kept + npoints * b + sum(cached.values()) + temps
+            if keep_hydro and title.startswith("hydro"): kept += npoints * b
+
+        kept += sum(cached.values()) # no more kernels from here on
+        do_apbs = cfg.DO_SMIF_APBS and (cfg.PATH_APBS is not None)
+        if do_apbs: # the resampled map stays cached (as FLOAT_DTYPE), the grid is kept for apbslog
+            phases["apbs"] = base + kept + npoints * (bc + b) + writing
+            kept += npoints * (bc + b)
+
+        if keep_hydro:
+            phases["hydrodiff"] = base + kept + npoints * b + writing
+
+        if do_apbs and cfg.DO_SMIF_LOG_APBS: # the copy and a temporary of the transform
+            phases["apbslog"] = base + kept + 2 * npoints * b + writing
+
+        return phases
+
+
     # --------------------------------------------------------------------------
     def _infer_box_attributes(self):
         if self.do_ps:
-            radius, xcog, ycog, zcog = sm.PS_INFO
+            radius, xcog, ycog, zcog = self.ctx.sm.PS_INFO
             self.cog = np.array([xcog, ycog, zcog])
             self.minCoords = self.cog - radius
             self.maxCoords = self.cog + radius
@@ -58,17 +155,17 @@ class MolSystemSmiffer(vg.MolSystem):
 
     # --------------------------------------------------------------------------
     def _get_path_table(self) -> Path:
-        if sm.PATH_TABLE: return sm.PATH_TABLE
+        if self.ctx.sm.PATH_TABLE: return self.ctx.sm.PATH_TABLE
 
         folder_default_tables = Path("_data")
 
-        if sm.CURRENT_MOLTYPE == MolType.PROT:
+        if self.ctx.sm.CURRENT_MOLTYPE == MolType.PROT:
             return vg.resolve_path(folder_default_tables / "prot.chem")
 
-        if sm.CURRENT_MOLTYPE == MolType.RNA:
+        if self.ctx.sm.CURRENT_MOLTYPE == MolType.RNA:
             return vg.resolve_path(folder_default_tables / "rna.chem")
 
-        raise ValueError(f"No default table for the specified molecular type '{sm.CURRENT_MOLTYPE}'. Please provide a path to a custom table.")
+        raise ValueError(f"No default table for the specified molecular type '{self.ctx.sm.CURRENT_MOLTYPE}'. Please provide a path to a custom table.")
 
 
 # //////////////////////////////////////////////////////////////////////////////
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import volgrids as vg
+import volgrids.smiffer as sm
+
+# //////////////////////////////////////////////////////////////////////////////
+class SmifOperations:
+    """In-memory SMIF calculations, for pipelines that consume the grids directly instead of
+    reading the files written by `run/smiffer.py`. For example:
+    ```
+    ctx = sm.AppSmiffer.make_context()          # configs of config.ini (or of a custom file)
+    ctx.sm.CURRENT_MOLTYPE = sm.MolType.PROT    # command line arguments, as the ParamHandler would set them
+    ms = sm.MolSystemSmiffer(Path("x.pdb"), ctx = ctx)
+    grids = sm.SmifOperations.compute_smifs(ms) # {"stacking": Grid, "hbacceptors": Grid, ...}
+    ```
+    The grids are the same ones saved by AppSmiffer (with the same titles), as enabled by the
+    DO_SMIF_* and SAVE_TRIMMING_MASK configs of the MolSystem's context."""
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def compute_smifs(ms: "sm.MolSystemSmiffer", trimmer: "sm.Trimmer" = None, folder_out: Path = None) -> dict[str, "vg.Grid"]:
+        """SMIF grids of the current structure (or frame) of `ms`, by title. Nothing is written
+        unless `folder_out` is given, in which case each grid is saved as soon as it's ready (by
+        the background writer of the running App, if any; the grids must then not be modified until
+        it's flushed). Saving can also be deferred with `save_smifs`."""
+        grids = {}
+        with ms.ctx.activate(): # the grids and writers also read the context (e.g. FLOAT_DTYPE, OUTPUT_FORMAT)
+            if trimmer is None: trimmer = sm.Trimmer.init_infer_dists(ms)
+            for title, grid in SmifOperations.iter_smifs(ms, trimmer):
+                if folder_out is not None: grid.save_data(folder_out, title)
+                grids[title] = grid
+        return grids
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def iter_smifs(ms: "sm.MolSystemSmiffer", trimmer: "sm.Trimmer"):
+        """Yield `(title, grid)` for every enabled grid, as each is ready. Only the grids needed for
+        the later ones (hydrophobic/hydrophilic for hydrodiff) are kept by the iterator.
+        The context of `ms` must be the current one (as in `compute_smifs` or while an App runs)."""
+        cfg = ms.ctx.sm
+        trimmer.trim()
+
+        if cfg.SAVE_TRIMMING_MASK:
+            yield "trimming", vg.Grid.reverse(trimmer.get_mask("mid")) # the points that are NOT trimmed
+
+        if cfg.DO_SMIF_STACKING:
+            yield "stacking", _calc_smif(ms, trimmer, sm.SmifStacking, "mid", "stacking")
+
+        if cfg.DO_SMIF_HBA:
+            yield "hbacceptors", _calc_smif(ms, trimmer, sm.SmifHBAccepts, "mid", "hbacceptors")
+
+        if cfg.DO_SMIF_HBD:
+            yield "hbdonors", _calc_smif(ms, trimmer, sm.SmifHBDonors, "mid", "hbdonors")
+
+        if cfg.DO_SMIF_HYDROPHOBIC:
+            grid_hphob = _calc_smif(ms, trimmer, sm.SmifHydrophobic, "mid", "hydrophobic")
+            yield "hydrophobic", grid_hphob
+
+        if cfg.DO_SMIF_HYDROPHILIC:
+            grid_hphil = _calc_smif(ms, trimmer, sm.SmifHydrophilic, "small", "hydrophilic")
+            yield "hydrophilic", grid_hphil
+
+        do_apbs = cfg.DO_SMIF_APBS and (cfg.PATH_APBS is not None)
+        if do_apbs:
+            grid_apbs: sm.SmifAPBS = _calc_smif(ms, trimmer, sm.SmifAPBS, "large", "apbs")
+            yield "apbs", grid_apbs
+
+        if cfg.DO_SMIF_HYDROPHOBIC and cfg.DO_SMIF_HYDROPHILIC and cfg.DO_SMIF_HYDRODIFF:
+            with vg.Profiler.span("smif.hydrodiff"): grid_hdiff = grid_hphob - grid_hphil
+            yield "hydrodiff", grid_hdiff
+
+        if do_apbs and cfg.DO_SMIF_LOG_APBS:
+            ### a new grid: the "apbs" one may be still in use by the consumer (or queued for writing)
+            with vg.Profiler.span("smif.apbslog"):
+                grid_apbslog = sm.SmifAPBS(ms, init_grid = False)
+                grid_apbslog.grid = grid_apbs.grid.copy()
+                grid_apbslog.apply_logabs_transform()
+            yield "apbslog", grid_apbslog
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def save_smifs(grids: dict[str, "vg.Grid"], folder_out: Path) -> None:
+        """Write the grids returned by `compute_smifs`, as AppSmiffer would have."""
+        with next(iter(grids.values())).ms.ctx.activate():
+            for title, grid in grids.items():
+                grid.save_data(folder_out, title)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _calc_smif(ms: "sm.MolSystemSmiffer", trimmer: "sm.Trimmer", cls_grid: type, key_trimming: str, title: str) -> "vg.Grid":
+    with vg.Profiler.span(f"smif.{title}"):
+        with vg.Profiler.span("init"):     grid: vg.Grid = cls_grid(ms)
+        with vg.Profiler.span("stamping"): grid.populate_grid()
+        with vg.Profiler.span("masking"):  trimmer.mask_grid(grid, key_trimming)
+    return grid
+
+
+# ------------------------------------------------------------------------------
@@ -9,6 +9,7 @@ class Trimmer:
 
     def __init__(self, ms: "sm.MolSystemSmiffer", **distances):
         self.ms: "sm.MolSystemSmiffer" = ms
+        self.ctx: vg.RunContext = ms.ctx
 
         self.distances = distances
         self.common_mask: vg.Grid = None
@@ -18,33 +19,42 @@ class Trimmer:
     # --------------------------------------------------------------------------
     @classmethod
     def init_infer_dists(cls, ms: "sm.MolSystemSmiffer") -> "sm.Trimmer":
+        return cls(ms, **cls.get_trimming_dists(ms.ctx))
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def get_trimming_dists(ctx: "vg.RunContext") -> dict[str, float]:
+        """Distances of the specific masks needed by the SMIFs enabled in `ctx`."""
+        cfg = ctx.sm
         trimming_dists = {}
-        if sm.DO_SMIF_HYDROPHILIC:
-            trimming_dists["small"] = sm.TRIMMING_DIST_SMALL
+        if cfg.DO_SMIF_HYDROPHILIC:
+            trimming_dists["small"] = cfg.TRIMMING_DIST_SMALL
 
         if (
-            sm.DO_SMIF_STACKING or
-            sm.DO_SMIF_HBA or sm.DO_SMIF_HBD or
-            sm.DO_SMIF_HYDROPHOBIC or sm.SAVE_TRIMMING_MASK
+            cfg.DO_SMIF_STACKING or
+            cfg.DO_SMIF_HBA or cfg.DO_SMIF_HBD or
+            cfg.DO_SMIF_HYDROPHOBIC or cfg.SAVE_TRIMMING_MASK
         ):
-            trimming_dists["mid"] = sm.TRIMMING_DIST_MID
+            trimming_dists["mid"] = cfg.TRIMMING_DIST_MID
 
-        if sm.DO_SMIF_APBS:
-            trimming_dists["large"] = sm.TRIMMING_DIST_LARGE
+        if cfg.DO_SMIF_APBS:
+            trimming_dists["large"] = cfg.TRIMMING_DIST_LARGE
 
-        return cls(ms, **trimming_dists)
+        return trimming_dists
 
 
     # --------------------------------------------------------------------------
     def trim(self):
-        if sm.DO_TRIMMING_OCCUPANCY:
-            self._trim_occupancies()
+        with vg.Profiler.span("trimming"):
+            if self.ctx.sm.DO_TRIMMING_OCCUPANCY:
+                with vg.Profiler.span("occupancy"): self._trim_occupancies()
 
-        if self._should_use_common_mask():
-            self._init_common_mask()
-            self._run_common_mask_operations()
-            self._apply_common_mask_to_specific_masks()
-            self._discard_common_mask()
+            if self._should_use_common_mask():
+                self._init_common_mask()
+                self._run_common_mask_operations()
+                self._apply_common_mask_to_specific_masks()
+                self._discard_common_mask()
 
 
     # --------------------------------------------------------------------------
@@ -69,14 +79,14 @@ class Trimmer:
 
     # --------------------------------------------------------------------------
     def _run_common_mask_operations(self):
-        if sm.DO_TRIMMING_FARAWAY:
-            self._trim_faraway()
+        if self.ctx.sm.DO_TRIMMING_FARAWAY:
+            with vg.Profiler.span("faraway"): self._trim_faraway()
 
-        if sm.DO_TRIMMING_SPHERE:
-            self._trim_sphere()
+        if self.ctx.sm.DO_TRIMMING_SPHERE:
+            with vg.Profiler.span("sphere"): self._trim_sphere()
 
-        if sm.DO_TRIMMING_RNDS:
-            self._trim_rnds()
+        if self.ctx.sm.DO_TRIMMING_RNDS:
+            with vg.Profiler.span("rnds"): self._trim_rnds()
 
 
     # --------------------------------------------------------------------------
@@ -104,10 +114,17 @@ class Trimmer:
 
     # --------------------------------------------------------------------------
     def _trim_sphere(self):
-        coords = vg.Math.get_coords_array(self.ms.resolution, self.ms.deltas, self.ms.minCoords)
-        shifted_coords = coords - self.ms.cog
-        dist_from_cog = vg.Math.get_norm(shifted_coords)
-        self.common_mask.grid[dist_from_cog > self.ms.radius] = True
+        """The coordinates are evaluated by slabs of x planes if the memory plan is chunked."""
+        xres, yres, zres = self.ms.resolution
+        chunk_points = self.ms.memory_plan.chunk_points
+        nplanes = xres if (chunk_points <= 0) else max(1, chunk_points // (yres * zres))
+
+        for x0 in range(0, xres, nplanes):
+            x_slice = slice(x0, min(x0 + nplanes, xres))
+            coords = vg.Math.get_coords_array(self.ms.resolution, self.ms.deltas, self.ms.minCoords, x_slice)
+            shifted_coords = coords - self.ms.cog
+            dist_from_cog = vg.Math.get_norm(shifted_coords)
+            self.common_mask.grid[x_slice][dist_from_cog > self.ms.radius] = True
 
 
     # --------------------------------------------------------------------------
@@ -119,10 +136,11 @@ class Trimmer:
 
         xres, yres, zres = self.ms.resolution
         xcog, ycog, zcog = np.floor(self.ms.resolution / 2).astype(int)
+        cube_radius, max_dist = self.ctx.sm.COG_CUBE_RADIUS, self.ctx.sm.MAX_RNDS_DIST
         cog_cube = set((x,y,z)
-            for x in range(xcog - sm.COG_CUBE_RADIUS, xcog + sm.COG_CUBE_RADIUS + 1)
-            for y in range(ycog - sm.COG_CUBE_RADIUS, ycog + sm.COG_CUBE_RADIUS + 1)
-            for z in range(zcog - sm.COG_CUBE_RADIUS, zcog + sm.COG_CUBE_RADIUS + 1)
+            for x in range(xcog - cube_radius, xcog + cube_radius + 1)
+            for y in range(ycog - cube_radius, ycog + cube_radius + 1)
+            for z in range(zcog - cube_radius, zcog + cube_radius + 1)
         )
         queue = cog_cube.copy()
 
@@ -146,7 +164,7 @@ class Trimmer:
 
                 neigh = ni,nj,nk
                 search_dist[neigh] = min(search_dist[node] + 1, search_dist[neigh])
-                if search_dist[neigh] > sm.MAX_RNDS_DIST: continue
+                if search_dist[neigh] > max_dist: continue
                 if visited[neigh]: continue
                 if self.common_mask.grid[neigh]: continue
 
@@ -158,9 +176,9 @@ class Trimmer:
     # --------------------------------------------------------------------------
     def _trim_faraway(self):
         arr = np.zeros_like(self.common_mask.grid, dtype = bool)
-        kernel = vg.KernelSphere(sm.TRIM_FARAWAY_DIST, self.ms.deltas, bool)
+        kernel = vg.KernelSphere(self.ctx.sm.TRIM_FARAWAY_DIST, self.ms.deltas, bool)
         kernel.link_to_grid(arr, self.ms.minCoords)
-        for a in self.ms.get_relevant_atoms_broad(sm.TRIM_FARAWAY_DIST):
+        for a in self.ms.get_relevant_atoms_broad(self.ctx.sm.TRIM_FARAWAY_DIST):
             kernel.stamp(a.position)
 
         self.common_mask.grid[~arr] = True
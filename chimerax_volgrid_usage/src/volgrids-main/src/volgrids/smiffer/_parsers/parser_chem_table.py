@@ -1,3 +1,4 @@
+from pathlib import Path
 from collections import defaultdict
 
 import volgrids as vg
@@ -37,6 +38,8 @@ def _parse_atoms_triplet(triplet: str) -> tuple[str, str, str, str, bool]:
 
 # //////////////////////////////////////////////////////////////////////////////
 class ParserChemTable:
+    _CACHE: dict[tuple, "ParserChemTable"] = {} # tables already parsed in this process, by (path, mtime)
+
     def __init__(self, path_table):
         self.selection_query: str = ''
         self._parser_ini = vg.ParserIni(path_table)
@@ -48,6 +51,18 @@ class ParserChemTable:
         self._parse_table()
 
 
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_cached(cls, path_table) -> "ParserChemTable":
+        """Parsed table, reused across the structures processed by this process (e.g. in batch mode).
+        The tables are never modified after parsing, so they can be shared."""
+        path_table = Path(path_table).resolve()
+        key = (path_table, path_table.stat().st_mtime_ns)
+        if key not in cls._CACHE:
+            cls._CACHE[key] = cls(path_table)
+        return cls._CACHE[key]
+
+
     # --------------------------------------------------------------------------
     def get_residue_hphob(self, atom):
         return self._residues_hphob.get(atom.resname)
@@ -26,7 +26,7 @@ class SmifHBonds(sm.Smif, ABC):
     def populate_grid(self):
         for pos_interactor, vec_direction in self.iter_particles():
             self.kernel.recalculate_kernel(vec_direction, isStacking = False)
-            self.kernel.stamp(pos_interactor, multiplication_factor = sm.ENERGY_SCALE)
+            self.kernel.stamp(pos_interactor, multiplication_factor = self.ctx.sm.ENERGY_SCALE)
 
 
     # --------------------------------------------------------------------------
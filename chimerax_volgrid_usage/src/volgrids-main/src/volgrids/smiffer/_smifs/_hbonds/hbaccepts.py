@@ -10,8 +10,8 @@ class SmifHBAccepts(SmifHBonds):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.kernel = vg.KernelGaussianBivariateAngleDist(
-            radius = sm.MU_DIST_HBA + sm.GAUSSIAN_KERNEL_SIGMAS * sm.SIGMA_DIST_HBA,
-            deltas = self.ms.deltas, dtype = vg.FLOAT_DTYPE, params = sm.PARAMS_HBA
+            radius = self.ctx.sm.MU_DIST_HBA + self.ctx.sm.GAUSSIAN_KERNEL_SIGMAS * self.ctx.sm.SIGMA_DIST_HBA,
+            deltas = self.ms.deltas, dtype = self.ctx.vg.FLOAT_DTYPE, params = self.ctx.sm.PARAMS_HBA
         )
         self.kernel.link_to_grid(self.grid, self.ms.minCoords)
         self.hbond_getter = sm.ParserChemTable.get_names_hba
@@ -23,7 +23,7 @@ class SmifHBAccepts(SmifHBonds):
 
         ############################### TAIL POSITION
         ### special cases for RNA
-        if sm.CURRENT_MOLTYPE == sm.MolType.RNA:
+        if self.ctx.sm.CURRENT_MOLTYPE == sm.MolType.RNA:
             if triplet.interactor == "O3'": # tail points are in different residues
                 triplet.set_pos_tail_custom(
                     atoms = self.all_atoms,
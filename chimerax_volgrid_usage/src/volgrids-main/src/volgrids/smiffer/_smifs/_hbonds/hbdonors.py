@@ -1,9 +1,10 @@
 from abc import ABC
-import MDAnalysis as mda
 
 import volgrids as vg
 import volgrids.smiffer as sm
 
+mda = vg.lazy_import("MDAnalysis")
+
 from .hb import SmifHBonds
 from .triplet import Triplet
 
@@ -22,29 +23,30 @@ class SmifHBDonors(SmifHBonds, ABC):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.hbond_getter = sm.ParserChemTable.get_names_hbd
+        self.use_hydrogens: bool = self.ctx.sm.USE_STRUCTURE_HYDROGENS # falls back to False if the structure has no hydrogens
         self._kernel_hbd_free = vg.KernelGaussianBivariateAngleDist(
-            radius = sm.MU_DIST_HBD_FREE + sm.GAUSSIAN_KERNEL_SIGMAS * sm.SIGMA_DIST_HBD_FREE,
-            deltas = self.ms.deltas, dtype = vg.FLOAT_DTYPE, params = sm.PARAMS_HBD_FREE
+            radius = self.ctx.sm.MU_DIST_HBD_FREE + self.ctx.sm.GAUSSIAN_KERNEL_SIGMAS * self.ctx.sm.SIGMA_DIST_HBD_FREE,
+            deltas = self.ms.deltas, dtype = self.ctx.vg.FLOAT_DTYPE, params = self.ctx.sm.PARAMS_HBD_FREE
         )
         self._kernel_hbd_free.link_to_grid(self.grid, self.ms.minCoords)
 
         self._kernel_hbd_fixed = vg.KernelGaussianBivariateAngleDist(
-            radius = sm.MU_DIST_HBD_FIXED + sm.GAUSSIAN_KERNEL_SIGMAS * sm.SIGMA_DIST_HBD_FIXED,
-            deltas = self.ms.deltas, dtype = vg.FLOAT_DTYPE, params = sm.PARAMS_HBD_FIXED
+            radius = self.ctx.sm.MU_DIST_HBD_FIXED + self.ctx.sm.GAUSSIAN_KERNEL_SIGMAS * self.ctx.sm.SIGMA_DIST_HBD_FIXED,
+            deltas = self.ms.deltas, dtype = self.ctx.vg.FLOAT_DTYPE, params = self.ctx.sm.PARAMS_HBD_FIXED
         )
         self._kernel_hbd_fixed.link_to_grid(self.grid, self.ms.minCoords)
 
 
     # --------------------------------------------------------------------------
     def find_tail_head_positions(self, triplet: Triplet) -> None:
-        if triplet.pos_head is not None: # head position is already set for succesful sm.USE_STRUCTURE_HYDROGENS iterations
+        if triplet.pos_head is not None: # head position is already set for succesful USE_STRUCTURE_HYDROGENS iterations
             return
 
         triplet.set_pos_head(self.res_atoms)
 
         ############################### TAIL POSITION
         ### special cases for protein
-        if sm.CURRENT_MOLTYPE == sm.MolType.PROT:
+        if self.ctx.sm.CURRENT_MOLTYPE == sm.MolType.PROT:
             if triplet.resname == "PRO": # donor only if there is no previous residue
                 if _has_prev_res(self.all_atoms, triplet): return
 
@@ -68,7 +70,7 @@ class SmifHBDonors(SmifHBonds, ABC):
 
 
         ### special cases for RNA
-        if sm.CURRENT_MOLTYPE == sm.MolType.RNA:
+        if self.ctx.sm.CURRENT_MOLTYPE == sm.MolType.RNA:
             if triplet.interactor == "O3'": # donor only if there is no next residue
                 if _has_next_res(self.all_atoms, triplet): return
 
@@ -80,10 +82,10 @@ class SmifHBDonors(SmifHBonds, ABC):
 
     # --------------------------------------------------------------------------
     def _iter_triplets(self):
-        if sm.USE_STRUCTURE_HYDROGENS:
+        if self.use_hydrogens:
             hydrogens = self.ms.system.select_atoms("name H*")
             if len(hydrogens) == 0:
-                sm.USE_STRUCTURE_HYDROGENS = False
+                self.use_hydrogens = False
             else:
                 u = mda.Merge(self.all_atoms, hydrogens)
                 u.guess_TopologyAttrs(to_guess = ["bonds"]) # bond guess is performed in a temporary universe that excludes any unwanted atoms (like ions with undefined vdw radii)
@@ -92,7 +94,7 @@ class SmifHBDonors(SmifHBonds, ABC):
         for triplet in super()._iter_triplets():
             if triplet.interactor in self.processed_interactors: continue
 
-            if sm.USE_STRUCTURE_HYDROGENS:
+            if self.use_hydrogens:
                 for hydrogen in triplet.get_interactor_bonded_hydrogens(self.res_atoms):
                     triplet.pos_tail = triplet.pos_interactor
                     triplet.pos_head = hydrogen.position
@@ -100,7 +102,7 @@ class SmifHBDonors(SmifHBonds, ABC):
                     self.processed_interactors.add(triplet.interactor)
                     yield triplet
 
-            if triplet.pos_head is None: # sm.USE_STRUCTURE_HYDROGENS falls back to "no-hydrogen" model if no hydrogens found
+            if triplet.pos_head is None: # USE_STRUCTURE_HYDROGENS falls back to "no-hydrogen" model if no hydrogens found
                 self.kernel = self._get_relevant_kernel(triplet)
                 yield triplet
 
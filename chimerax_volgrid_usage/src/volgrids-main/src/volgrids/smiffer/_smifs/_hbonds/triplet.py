@@ -1,11 +1,10 @@
 import numpy as np
-import MDAnalysis as mda
-from MDAnalysis.core.groups import Residue
-
 import volgrids as vg
 
+mda = vg.lazy_import("MDAnalysis")
+
 # ------------------------------------------------------------------------------
-def _safe_return_coords(atoms: mda.AtomGroup, sel_string: str):
+def _safe_return_coords(atoms: "mda.AtomGroup", sel_string: str):
     sel_atoms = atoms.select_atoms(sel_string)
     if len(sel_atoms) == 0: return None
     return sel_atoms.center_of_geometry()
@@ -14,7 +13,7 @@ def _safe_return_coords(atoms: mda.AtomGroup, sel_string: str):
 # //////////////////////////////////////////////////////////////////////////////
 class Triplet:
     def __init__(self,
-        res: Residue, interactor: str,
+        res: "mda.core.groups.Residue", interactor: str,
         tail_0: str, tail_1: str, head: str, hbond_fixed: bool
     ):
         self._t0 = tail_0
@@ -33,21 +32,21 @@ class Triplet:
         self.str_next_res = f"segid {res.segid} and resid {res.resid + 1}"
 
     # --------------------------------------------------------------------------
-    def set_pos_tail(self, atoms: mda.AtomGroup) -> np.ndarray | None:
+    def set_pos_tail(self, atoms: "mda.AtomGroup") -> np.ndarray | None:
         self.pos_tail = _safe_return_coords(
             atoms, f"name {self._t0} {self._t1}"
         )
 
 
     # --------------------------------------------------------------------------
-    def set_pos_head(self, atoms: mda.AtomGroup) -> np.ndarray | None:
+    def set_pos_head(self, atoms: "mda.AtomGroup") -> np.ndarray | None:
         self.pos_head = _safe_return_coords(
             atoms, f"name {self._head}"
         )
 
 
     # --------------------------------------------------------------------------
-    def set_pos_interactor(self, atoms: mda.AtomGroup) -> np.ndarray | None:
+    def set_pos_interactor(self, atoms: "mda.AtomGroup") -> np.ndarray | None:
         self.pos_interactor = _safe_return_coords(
             atoms, f"name {self.interactor}"
         )
@@ -55,7 +54,7 @@ class Triplet:
 
     # --------------------------------------------------------------------------
     def set_pos_tail_custom(self,
-        atoms: mda.AtomGroup, query_t0: str, query_t1: str
+        atoms: "mda.AtomGroup", query_t0: str, query_t1: str
     ) -> np.ndarray | None:
         self.pos_tail = _safe_return_coords(
             atoms,
@@ -65,7 +64,7 @@ class Triplet:
 
 
     # ------------------------------------------------------------------------------
-    def get_interactor_bonded_hydrogens(self, atoms: mda.AtomGroup) -> tuple:
+    def get_interactor_bonded_hydrogens(self, atoms: "mda.AtomGroup") -> tuple:
         sel_atoms = atoms.select_atoms(f"name {self.interactor}")
         if len(sel_atoms) == 0:
             return []
@@ -6,9 +6,9 @@ from .hydro import SmifHydro
 # //////////////////////////////////////////////////////////////////////////////
 class SmifHydrophilic(SmifHydro):
     def populate_grid(self):
-        radius = sm.MU_HYDROPHILIC + sm.GAUSSIAN_KERNEL_SIGMAS * sm.SIGMA_HYDROPHILIC
+        radius = self.ctx.sm.MU_HYDROPHILIC + self.ctx.sm.GAUSSIAN_KERNEL_SIGMAS * self.ctx.sm.SIGMA_HYDROPHILIC
         kernel = vg.KernelGaussianUnivariateDist(
-            radius, self.ms.deltas, vg.FLOAT_DTYPE, sm.PARAMS_HPHIL
+            radius, self.ms.deltas, self.ctx.vg.FLOAT_DTYPE, self.ctx.sm.PARAMS_HPHIL
         )
         kernel.link_to_grid(self.grid, self.ms.minCoords)
 
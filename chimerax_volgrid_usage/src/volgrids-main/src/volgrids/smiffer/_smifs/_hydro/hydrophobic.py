@@ -6,9 +6,9 @@ from .hydro import SmifHydro
 # //////////////////////////////////////////////////////////////////////////////
 class SmifHydrophobic(SmifHydro):
     def populate_grid(self):
-        radius = sm.MU_HYDROPHOBIC + sm.GAUSSIAN_KERNEL_SIGMAS * sm.SIGMA_HYDROPHOBIC
+        radius = self.ctx.sm.MU_HYDROPHOBIC + self.ctx.sm.GAUSSIAN_KERNEL_SIGMAS * self.ctx.sm.SIGMA_HYDROPHOBIC
         kernel = vg.KernelGaussianUnivariateDist(
-            radius, self.ms.deltas, vg.FLOAT_DTYPE, sm.PARAMS_HPHOB
+            radius, self.ms.deltas, self.ctx.vg.FLOAT_DTYPE, self.ctx.sm.PARAMS_HPHOB
         )
         kernel.link_to_grid(self.grid, self.ms.minCoords)
 
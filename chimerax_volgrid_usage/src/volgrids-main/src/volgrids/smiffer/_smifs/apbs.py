@@ -1,19 +1,71 @@
+import os, hashlib, threading
 import numpy as np
+from pathlib import Path
 
 import volgrids as vg
 import volgrids.smiffer as sm
 
 # //////////////////////////////////////////////////////////////////////////////
 class SmifAPBS(sm.Smif):
+    _CACHE: dict[tuple, np.ndarray] = {} # resampled APBS data of the last (source file, box) used in this process
+
     # --------------------------------------------------------------------------
     def populate_grid(self):
-        apbs = vg.GridIO.read_auto(sm.PATH_APBS)
+        """Resample the APBS map of PATH_APBS into the box of this grid. The result is
+        kept in memory (e.g. for the next frames of a trajectory, whose box is fixed)
+        and, if APBS_CACHE_FOLDER is set, on disk for the next runs with the same map and box."""
+        path_apbs = Path(self.ctx.sm.PATH_APBS)
+        stat = path_apbs.stat()
+        key = (str(path_apbs.resolve()), stat.st_mtime_ns, stat.st_size, *self._get_box_key())
+
+        resampled = SmifAPBS._CACHE.get(key)
+        if resampled is None:
+            resampled = self._load_resampled(path_apbs)
+            SmifAPBS._CACHE.clear()
+            SmifAPBS._CACHE[key] = resampled
+        ### copy, the grid is modified afterwards (trimming, logabs)
+        self.grid = np.array(resampled, dtype = self.dtype, order = vg.Grid.get_numpy_order())
+
+
+    # --------------------------------------------------------------------------
+    def _load_resampled(self, path_apbs: Path) -> np.ndarray:
+        folder_cache = _get_cache_folder(self.ctx.sm.APBS_CACHE_FOLDER)
+        if folder_cache is None: return self._resample(path_apbs)
+
+        digest = hashlib.sha256(f"{_hash_file(path_apbs)} {self._get_box_key()}".encode()).hexdigest()[:32]
+        path_cache = folder_cache / f"{path_apbs.stem}.{digest}.npy"
+        try:
+            cached = vg.GridIO.read_npy(path_cache).grid
+            if tuple(cached.shape) == (self.xres, self.yres, self.zres): return cached
+        except (OSError, ValueError): # not cached yet (or incomplete)
+            pass
+
+        arr = self._resample(path_apbs)
+        folder_cache.mkdir(parents = True, exist_ok = True)
+        _write_npy_atomic(path_cache, self, arr)
+        return arr
+
+
+    # --------------------------------------------------------------------------
+    def _resample(self, path_apbs: Path) -> np.ndarray:
+        apbs = vg.GridIO.read_auto(path_apbs)
         apbs.reshape(
             new_min = (self.xmin, self.ymin, self.zmin),
             new_max = (self.xmax, self.ymax, self.zmax),
             new_res = (self.xres, self.yres, self.zres)
         )
-        self.grid = apbs.grid
+        return apbs.grid
+
+
+    # --------------------------------------------------------------------------
+    def _get_box_key(self) -> tuple:
+        return (
+            *(round(float(v), 6) for v in self.get_min_coords()),
+            *(round(float(v), 6) for v in self.get_max_coords()),
+            *(round(float(v), 6) for v in self.get_deltas()),
+            *(int(n) for n in self.get_resolution()),
+            np.dtype(self.ctx.vg.FLOAT_DTYPE).name,
+        )
 
 
     # --------------------------------------------------------------------------
@@ -26,14 +78,14 @@ class SmifAPBS(sm.Smif):
         logneg = np.log10(-self.grid[self.grid < 0])
 
         ##### APPLY CUTOFFS
-        logpos[logpos < sm.APBS_MIN_CUTOFF] = sm.APBS_MIN_CUTOFF
-        logneg[logneg < sm.APBS_MIN_CUTOFF] = sm.APBS_MIN_CUTOFF
-        logpos[logpos > sm.APBS_MAX_CUTOFF] = sm.APBS_MAX_CUTOFF
-        logneg[logneg > sm.APBS_MAX_CUTOFF] = sm.APBS_MAX_CUTOFF
+        logpos[logpos < self.ctx.sm.APBS_MIN_CUTOFF] = self.ctx.sm.APBS_MIN_CUTOFF
+        logneg[logneg < self.ctx.sm.APBS_MIN_CUTOFF] = self.ctx.sm.APBS_MIN_CUTOFF
+        logpos[logpos > self.ctx.sm.APBS_MAX_CUTOFF] = self.ctx.sm.APBS_MAX_CUTOFF
+        logneg[logneg > self.ctx.sm.APBS_MAX_CUTOFF] = self.ctx.sm.APBS_MAX_CUTOFF
 
         ##### SHIFT VALUES TO 0
-        logpos -= sm.APBS_MIN_CUTOFF
-        logneg -= sm.APBS_MIN_CUTOFF
+        logpos -= self.ctx.sm.APBS_MIN_CUTOFF
+        logneg -= self.ctx.sm.APBS_MIN_CUTOFF
 
         ##### REVERSE SIGN OF LOG(ABS(GRID_NEG)) AND DOUBLE BOTH
         logpos *=  2 # this way the range of points varies between
@@ -45,3 +97,33 @@ class SmifAPBS(sm.Smif):
 
 
 # //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _get_cache_folder(folder: str) -> Path | None:
+    folder = folder.strip()
+    if folder.lower() in ("", "none"): return None
+    return Path(folder).expanduser()
+
+
+# ------------------------------------------------------------------------------
+def _hash_file(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------------------------
+def _write_npy_atomic(path_npy: Path, box: "vg.Grid", arr: np.ndarray) -> None:
+    """Write through temporary files, so that concurrent runs never read a partial
+    cache entry (the JSON header, which is read first, is moved into place last)."""
+    grid = vg.Grid(box.ms, init_grid = False)
+    grid.grid = arr
+    path_tmp = path_npy.with_name(f"{path_npy.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+    vg.GridIO.write_npy(path_tmp, grid)
+    os.replace(path_tmp, path_npy)
+    os.replace(f"{path_tmp}.json", f"{path_npy}.json")
+
+
+# ------------------------------------------------------------------------------
@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
 
 import volgrids as vg
+import volgrids.smiffer as sm
 
 # //////////////////////////////////////////////////////////////////////////////
 class Smif(vg.Grid, ABC):
+    def __init__(self, ms: "sm.MolSystemSmiffer", *args, **kwargs):
+        kwargs.setdefault("dtype", ms.memory_plan.dtype) # float16 if the memory plan requires it
+        super().__init__(ms, *args, **kwargs)
+        self.ctx: vg.RunContext = ms.ctx # configuration of the run, as the MolSystem's
+
+
     # --------------------------------------------------------------------------
     @abstractmethod
     def populate_grid(self):
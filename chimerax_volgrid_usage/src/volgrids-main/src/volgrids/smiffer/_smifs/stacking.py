@@ -8,8 +8,8 @@ import volgrids.smiffer as sm
 class SmifStacking(sm.Smif):
     def populate_grid(self):
         kernel = vg.KernelGaussianBivariateAngleDist(
-            radius = sm.MU_DIST_STACKING + sm.GAUSSIAN_KERNEL_SIGMAS * sm.SIGMA_DIST_STACKING,
-            deltas = self.ms.deltas, dtype = vg.FLOAT_DTYPE, params = sm.PARAMS_STACK
+            radius = self.ctx.sm.MU_DIST_STACKING + self.ctx.sm.GAUSSIAN_KERNEL_SIGMAS * self.ctx.sm.SIGMA_DIST_STACKING,
+            deltas = self.ms.deltas, dtype = self.ctx.vg.FLOAT_DTYPE, params = self.ctx.sm.PARAMS_STACK
         )
 
         kernel.link_to_grid(self.grid, self.ms.minCoords)
@@ -21,7 +21,7 @@ class SmifStacking(sm.Smif):
             normal = vg.Math.normalize(np.cross(u, v))
 
             kernel.recalculate_kernel(normal, isStacking = True)
-            kernel.stamp(cog, multiplication_factor = sm.ENERGY_SCALE)
+            kernel.stamp(cog, multiplication_factor = self.ctx.sm.ENERGY_SCALE)
 
 
     # --------------------------------------------------------------------------
@@ -1,4 +1,5 @@
 import numpy as np
+from pathlib import Path
 
 import volgrids as vg
 import volgrids.smiffer as sm
@@ -14,9 +15,50 @@ class AppSmiffer(vg.App):
     # --------------------------------------------------------------------------
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._init_globals()
+        with self.ctx.activate():
+            self._init_globals()
 
-        self.ms: sm.MolSystemSmiffer = self._CLASS_MOL_SYSTEM(sm.PATH_STRUCTURE, sm.PATH_TRAJECTORY)
+            self.is_batch = sm.BATCH_JOBS is not None
+            if not self.is_batch: self._init_structure()
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_job(cls, job: "sm.SmifferJob") -> "AppSmiffer":
+        """App for one job of a batch. Its context starts from the current one (the batch's), where
+        the configs are already loaded: neither the command line nor the config files are parsed again."""
+        obj = cls.__new__(cls)
+        obj.ctx = vg.RunContext.from_current()
+        with obj.ctx.activate():
+            job.assign_globals()
+            obj._init_globals()
+            obj.is_batch = False
+            obj._init_structure()
+        return obj
+
+
+    # --------------------------------------------------------------------------
+    @classmethod
+    def make_context(cls, path_config: Path = None) -> "vg.RunContext":
+        ctx = super().make_context(path_config)
+        with ctx.activate():
+            cls._init_globals()
+        return ctx
+
+
+    # --------------------------------------------------------------------------
+    def run(self):
+        """The time of a structure is printed once its grids are written: after `vg.App.run`
+        closes the writer, or flushes the one shared by the jobs of a batch."""
+        super().run()
+        if self.is_batch: return
+        if self.ctx.vg.GRID_WRITER is not None: self.ctx.vg.GRID_WRITER.flush()
+        self.timer.end()
+
+
+    # --------------------------------------------------------------------------
+    def _init_structure(self):
+        self.ms: sm.MolSystemSmiffer = self._CLASS_MOL_SYSTEM(sm.PATH_STRUCTURE, sm.PATH_TRAJECTORY, ctx = self.ctx)
         self.trimmer: sm.Trimmer = self._CLASS_TRIMMER.init_infer_dists(self.ms)
         self.timer = vg.Timer(
             f">>> Now processing {sm.CURRENT_MOLTYPE.name:>4} '{self.ms.molname}'"+\
@@ -25,9 +67,10 @@ class AppSmiffer(vg.App):
 
 
     # --------------------------------------------------------------------------
-    def run(self):
-        if sm.PATH_APBS is None:
-            sm.DO_SMIF_APBS = False
+    def _run(self):
+        if self.is_batch:
+            self._run_batch()
+            return
 
         self.timer.start()
 
@@ -40,13 +83,39 @@ class AppSmiffer(vg.App):
                 self.ms.frame += 1
                 timer_frame = vg.Timer(f"...>>> Frame {self.ms.frame}/{len(self.ms.system.trajectory)}")
                 timer_frame.start()
-                self._process_grids()
+                with vg.Profiler.span("frame", frame = self.ms.frame):
+                    self._process_grids()
                 timer_frame.end()
 
         else: # SINGLE PDB MODE
             self._process_grids()
 
-        self.timer.end()
+
+    # --------------------------------------------------------------------------
+    def _run_batch(self):
+        ### largest jobs first, so that no worker is left alone with a big one at the end
+        jobs = sorted(sm.BATCH_JOBS, key = lambda job: job.cost, reverse = True)
+        n = len(jobs)
+        print(f">>> Processing {n} structures in batch mode")
+        timer = vg.Timer(); timer.start()
+
+        ### every job starts from the same configs, even if a previous one modified them in this process
+        configs = vg.get_configs(vg, sm)
+        ### and gets its share of the memory budget
+        num_workers = sm.NUM_WORKERS if (sm.NUM_WORKERS > 0) else vg.get_num_cpus()
+        nshares = min(num_workers, n)
+        failed = []
+        for i, (idx, _, error) in enumerate(vg.run_parallel(
+            _run_job, [(type(self), job, configs, nshares) for job in jobs], sm.NUM_WORKERS, config_modules = (vg, sm)
+        ), 1):
+            if error is not None: failed.append(jobs[idx])
+            status = "ok" if (error is None) else f"FAILED: {type(error).__name__}: {error}"
+            print(f"...>>> [{i}/{n}] {jobs[idx].name}: {status}", flush = True)
+
+        print(f">>> Processed {n - len(failed)}/{n} structures, {len(failed)} failed", end = ' ')
+        timer.end()
+        for job in failed:
+            print(f"...>>> Failed: {job.path_structure}")
 
 
     # --------------------------------------------------------------------------
@@ -55,7 +124,8 @@ class AppSmiffer(vg.App):
 
 
     # --------------------------------------------------------------------------
-    def _init_globals(self):
+    @staticmethod
+    def _init_globals():
         sm.PARAMS_HPHOB = vg.ParamsGaussianUnivariate(
             mu = sm.MU_HYDROPHOBIC, sigma = sm.SIGMA_HYDROPHOBIC,
         )
@@ -89,53 +159,26 @@ class AppSmiffer(vg.App):
 
     # --------------------------------------------------------------------------
     def _process_grids(self):
-        self.trimmer.trim()
-
-        if sm.SAVE_TRIMMING_MASK:
-            mask = self.trimmer.get_mask("mid")
-            reverse = vg.Grid.reverse(mask) # save the points that are NOT trimmed
-            reverse.save_data(sm.FOLDER_OUT, f"trimming")
-
-        ### Calculate standard SMIF grids
-        if sm.DO_SMIF_STACKING:
-            self._calc_smif(sm.SmifStacking, "mid", "stacking")
-
-        if sm.DO_SMIF_HBA:
-            self._calc_smif(sm.SmifHBAccepts, "mid", "hbacceptors")
-
-        if sm.DO_SMIF_HBD:
-            self._calc_smif(sm.SmifHBDonors, "mid", "hbdonors")
-
-        if sm.DO_SMIF_HYDROPHOBIC:
-            grid_hphob: sm.SmifHydrophobic =\
-                self._calc_smif(sm.SmifHydrophobic, "mid", "hydrophobic")
-
-        if sm.DO_SMIF_HYDROPHILIC:
-            grid_hphil: sm.SmifHydrophilic =\
-                self._calc_smif(sm.SmifHydrophilic, "small", "hydrophilic")
-
-        if sm.DO_SMIF_APBS:
-            grid_apbs: sm.SmifAPBS =\
-                self._calc_smif(sm.SmifAPBS, "large", "apbs")
-
-
-        ### Calculate additional grids
-        if sm.DO_SMIF_HYDROPHOBIC and sm.DO_SMIF_HYDROPHILIC and sm.DO_SMIF_HYDRODIFF:
-            grid_hpdiff = grid_hphob - grid_hphil
-            grid_hpdiff.save_data(sm.FOLDER_OUT, "hydrodiff")
-
-        if sm.DO_SMIF_LOG_APBS:
-            grid_apbs.apply_logabs_transform()
-            grid_apbs.save_data(sm.FOLDER_OUT, "apbslog")
-
-
-    # --------------------------------------------------------------------------
-    def _calc_smif(self, cls_grid: type, key_trimming: str, title: str) -> "vg.Grid":
-        grid: vg.Grid = cls_grid(self.ms)
-        grid.populate_grid()
-        self.trimmer.mask_grid(grid, key_trimming)
-        grid.save_data(sm.FOLDER_OUT, title)
-        return grid
+        ### each grid is saved as soon as it's ready, and released unless needed for a later one
+        for title, grid in sm.SmifOperations.iter_smifs(self.ms, self.trimmer):
+            grid.save_data(sm.FOLDER_OUT, title)
 
 
 # //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _run_job(cls: type[AppSmiffer], job: "sm.SmifferJob", configs: dict[str, dict[str, any]], nshares: int = 1) -> None:
+    """Process one structure of a batch (in this process or in a worker of the pool),
+    with the memory budget split between the `nshares` jobs running at the same time."""
+    vg.set_configs(configs)
+    vg.MEMORY_BUDGET_SHARES = nshares
+    try:
+        with vg.Profiler.span("job", structure = job.name):
+            cls.from_job(job).run()
+    finally:
+        ### in this process, the writer is shared by all the jobs: make sure that
+        ### a failed write is reported as a failure of the job that saved the grid
+        if vg.GRID_WRITER is not None: vg.GRID_WRITER.flush()
+
+
+# ------------------------------------------------------------------------------
@@ -11,23 +11,31 @@ class ParamHandlerSmiffer(vg.ParamHandler):
         "pocket": ("-rxyz", "--pocket"),
         "table" : ("-b", "--table"),
         "config": ("-c", "--config"),
+        "jobs"  : ("-j", "--jobs"),
+        "profile": ("--profile",),
     }
 
 
     # --------------------------------------------------------------------------
     def assign_globals(self):
         self._set_help_str(
-            "usage: python3 run/smiffer.py [prot|rna|convert|pack|unpack] [options...]",
+            "usage: python3 run/smiffer.py [prot|rna|ligand|batch] [options...]",
             "Available modes:",
             "  prot     - Calculate SMIFs for protein structures.",
             "  rna      - Calculate SMIFs for RNA structures.",
             "  ligand   - Calculate SMIFs for ligand structures. A .chem table must be provided.",
+            "  batch    - Calculate SMIFs for all the structures listed in a manifest file, in a single run.",
             "Run 'python3 run/smiffer.py [mode] --help' for more details on each mode.",
         )
         if self._has_param_kwds("help") and not self._has_params_pos():
             self._exit_with_help(0)
 
         mode = self._safe_get_param_pos(0)
+        if mode.lower() == "batch":
+            self._parse_batch()
+            return
+        sm.BATCH_JOBS = None
+
         sm.CURRENT_MOLTYPE = self._safe_map_value(mode.lower(),
             prot = sm.MolType.PROT,
             rna = sm.MolType.RNA,
@@ -45,6 +53,7 @@ class ParamHandlerSmiffer(vg.ParamHandler):
             "-b, --table       File path to a .chem table file to use for ligand mode, or to override the default macromolecules' tables.",
             "-c, --config      File path to a configuration file with global settings, to override the default settings from config.ini.",
             "-rxyz, --pocket   Activate 'pocket sphere' mode by providing the sphere radius and the X, Y, Z coordinates for its center. If not provided, 'whole' mode is assumed.",
+            "--profile         File path where to save a profile of the run (JSON, default: profile.json), plus its Chrome trace (.trace.json).",
         )
         if self._has_param_kwds("help"):
             self._exit_with_help(0)
@@ -86,4 +95,48 @@ class ParamHandlerSmiffer(vg.ParamHandler):
             sm.PS_INFO = (radius, x_cog, y_cog, z_cog)
 
 
+    # --------------------------------------------------------------------------
+    def _parse_batch(self):
+        self._set_help_str(
+            "usage: python3 run/smiffer.py batch [path/input/manifest.csv] [options...]",
+            "The manifest is a CSV file (with header) or a JSON file (list of objects) with one job per structure. Keys:",
+            "  structure, moltype (prot|rna|ligand): mandatory.",
+            "  apbs, traj, table: optional input files, as the -a, -t and -b options of a single run.",
+            "  pocket: optional pocket sphere as 'radius x y z', as the -rxyz option of a single run.",
+            "  output: optional output folder (default: the -o folder, or else the folder of the structure).",
+            "All the jobs share the same configuration, kernels and chemical tables, and a failing job doesn't stop the others.",
+            "Available options:",
+            "-h, --help        Show this help message and exit.",
+            "-o, --output      Default folder path for the jobs without an 'output' entry.",
+            "-c, --config      File path to a configuration file with global settings, to override the default settings from config.ini.",
+            "-j, --jobs        Number of processes used to run the jobs (default: one per CPU, 1: all in this process).",
+            "--profile         File path where to save a profile of the run (JSON, default: profile.json), plus its Chrome trace (.trace.json). The jobs are only detailed with -j 1.",
+        )
+        if self._has_param_kwds("help"):
+            self._exit_with_help(0)
+
+        path_manifest = self._safe_path_file_in(
+            self._safe_get_param_pos(1,
+               err_msg = "No manifest file provided. Provide a path to the manifest file as first positional argument."
+            )
+        )
+        folder_out = self._safe_path_folder_out(self._safe_get_param_kwd("output", 0)) \
+            if self._has_param_kwds("output") else None
+
+        try:
+            sm.BATCH_JOBS = sm.SmifferJob.read_manifest(path_manifest, folder_out)
+        except ValueError as e:
+            self._exit_with_help(-1, str(e))
+        if not sm.BATCH_JOBS:
+            self._exit_with_help(-1, f"No jobs found in the manifest '{path_manifest}'.")
+
+        for job in sm.BATCH_JOBS:
+            self._safe_path_folder_out(job.folder_out)
+
+        if self._has_param_kwds("config"):
+            vg.PATH_CUSTOM_CONFIG = self._safe_kwd_file_in("config")
+
+        sm.NUM_WORKERS = self._safe_kwd_int("jobs", 0)
+
+
 # //////////////////////////////////////////////////////////////////////////////
@@ -19,3 +19,8 @@ PATH_TRAJECTORY:   _pathlib.Path = None # "path/input/traj.xtc"
 FOLDER_OUT:        _pathlib.Path = None # "path/output/"
 
 ENERGY_CUTOFF:     float = 1e-3  # Energies below this cutoff will be ignored
+
+
+### the globals above are a compatibility shim over the current RunContext
+import volgrids as _vg
+_vg.RunContext.install_shim(__name__)
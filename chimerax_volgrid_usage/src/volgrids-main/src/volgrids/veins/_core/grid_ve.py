@@ -1,8 +1,9 @@
 import numpy as np
-import pandas as pd
 
 import volgrids as vg
 
+pd = vg.lazy_import("pandas")
+
 # //////////////////////////////////////////////////////////////////////////////
 class GridVolumetricEnergy(vg.Grid):
     RADIUS_FIX = 0.4
@@ -10,7 +11,7 @@ class GridVolumetricEnergy(vg.Grid):
     HEIGHT_DISKS = 0.25
 
     # --------------------------------------------------------------------------
-    def __init__(self, ms: vg.MolSystem, df: pd.DataFrame, kind: str):
+    def __init__(self, ms: vg.MolSystem, df: "pd.DataFrame", kind: str):
         super().__init__(ms)
         self.df = df[df["kind"] == kind].copy()
         self.kind = kind
@@ -87,7 +88,7 @@ class GridVolumetricEnergy(vg.Grid):
 
 
     # ------------------------------------------------------------------------------
-    def _get_positions(self, row: pd.Series):
+    def _get_positions(self, row: "pd.Series"):
         ### idxs are expected to be 0-based
         def _split_idx_group(str_idxs: str) -> list[int]:
             return [int(idx) for idx in str_idxs.split('-')]
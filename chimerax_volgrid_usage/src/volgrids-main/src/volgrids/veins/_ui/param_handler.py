@@ -8,6 +8,7 @@ class ParamHandlerVeins(vg.ParamHandler):
         "output": ("-o", "--output"),
         "traj"  : ("-t", "--trajectory"),
         "cutoff": ("-c", "--cutoff"),
+        "profile": ("--profile",),
     }
 
 
@@ -41,6 +42,7 @@ class ParamHandlerVeins(vg.ParamHandler):
             "-o, --output     Path to the folder where the output SMIFs should be stored. If not provided, the parent folder of the input structure file will be used.",
             "-t, --trajectory Path to a trajectory file (e.g. XTC) supported by MDAnalysis. In this case, the energies CSV file contains an energy column for each frame. The header of such columns must start with 'frame'.",
             "-c, --cutoff     Energies below this cutoff will be ignored. Default value: 1e-3.",
+            "--profile        File path where to save a profile of the run (JSON, default: profile.json), plus its Chrome trace (.trace.json).",
         )
         if self._has_param_kwds("help"):
             self._exit_with_help(0)
@@ -13,20 +13,25 @@ __config_keys__ = set(__annotations__.keys())
 ### These are global variables that are to be set by
 ### an instance of ParamHandler (or its inherited classes)
 
-OPERATION: str = '' # mode of the application, i.e. "convert", "pack", "unpack", "fix_cmap"
+OPERATION: str = '' # mode of the application, i.e. "convert", "pack", "unpack", "fix_cmap", "compare", "mesh", "score", "serve"
+NUM_WORKERS: int = 0 # processes used by the operations that handle several files (0: one per CPU)
 
 import pathlib as _pathlib
 
 ### Convert
-PATH_CONVERT_IN:   _pathlib.Path = None # "path/input/grid.dx" or "path/input/grid.mrc" or "path/input/grid.cmap"
-PATH_CONVERT_DX:   _pathlib.Path = None # "path/input/grid.dx"
-PATH_CONVERT_MRC:  _pathlib.Path = None # "path/output/grid.mrc"
-PATH_CONVERT_CCP4: _pathlib.Path = None # "path/output/grid.ccp4"
-PATH_CONVERT_CMAP: _pathlib.Path = None # "path/output/grid.cmap"
+PATHS_CONVERT_IN:    list[_pathlib.Path] = None # input grids, e.g. ["path/input/grid.dx"] (expanded from files, folders, globs and manifests)
+CONVERT_IS_BATCH:    bool = False # whether the output paths below are folders, where each input grid is saved with its stem as name
+PATH_CONVERT_DX:     _pathlib.Path = None # "path/output/grid.dx"
+PATH_CONVERT_MRC:    _pathlib.Path = None # "path/output/grid.mrc"
+PATH_CONVERT_CCP4:   _pathlib.Path = None # "path/output/grid.ccp4"
+PATH_CONVERT_CMAP:   _pathlib.Path = None # "path/output/grid.cmap"
+PATH_CONVERT_SPARSE: _pathlib.Path = None # "path/output/grid.vgs"
+PATH_CONVERT_NPY:    _pathlib.Path = None # "path/output/grid.npy"
 
 ### Pack
 PATHS_PACK_IN: list[_pathlib.Path] = None # list of paths to input grids for packing
 PATH_PACK_OUT: _pathlib.Path = None # "path/output/packed.cmap"
+PACK_RESAMPLE: bool = False # whether to interpolate the grids to the resolution of the first one
 
 ### Unpack
 PATH_UNPACK_IN:  _pathlib.Path = None # "path/input/packed.cmap"
@@ -39,4 +44,25 @@ PATH_FIXCMAP_OUT: _pathlib.Path = None # "path/output/fix.cmap"
 ### Compare
 PATH_COMPARE_IN_0: _pathlib.Path = None # "path/input/grid_0.mrc"
 PATH_COMPARE_IN_1: _pathlib.Path = None # "path/input/grid_1.mrc"
-THRESHOLD_COMPARE: float # threshold for comparison (default 1e-3)
+THRESHOLD_COMPARE: float # threshold for comparison (default 1e-5)
+PATH_COMPARE_REPORT: _pathlib.Path = None # "path/output/report.json" (or .csv) with the metrics of every compared pair
+
+### Mesh
+PATH_MESH_IN:  _pathlib.Path = None # "path/input/grid.cmap"
+PATH_MESH_OUT: _pathlib.Path = None # "path/output/mesh.glb" (None: next to the input grid, with the MESH_FORMAT extension)
+MESH_LEVELS: list[float] = None # isovalues of the isosurfaces (None: the suggested isovalues of the grid statistics)
+
+### Score
+PATHS_SCORE_IN:     list[_pathlib.Path] = None # packed CMAP files of the pockets, e.g. ["path/input/pocket.cmap"]
+PATH_SCORE_OUT:     _pathlib.Path = None # "path/output/scores.csv"
+FOLDER_SCORE_WHOLE: _pathlib.Path = None # folder with the CMAP files of the whole structures (None: normalize by the pocket volume)
+SCORE_MASK: str = "trimming" # key suffix of the mask grid in the CMAP files
+PATH_SCORE_MASK: _pathlib.Path = None # mask grid file used for all the pockets instead (None: the SCORE_MASK key of each CMAP)
+
+### Serve
+SERVER_PORT: int = None # localhost port of the job server (None: JobServer.DEFAULT_PORT)
+
+
+### the globals above are a compatibility shim over the current RunContext
+import volgrids as _vg
+_vg.RunContext.install_shim(__name__)
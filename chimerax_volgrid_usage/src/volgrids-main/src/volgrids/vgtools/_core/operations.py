@@ -1,60 +1,121 @@
+import csv, json
 import numpy as np
 from pathlib import Path
+from dataclasses import asdict
 
 import volgrids as vg
 import volgrids.vgtools as vgt
 
+_CHUNK_POINTS = 1 << 22 # points per slab of the grids streamed by `compare`, `compare_all` and `score`
+
 # //////////////////////////////////////////////////////////////////////////////
 class VGOperations:
     @staticmethod
     def convert(path_in: Path, path_out: Path, fmt_out: vg.GridFormat):
-        grid = vg.GridIO.read_auto(vgt.PATH_CONVERT_IN)
+        VGOperations.convert_all(path_in, [(path_out, fmt_out)])
 
-        func: callable = {
-            vg.GridFormat.DX: vg.GridIO.write_dx,
-            vg.GridFormat.MRC: vg.GridIO.write_mrc,
-            vg.GridFormat.CCP4: vg.GridIO.write_ccp4,
-            vg.GridFormat.CMAP: vg.GridIO.write_cmap,
-        }.get(fmt_out, None)
-        if func is None:
-            raise ValueError(f"Unknown format for conversion: {fmt_out}")
 
-        extra_args = (path_in.stem,) if fmt_out == vg.GridFormat.CMAP else ()
-        func(path_out, grid, *extra_args)
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def convert_all(path_in: Path, outputs: list[tuple[Path, vg.GridFormat]]):
+        """Read the grid once and write it to every `(path_out, fmt_out)` of `outputs`."""
+        writers = [(path_out, vg.Profiler.wrap_write(_get_convert_writer(fmt_out))) for path_out, fmt_out in outputs]
+        with vg.Profiler.span("read", path = str(path_in)):
+            grid = vg.GridIO.read_auto(path_in)
+
+        for (path_out, func), (_, fmt_out) in zip(writers, outputs):
+            extra_args = (path_in.stem,) if fmt_out == vg.GridFormat.CMAP else ()
+            func(path_out, grid, *extra_args)
 
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def pack(paths_in: list[Path], path_out: Path):
-        resolution = None
+    def convert_batch(paths_in: list[Path], outputs: list[tuple[Path, vg.GridFormat]], num_workers: int = 0):
+        """Convert every grid of `paths_in` to each `(folder_out, fmt_out)` of `outputs`,
+        naming the converted files after their input, extension included (e.g. "x.dx" -> "x.dx.mrc"),
+        so that inputs differing only in their format don't overwrite each other. Inputs with the same
+        name (e.g. from different folders) are rejected before converting anything. Every input is read
+        once, and the inputs are spread over `num_workers` processes (see `vg.run_parallel`).
+        Yields `(path_in, error)` as each input is done (`error` is None on success)."""
+        jobs = [
+            (path_in, [(folder_out / f"{path_in.name}{_CONVERT_EXTENSIONS[fmt_out]}", fmt_out) for folder_out, fmt_out in outputs])
+            for path_in in paths_in
+        ]
+        targets = {}
+        for path_in, outputs_in in jobs:
+            for path_out, _ in outputs_in:
+                if path_out in targets:
+                    raise ValueError(f"The grids '{targets[path_out]}' and '{path_in}' would both be converted to '{path_out}'.")
+                targets[path_out] = path_in
+
+        for idx, _, error in vg.run_parallel(VGOperations.convert_all, jobs, num_workers, config_modules = (vg,)):
+            yield paths_in[idx], error
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def pack(paths_in: list[Path], path_out: Path, resample: bool = False, num_workers: int = 0):
+        """Pack the grids into the CMAP series-file `path_out`. The inputs are read and encoded
+        (see `GridIO.encode_cmap`) in a pool of `num_workers` processes (see `vg.run_parallel`),
+        while this process streams them into the output file, which is opened only once.
+        If `resample`, grids whose resolution differs from the first one are interpolated to it
+        (like `fix_cmap` does), so that Chimera recognizes the output as a volume series.
+        CMAP inputs that don't need resampling are copied as stored (see `GridIO.copy_cmap`)."""
+        ### only the metadata is read here (except for DX files, which can't be read lazily)
+        resolution = _get_resolution(vg.GridIO.read_auto(paths_in[0], lazy = True))
         warned = False
-        for path_in in paths_in:
-            grid = vg.GridIO.read_auto(path_in)
-            if resolution is None:
-                resolution = (grid.xres, grid.yres, grid.zres)
 
-            new_res = (grid.xres, grid.yres, grid.zres)
-            if (new_res != resolution) and not warned:
-                print(
-                    f">>> Warning: Grid {path_in} has different resolution {new_res} than the first grid {resolution}. " +\
-                    "Chimera won't recognize it as a volume series and open every grid in a separate representation." +\
-                    "Use `run/vgtools.py fix_cmap` if you want to fix this."
-                )
-                warned = True
+        def _check_resolution(path_in: Path, new_res: tuple[int]):
+            nonlocal warned
+            if new_res == resolution: return
+            if resample:
+                print(f">>> Resampling grid {path_in} from resolution {new_res} to {resolution}.")
+                return
+            if warned: return
+            print(
+                f">>> Warning: Grid {path_in} has different resolution {new_res} than the first grid {resolution}. " +\
+                "Chimera won't recognize it as a volume series and open every grid in a separate representation. " +\
+                "Use `run/vgtools.py fix_cmap` or the resample flag of `run/vgtools.py pack` if you want to fix this."
+            )
+            warned = True
 
+        to_copy, to_encode = [], []
+        for path_in in paths_in:
             key = str(path_in.parent / path_in.stem).replace(' ', '_').replace('/', '_').replace('\\', '_')
             # key = path_in.stem
-            vg.GridIO.write_cmap(path_out, grid, key)
+            if path_in.suffix.lower() == ".cmap":
+                new_res = _get_resolution(vg.GridIO.read_auto(path_in, lazy = True))
+                if (new_res == resolution) or not resample:
+                    _check_resolution(path_in, new_res)
+                    to_copy.append((path_in, key))
+                    continue
+            to_encode.append((path_in, key))
+
+        jobs = [(path_in, resolution if resample else None) for path_in,_ in to_encode]
+        results = vg.run_parallel(_read_and_encode_cmap, jobs, num_workers, config_modules = (vg,))
+
+        def _iter_frames():
+            for idx, result, error in results:
+                path_in, key = to_encode[idx]
+                if error is not None:
+                    raise RuntimeError(f"Failed to read grid {path_in} for packing.") from error
+                new_res, encoded = result
+                _check_resolution(path_in, new_res)
+                yield key, encoded
+
+        vg.Profiler.wrap_write(vg.GridIO.write_cmap_encoded)(path_out, _iter_frames())
+        for path_in, key in to_copy:
+            vg.GridIO.copy_cmap(path_in, vg.GridIO.get_cmap_keys(path_in)[0], path_out, key)
 
 
     # --------------------------------------------------------------------------
     @staticmethod
     def unpack(path_in: Path, folder_out: Path):
+        ### CMAP to CMAP: copy the compressed data as it is, without decoding it
         keys = vg.GridIO.get_cmap_keys(path_in)
         for key in keys:
             path_out = folder_out / f"{key}.cmap"
-            grid = vg.GridIO.read_cmap(path_in, key)
-            vg.GridIO.write_cmap(path_out, grid, key)
+            vg.GridIO.copy_cmap(path_in, key, path_out)
 
 
     # --------------------------------------------------------------------------
@@ -62,8 +123,10 @@ class VGOperations:
     def fix_cmap(path_in: Path, path_out: Path):
         resolution = None
         keys = vg.GridIO.get_cmap_keys(path_in)
+        write_cmap = vg.Profiler.wrap_write(vg.GridIO.write_cmap)
         for key in keys:
-            grid = vg.GridIO.read_cmap(path_in, key)
+            with vg.Profiler.span("read", key = key):
+                grid = vg.GridIO.read_cmap(path_in, key)
 
             minCoords = (grid.xmin, grid.ymin, grid.zmin)
             maxCoords = (grid.xmax, grid.ymax, grid.zmax)
@@ -71,18 +134,24 @@ class VGOperations:
                 resolution = (grid.xres, grid.yres, grid.zres)
 
             grid.reshape(minCoords, maxCoords, resolution)
-            vg.GridIO.write_cmap(path_out, grid, key)
+            write_cmap(path_out, grid, key)
 
 
     # --------------------------------------------------------------------------
     @staticmethod
-    def compare(path_in_0: Path, path_in_1: Path, threshold: float) -> "vgt.ComparisonResult":
+    def compare(path_in_0: Path, path_in_1: Path, threshold: float, chunk_points: int = _CHUNK_POINTS,
+        key_0: str = None, key_1: str = None
+    ) -> "vgt.ComparisonResult":
+        """Compare two grids point by point. Binary formats are read lazily and both grids
+        are streamed in slabs of about `chunk_points` points, so all the metrics are
+        computed in one pass without ever holding the whole grids in memory.
+        `key_0` and `key_1` select the grids of CMAP files (default: their first key)."""
         def _are_different_vector(vec0, vec1):
             diff = np.abs(vec0 - vec1)
             return len(diff[diff > threshold]) != 0
 
-        grid_0 = vg.GridIO.read_auto(path_in_0)
-        grid_1 = vg.GridIO.read_auto(path_in_1)
+        grid_0 = _read_lazy(path_in_0, key_0)
+        grid_1 = _read_lazy(path_in_1, key_1)
 
         deltas_0     = grid_0.get_deltas();     deltas_1     = grid_1.get_deltas()
         resolution_0 = grid_0.get_resolution(); resolution_1 = grid_1.get_resolution()
@@ -108,16 +177,386 @@ class VGOperations:
                 f"Warning: Grids {path_in_0} and {path_in_1} have different deltas: {deltas_0} vs {deltas_1}. Comparison may not be accurate."
             )
 
-        diff = abs(grid_1 - grid_0)
-        mask = diff.grid > threshold
+        ### values of quantized grids are only known up to their recorded max error
+        tolerance = threshold + grid_0.quant_error + grid_1.quant_error
+        for path, grid in ((path_in_0, grid_0), (path_in_1, grid_1)):
+            if grid.quant_error > 0:
+                warnings.append(
+                    f"Grid {path} is quantized (max error {grid.quant_error:2.2e}). Points differing by less than {tolerance:2.2e} are considered equal."
+                )
+
+        acc = _ComparisonAccumulator()
+        axis = _get_slab_axis(grid_0.grid)
+        plane_size = int(np.prod(np.delete(resolution_0, axis)))
+        chunk_size = max(1, chunk_points // max(plane_size, 1))
+        for start in range(0, int(resolution_0[axis]), chunk_size):
+            stop = min(start + chunk_size, int(resolution_0[axis]))
+            ### bool grids can't be substracted, every slab is compared as float64
+            block_0 = _read_slab(grid_0.grid, start, stop, axis)
+            block_1 = _read_slab(grid_1.grid, start, stop, axis)
+            acc.add(block_0, block_1, tolerance, axis, start)
+
+        max_diff_coords = None if (acc.max_diff_index is None) else \
+            tuple(float(v) for v in grid_0.get_min_coords() + np.array(acc.max_diff_index) * grid_0.get_deltas())
+
+        return vgt.ComparisonResult(
+            npoints_diff = acc.npoints_diff,
+            npoints_total = acc.npoints,
+            cumulative_diff = acc.cumulative_diff,
+            avg_diff = (acc.cumulative_diff / acc.npoints_diff) if (acc.npoints_diff > 0) else 0,
+            messages = warnings,
+            max_diff = acc.max_diff,
+            rmse = acc.get_rmse(),
+            pearson = acc.get_pearson(),
+            max_diff_index = acc.max_diff_index,
+            max_diff_coords = max_diff_coords,
+        )
 
-        npoints_diff  = len(mask[mask])
-        npoints_total = grid_0.xres * grid_0.yres * grid_0.zres
-        cumulative_diff = np.sum(diff.grid[mask])
-        avg_diff = (cumulative_diff / npoints_diff) if (npoints_diff > 0) else 0
 
-        return vgt.ComparisonResult(npoints_diff, npoints_total, cumulative_diff, avg_diff, warnings)
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def compare_all(path_in_0: Path, path_in_1: Path, threshold: float, num_workers: int = 0):
+        """Compare every pair of grids found in two folders (files paired by their relative
+        path) or in two CMAP series-files (grids paired by key). The keys of the CMAP files
+        found in the folders are paired too. The pairs are compared in a pool of `num_workers`
+        processes (see `vg.run_parallel`). Yields `(name, result)` as each pair is done;
+        unpaired grids and failed comparisons give results with no points and a message."""
+        names, jobs = [], []
+        for name, (path_0, key_0), (path_1, key_1) in _get_comparison_pairs(path_in_0, path_in_1):
+            if (path_0 is None) or (path_1 is None):
+                folder = path_in_0 if (path_0 is None) else path_in_1
+                yield name, vgt.ComparisonResult(0, 0, 0.0, 0.0, [f"Error: Missing in {folder}."])
+                continue
+            names.append(name)
+            jobs.append((path_0, path_1, threshold, _CHUNK_POINTS, key_0, key_1))
+
+        for idx, result, error in vg.run_parallel(VGOperations.compare, jobs, num_workers, config_modules = (vg,)):
+            if error is not None:
+                result = vgt.ComparisonResult(0, 0, 0.0, 0.0, [f"Error: {type(error).__name__}: {error}"])
+            yield names[idx], result
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_comparison_report(path_report: Path, threshold: float, results: list[tuple[str, "vgt.ComparisonResult"]]):
+        """Write the `(name, result)` pairs of `compare_all` as JSON, or as CSV if
+        `path_report` has a .csv extension (one row per pair, the messages joined with ' | ')."""
+        rows = [{"name": name, "passed": result.passed, **asdict(result)} for name, result in sorted(results, key = lambda r: r[0])]
 
+        if Path(path_report).suffix.lower() == ".csv":
+            with open(path_report, 'w', newline = '') as file:
+                writer = csv.DictWriter(file, fieldnames = list(rows[0].keys()) if rows else ["name", "passed"])
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({k: (" | ".join(v) if k == "messages" else v) for k, v in row.items()})
+            return
+
+        for row in rows: # NaN is not valid JSON
+            if np.isnan(row["pearson"]): row["pearson"] = None
+        npassed = sum(row["passed"] for row in rows)
+        report = {"threshold": threshold, "npairs": len(rows), "npassed": npassed, "nfailed": len(rows) - npassed, "pairs": rows}
+        with open(path_report, 'w') as file:
+            json.dump(report, file, indent = 4)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def score(path_in: Path, folder_whole: Path = None, mask: str = "trimming", path_mask: Path = None) -> dict[str, str | int | float]:
+        """Score the pocket of a packed CMAP file (e.g. a pocket-sphere output of smiffer).
+        The pocket is given by the nonzero points of the grid file `path_mask` or, without it,
+        of the key of the CMAP ending with `mask` (default: the trimming grid).
+        For every other key ("{molname}.{kind}"), the sum of its values inside the pocket
+        and their positive/negative parts are computed. Scores are the absolute value of
+        these sums, normalized by the same sums over the whole grid of the same key in
+        `folder_whole` (a CMAP with the same name) or, without it, by the number of points
+        of the pocket. Grids are reduced slab by slab, never fully loaded.
+        Returns the CSV row of the pocket (see `write_scores`)."""
+        keys = vg.GridIO.get_cmap_keys(path_in)
+        if path_mask is not None:
+            grid_mask, key_mask = _read_lazy(Path(path_mask)), None
+        else:
+            keys_mask = [key for key in keys if (key == mask) or key.endswith(f".{mask}")]
+            if not keys_mask:
+                raise ValueError(f"No mask key '{mask}' found in {path_in}. Available keys: {keys}.")
+            key_mask = keys_mask[0]
+            grid_mask = _read_lazy(path_in, key_mask)
+
+        npoints = int(_get_masked_sums(grid_mask.grid, None, count = True)[0])
+        if npoints == 0:
+            raise ValueError(f"The pocket of {path_in} is empty, no nonzero points in its mask.")
+
+        path_whole = None if (folder_whole is None) else (folder_whole / path_in.name)
+        keys_whole = set(vg.GridIO.get_cmap_keys(path_whole)) if path_whole and path_whole.exists() else set()
+
+        row = {
+            "name": path_in.stem,
+            "npoints": npoints,
+            "volume": float(npoints * np.prod(grid_mask.get_deltas())),
+        }
+        for key in keys:
+            if key == key_mask: continue
+            grid = _read_lazy(path_in, key)
+            if tuple(grid.get_resolution()) != tuple(grid_mask.get_resolution()):
+                raise ValueError(f"Grid '{key}' of {path_in} doesn't have the resolution of the mask.")
+
+            kind = key.rsplit('.', 1)[-1]
+            sums = _get_masked_sums(grid.grid, grid_mask.grid)
+            if key in keys_whole:
+                norms = _get_masked_sums(_read_lazy(path_whole, key).grid, None)
+            elif path_whole is None:
+                norms = (npoints,) * 3
+            else:
+                norms = (np.nan,) * 3
+
+            for name, value in zip(("sum", "pos", "neg"), sums):
+                row[f"{kind}_{name}"] = value
+            for name, value, norm in zip(("score", "score_pos", "score_neg"), sums, norms):
+                row[f"{kind}_{name}"] = (abs(value) / abs(norm)) if norm else 0.0
+        return row
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def score_batch(paths_in: list[Path], folder_whole: Path = None, mask: str = "trimming", num_workers: int = 0, path_mask: Path = None):
+        """Run `score` for every pocket of `paths_in` in a pool of `num_workers` processes
+        (see `vg.run_parallel`). Yields `(path_in, row, error)` as each pocket is done."""
+        jobs = [(path_in, folder_whole, mask, path_mask) for path_in in paths_in]
+        for idx, row, error in vg.run_parallel(VGOperations.score, jobs, num_workers, config_modules = (vg,)):
+            yield paths_in[idx], row, error
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def write_scores(path_csv: Path, rows: list[dict]):
+        """One row per pocket, sorted by name. Columns: name, npoints and volume (in cubic
+        units of the grid deltas) of the pocket, then for every SMIF kind: its masked sum
+        and positive/negative parts ("{kind}_sum", "_pos", "_neg") and the scores of each
+        ("{kind}_score", "_score_pos", "_score_neg"). Missing values are left empty."""
+        fieldnames = list(dict.fromkeys(name for row in rows for name in row))
+        with open(path_csv, 'w', newline = '') as file:
+            writer = csv.DictWriter(file, fieldnames = fieldnames, restval = '')
+            writer.writeheader()
+            for row in sorted(rows, key = lambda r: r["name"]):
+                writer.writerow({k: ('' if (isinstance(v, float) and np.isnan(v)) else v) for k, v in row.items()})
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def mesh(path_in: Path, path_out: Path = None, levels: list[float] = None) -> list[tuple[Path, "vg.Mesh"]]:
+        """Extract the isosurfaces of the grid at `levels` (default: the suggested isovalues
+        of its stored statistics, or of its data if there are none) and write them to `path_out`."""
+        grid = vg.GridIO.read_auto(path_in)
+        if levels is None:
+            levels = vg.MeshIO.get_isovalues(grid, "auto", vg.GridIO.read_stats(path_in))
+        if path_out is None:
+            path_out = path_in.with_suffix(f".{vg.MESH_FORMAT.name.lower()}")
+
+        results = []
+        for level in levels:
+            path_mesh = path_out if (len(levels) == 1) else \
+                path_out.with_name(f"{path_out.stem}.iso_{level:g}{path_out.suffix}")
+            mesh = vg.Mesh.from_grid(grid, level)
+            vg.MeshIO.write_auto(path_mesh, mesh)
+            results.append((path_mesh, mesh))
+        return results
 
 
 # //////////////////////////////////////////////////////////////////////////////
+_CONVERT_EXTENSIONS = {
+    vg.GridFormat.DX: ".dx",
+    vg.GridFormat.MRC: ".mrc",
+    vg.GridFormat.CCP4: ".ccp4",
+    vg.GridFormat.CMAP: ".cmap",
+    vg.GridFormat.SPARSE: ".vgs",
+    vg.GridFormat.NPY: ".npy",
+}
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class _ComparisonAccumulator:
+    """Running metrics of `VGOperations.compare`. The (co)variances are merged chunk
+    by chunk with the pairwise formulas of Chan et al., which are numerically stable."""
+    def __init__(self):
+        self.npoints = 0
+        self.npoints_diff = 0
+        self.cumulative_diff = 0.0 # sum of the differences above the tolerance
+        self.sum_squared_diff = 0.0
+        self.max_diff = 0.0
+        self.max_diff_index: tuple[int] = None
+        self._mean_0 = self._mean_1 = 0.0
+        self._m2_0 = self._m2_1 = self._cov = 0.0
+
+
+    # --------------------------------------------------------------------------
+    def add(self, block_0: np.ndarray, block_1: np.ndarray, tolerance: float, axis: int, start: int):
+        """Add the slab of both grids that starts at index `start` along `axis`.
+        The blocks must be float64 copies, they are modified in place."""
+        n = block_0.size
+        if n == 0: return
+        diff = np.abs(block_1 - block_0)
+
+        mask = diff > tolerance
+        self.npoints_diff += int(np.count_nonzero(mask))
+        self.cumulative_diff += float(np.sum(diff, where = mask))
+        self.sum_squared_diff += float(np.dot(diff.ravel(), diff.ravel()))
+
+        i_max = int(np.argmax(diff))
+        if (self.max_diff_index is None) or (diff.flat[i_max] > self.max_diff):
+            self.max_diff = float(diff.flat[i_max])
+            index = list(np.unravel_index(i_max, diff.shape))
+            index[axis] += start
+            self.max_diff_index = tuple(int(i) for i in index)
+
+        del diff, mask
+        mean_0, mean_1 = float(block_0.mean()), float(block_1.mean())
+        block_0 -= mean_0; block_1 -= mean_1 # center in place, the blocks are not needed anymore
+        centered_0, centered_1 = block_0.ravel(), block_1.ravel()
+        m2_0, m2_1 = float(np.dot(centered_0, centered_0)), float(np.dot(centered_1, centered_1))
+        cov = float(np.dot(centered_0, centered_1))
+
+        total = self.npoints + n
+        delta_0, delta_1 = mean_0 - self._mean_0, mean_1 - self._mean_1
+        factor = self.npoints * n / total
+        self._m2_0 += m2_0 + delta_0 * delta_0 * factor
+        self._m2_1 += m2_1 + delta_1 * delta_1 * factor
+        self._cov  += cov  + delta_0 * delta_1 * factor
+        self._mean_0 += delta_0 * n / total
+        self._mean_1 += delta_1 * n / total
+        self.npoints = total
+
+
+    # --------------------------------------------------------------------------
+    def get_rmse(self) -> float:
+        return float(np.sqrt(self.sum_squared_diff / self.npoints)) if self.npoints else 0.0
+
+
+    # --------------------------------------------------------------------------
+    def get_pearson(self) -> float:
+        """Pearson correlation coefficient (NaN if any of the grids is constant)."""
+        denominator = np.sqrt(self._m2_0 * self._m2_1)
+        return float(self._cov / denominator) if denominator > 0 else float("nan")
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _read_lazy(path_in: Path, key: str = None) -> "vg.Grid":
+    if key is None: return vg.GridIO.read_auto(path_in, lazy = True)
+    return vg.GridIO.read_cmap(path_in, key, lazy = True)
+
+
+# ------------------------------------------------------------------------------
+def _get_comparison_pairs(path_in_0: Path, path_in_1: Path) -> list[tuple[str, tuple[Path, str], tuple[Path, str]]]:
+    """Pairs `(name, (path_0, key_0), (path_1, key_1))` of `VGOperations.compare_all`.
+    Paths are None for grids missing on one side; keys are None for non-CMAP files."""
+    if not (path_in_0.is_dir() and path_in_1.is_dir()):
+        return _get_cmap_key_pairs(path_in_0, path_in_1, prefix = '')
+
+    def _get_grid_files(folder: Path) -> dict[str, Path]:
+        return {
+            p.relative_to(folder).as_posix(): p for p in folder.rglob('*')
+            if p.is_file() and (p.suffix.lower() in vg.GridIO.EXTENSIONS)
+        }
+
+    files_0, files_1 = _get_grid_files(path_in_0), _get_grid_files(path_in_1)
+    pairs = []
+    for name in sorted(files_0.keys() | files_1.keys()):
+        path_0, path_1 = files_0.get(name), files_1.get(name)
+        if (path_0 is None) or (path_1 is None):
+            pairs.append((name, (path_0, None), (path_1, None)))
+        else:
+            pairs.extend(_get_cmap_key_pairs(path_0, path_1, prefix = name))
+    return pairs
+
+
+# ------------------------------------------------------------------------------
+def _get_cmap_key_pairs(path_0: Path, path_1: Path, prefix: str) -> list[tuple[str, tuple[Path, str], tuple[Path, str]]]:
+    """One pair per key if both files are CMAPs (keys are matched by name, unless both
+    files hold a single grid), else a single pair of files."""
+    name = prefix or f"{path_0.name} vs {path_1.name}"
+    is_cmap = lambda path: path.suffix.lower() == ".cmap"
+    if not (is_cmap(path_0) and is_cmap(path_1)):
+        return [(name, (path_0, None), (path_1, None))]
+
+    keys_0, keys_1 = vg.GridIO.get_cmap_keys(path_0), vg.GridIO.get_cmap_keys(path_1)
+    if len(keys_0) == len(keys_1) == 1:
+        return [(name, (path_0, keys_0[0]), (path_1, keys_1[0]))]
+
+    return [
+        (f"{prefix}:{key}" if prefix else key,
+            (path_0 if key in keys_0 else None, key),
+            (path_1 if key in keys_1 else None, key))
+        for key in sorted(set(keys_0) | set(keys_1))
+    ]
+
+
+# ------------------------------------------------------------------------------
+def _get_masked_sums(arr, arr_mask = None, count: bool = False, chunk_points: int = _CHUNK_POINTS) -> tuple[float, float, float]:
+    """Sum of the values of `arr` at the nonzero points of `arr_mask` (all points if None),
+    and the sums of its positive and negative values. With `count`, nonzero values are
+    counted as 1 (i.e. the first sum is the number of nonzero points)."""
+    axis = _get_slab_axis(arr)
+    n = arr.shape[axis]
+    chunk_size = max(1, chunk_points // max(int(np.prod(arr.shape)) // max(n, 1), 1))
+    positive = negative = 0.0
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = _read_slab(arr, start, stop, axis)
+        if count: block = (block != 0).astype(np.float64)
+        if arr_mask is not None:
+            block[_read_slab(arr_mask, start, stop, axis) == 0] = 0
+        positive += float(np.sum(block, where = block > 0))
+        negative += float(np.sum(block, where = block < 0))
+    return positive + negative, positive, negative
+
+
+# ------------------------------------------------------------------------------
+def _get_slab_axis(arr) -> int:
+    """Axis along which slabs are cheap to read: the one contiguous on disk for lazy grids, else X."""
+    return arr.slab_axis if isinstance(arr, vg.GridProxy) else 0
+
+
+# ------------------------------------------------------------------------------
+def _read_slab(arr, start: int, stop: int, axis: int) -> np.ndarray:
+    if isinstance(arr, vg.SparseBricks):
+        slab = arr.get_slab(start, stop, axis)
+    else:
+        slices = [slice(None)] * 3
+        slices[axis] = slice(start, stop)
+        slab = arr[tuple(slices)]
+    return np.array(slab, dtype = np.float64) # always a copy (see `_ComparisonAccumulator.add`)
+
+
+# ------------------------------------------------------------------------------
+def _get_resolution(grid: "vg.Grid") -> tuple[int]:
+    return tuple(int(n) for n in grid.get_resolution())
+
+
+# ------------------------------------------------------------------------------
+def _read_and_encode_cmap(path_in: Path, resolution: tuple[int] = None) -> tuple[tuple[int], object]:
+    """Worker job of `VGOperations.pack`: read the grid, interpolate it to `resolution`
+    if given and different, and encode it for `GridIO.write_cmap_encoded`.
+    Returns the original resolution of the grid and the encoded frame."""
+    grid = vg.GridIO.read_auto(path_in)
+    original = _get_resolution(grid)
+    if (resolution is not None) and (original != resolution):
+        grid.reshape(grid.get_min_coords(), grid.get_max_coords(), resolution)
+    return original, vg.GridIO.encode_cmap(grid)
+
+
+# ------------------------------------------------------------------------------
+def _get_convert_writer(fmt_out: vg.GridFormat) -> callable:
+    func: callable = {
+        vg.GridFormat.DX: vg.GridIO.write_dx,
+        vg.GridFormat.MRC: vg.GridIO.write_mrc,
+        vg.GridFormat.CCP4: vg.GridIO.write_ccp4,
+        vg.GridFormat.CMAP: vg.GridIO.write_cmap,
+        vg.GridFormat.SPARSE: vg.GridIO.write_sparse,
+        vg.GridFormat.NPY: vg.GridIO.write_npy,
+    }.get(fmt_out, None)
+    if func is None:
+        raise ValueError(f"Unknown format for conversion: {fmt_out}")
+    return func
+
+
+# ------------------------------------------------------------------------------
@@ -8,6 +8,18 @@ class ComparisonResult:
     cumulative_diff: float
     avg_diff: float
     messages: list[str]
+    max_diff: float = 0.0
+    rmse: float = 0.0
+    pearson: float = float("nan")          # NaN if any of the grids is constant
+    max_diff_index: tuple[int] = None      # grid point (i,j,k) with the largest difference
+    max_diff_coords: tuple[float] = None   # and its coordinates
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def passed(self) -> bool:
+        """Whether the grids were compared and no point differs beyond the threshold."""
+        return (self.npoints_total > 0) and (self.npoints_diff == 0)
 
 
 # //////////////////////////////////////////////////////////////////////////////
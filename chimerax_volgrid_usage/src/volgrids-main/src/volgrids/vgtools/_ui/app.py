@@ -7,14 +7,14 @@ class AppVGTools(vg.App):
     _CLASS_PARAM_HANDLER = vgt.ParamHandlerVGTools
 
     # --------------------------------------------------------------------------
-    def run(self) -> None:
+    def _run(self) -> None:
         if vgt.OPERATION == "convert":
             self._run_convert()
             return
 
         if vgt.OPERATION == "pack":
             print(f">>> Packing {len(vgt.PATHS_PACK_IN)} grids into '{vgt.PATH_PACK_OUT}'")
-            vgt.VGOperations.pack(vgt.PATHS_PACK_IN, vgt.PATH_PACK_OUT)
+            vgt.VGOperations.pack(vgt.PATHS_PACK_IN, vgt.PATH_PACK_OUT, vgt.PACK_RESAMPLE, vgt.NUM_WORKERS)
             return
 
         if vgt.OPERATION == "unpack":
@@ -28,9 +28,75 @@ class AppVGTools(vg.App):
             return
 
         if vgt.OPERATION == "compare":
-            print(f">>> Comparing grids: {vgt.PATH_COMPARE_IN_0} vs {vgt.PATH_COMPARE_IN_1} (threshold={vgt.THRESHOLD_COMPARE:2.2e})")
-            result = vgt.VGOperations.compare(vgt.PATH_COMPARE_IN_0, vgt.PATH_COMPARE_IN_1, vgt.THRESHOLD_COMPARE)
+            self._run_compare()
+            return
+
+        if vgt.OPERATION == "score":
+            self._run_score()
+            return
+
+        if vgt.OPERATION == "serve":
+            self._run_serve()
+            return
+
+        if vgt.OPERATION == "mesh":
+            print(f">>> Extracting isosurfaces of {vgt.PATH_MESH_IN}")
+            for path_mesh, mesh in vgt.VGOperations.mesh(vgt.PATH_MESH_IN, vgt.PATH_MESH_OUT, vgt.MESH_LEVELS):
+                print(f"...>>> {path_mesh}: {mesh.nvertices} vertices, {mesh.nfaces} triangles")
+            return
+
+        raise ValueError(f"Unknown mode: {vgt.OPERATION}")
+
+
+    # --------------------------------------------------------------------------
+    def _import_config_dependencies(self):
+        import numpy as np
+        return {"np": np, "vg": vg}
+
 
+    # --------------------------------------------------------------------------
+    def _run_convert(self):
+        outputs = [(path_out, fmt_out) for path_out, fmt_out in (
+            (vgt.PATH_CONVERT_DX,     vg.GridFormat.DX),
+            (vgt.PATH_CONVERT_MRC,    vg.GridFormat.MRC),
+            (vgt.PATH_CONVERT_CCP4,   vg.GridFormat.CCP4),
+            (vgt.PATH_CONVERT_CMAP,   vg.GridFormat.CMAP),
+            (vgt.PATH_CONVERT_SPARSE, vg.GridFormat.SPARSE),
+            (vgt.PATH_CONVERT_NPY,    vg.GridFormat.NPY),
+        ) if path_out is not None]
+
+        if not vgt.CONVERT_IS_BATCH:
+            path_in = vgt.PATHS_CONVERT_IN[0]
+            for path_out, fmt_out in outputs:
+                print(f">>> Converting {path_in} file to {fmt_out.name}: {path_out}")
+            vgt.VGOperations.convert_all(path_in, outputs)
+            return
+
+        n = len(vgt.PATHS_CONVERT_IN)
+        print(f">>> Converting {n} grid files to: " + ", ".join(f"{fmt.name} ({folder})" for folder, fmt in outputs))
+        timer = vg.Timer(); timer.start()
+        failed = []
+        for i, (path_in, error) in enumerate(vgt.VGOperations.convert_batch(vgt.PATHS_CONVERT_IN, outputs, vgt.NUM_WORKERS), 1):
+            if error is not None: failed.append(path_in)
+            status = "ok" if (error is None) else f"FAILED: {type(error).__name__}: {error}"
+            print(f"...>>> [{i}/{n}] {path_in}: {status}", flush = True)
+
+        print(f">>> Converted {n - len(failed)}/{n} grid files, {len(failed)} failed", end = ' ')
+        timer.end()
+        for path_in in failed:
+            print(f"...>>> Failed: {path_in}")
+
+
+    # --------------------------------------------------------------------------
+    def _run_compare(self):
+        path_0, path_1 = vgt.PATH_COMPARE_IN_0, vgt.PATH_COMPARE_IN_1
+        is_series = path_0.is_dir() or any(
+            (path.suffix.lower() == ".cmap") and (len(vg.GridIO.get_cmap_keys(path)) > 1) for path in (path_0, path_1)
+        )
+
+        if not (is_series or vgt.PATH_COMPARE_REPORT):
+            print(f">>> Comparing grids: {path_0} vs {path_1} (threshold={vgt.THRESHOLD_COMPARE:2.2e})")
+            result = vgt.VGOperations.compare(path_0, path_1, vgt.THRESHOLD_COMPARE)
             for message in result.messages:
                 print(f"...>>> {message}")
             if result.npoints_total == 0: return
@@ -39,30 +105,69 @@ class AppVGTools(vg.App):
                 f"...>>> {result.npoints_diff}/{result.npoints_total} points differ " +\
                 f"({100 * result.npoints_diff / result.npoints_total:.2f}%)\n" +\
                 f"...>>> Accumulated difference: {result.cumulative_diff:2.2e} " +\
-                f"(avg {result.avg_diff:2.2e} per point)"
+                f"(avg {result.avg_diff:2.2e} per point)\n" +\
+                f"...>>> Max difference: {result.max_diff:2.2e} at point {result.max_diff_index} " +\
+                f"(coords {tuple(round(v, 3) for v in result.max_diff_coords)})\n" +\
+                f"...>>> RMSE: {result.rmse:2.2e}, Pearson correlation: {result.pearson:.6f}"
             )
             return
 
-        raise ValueError(f"Unknown mode: {vgt.OPERATION}")
+        print(f">>> Comparing all grids: {path_0} vs {path_1} (threshold={vgt.THRESHOLD_COMPARE:2.2e})")
+        timer = vg.Timer(); timer.start()
+        results = []
+        for name, result in vgt.VGOperations.compare_all(path_0, path_1, vgt.THRESHOLD_COMPARE, vgt.NUM_WORKERS):
+            results.append((name, result))
+            status = "ok" if result.passed else "FAILED"
+            details = f"{result.npoints_diff}/{result.npoints_total} points differ, max {result.max_diff:2.2e}" \
+                if result.npoints_total else "; ".join(result.messages)
+            print(f"...>>> [{len(results)}] {name}: {status} ({details})", flush = True)
+
+        nfailed = sum(not result.passed for _, result in results)
+        print(f">>> Compared {len(results)} pairs of grids, {nfailed} failed", end = ' ')
+        timer.end()
+        for name, result in sorted(results, key = lambda r: r[0]):
+            if not result.passed: print(f"...>>> Failed: {name}")
+
+        if vgt.PATH_COMPARE_REPORT is not None:
+            vgt.VGOperations.write_comparison_report(vgt.PATH_COMPARE_REPORT, vgt.THRESHOLD_COMPARE, results)
+            print(f">>> Report saved to {vgt.PATH_COMPARE_REPORT}")
 
 
     # --------------------------------------------------------------------------
-    def _import_config_dependencies(self):
-        import numpy as np
-        return {"np": np, "vg": vg}
+    def _run_score(self):
+        n = len(vgt.PATHS_SCORE_IN)
+        print(f">>> Scoring {n} pockets into '{vgt.PATH_SCORE_OUT}'")
+        timer = vg.Timer(); timer.start()
+        rows, failed = [], []
+        for i, (path_in, row, error) in enumerate(vgt.VGOperations.score_batch(
+            vgt.PATHS_SCORE_IN, vgt.FOLDER_SCORE_WHOLE, vgt.SCORE_MASK, vgt.NUM_WORKERS, vgt.PATH_SCORE_MASK
+        ), 1):
+            if error is None: rows.append(row)
+            else: failed.append(path_in)
+            status = "ok" if (error is None) else f"FAILED: {type(error).__name__}: {error}"
+            print(f"...>>> [{i}/{n}] {path_in}: {status}", flush = True)
+
+        vgt.VGOperations.write_scores(vgt.PATH_SCORE_OUT, rows)
+        print(f">>> Scored {len(rows)}/{n} pockets, {len(failed)} failed", end = ' ')
+        timer.end()
+        for path_in in failed:
+            print(f"...>>> Failed: {path_in}")
 
 
     # --------------------------------------------------------------------------
-    def _run_convert(self):
-        def _convert(path_out, fmt_out: vg.GridFormat):
-            if path_out is None: return
-            print(f">>> Converting {vgt.PATH_CONVERT_IN} file to {fmt_out.name}: {path_out}")
-            vgt.VGOperations.convert(vgt.PATH_CONVERT_IN, path_out, fmt_out)
-
-        _convert(vgt.PATH_CONVERT_DX,   vg.GridFormat.DX)
-        _convert(vgt.PATH_CONVERT_MRC,  vg.GridFormat.MRC)
-        _convert(vgt.PATH_CONVERT_CCP4, vg.GridFormat.CCP4)
-        _convert(vgt.PATH_CONVERT_CMAP, vg.GridFormat.CMAP)
+    def _run_serve(self):
+        server = vg.JobServer(vgt.SERVER_PORT, vgt.NUM_WORKERS)
+        print(f">>> Starting {server.num_workers} workers", end = ' ', flush = True)
+        timer = vg.Timer(); timer.start()
+        def _on_ready():
+            timer.end()
+            print(f">>> Serving volgrids jobs on {server.HOST}:{server.port} (Ctrl+C to stop)", flush = True)
+
+        try:
+            server.serve_forever(on_ready = _on_ready)
+        except KeyboardInterrupt:
+            pass
+        print(">>> Server stopped")
 
 
 # //////////////////////////////////////////////////////////////////////////////
@@ -1,17 +1,30 @@
+import glob
+from pathlib import Path
+
 import volgrids as vg
 import volgrids.vgtools as vgt
 
 # //////////////////////////////////////////////////////////////////////////////
 class ParamHandlerVGTools(vg.ParamHandler):
     _EXPECTED_CLI_FLAGS = {
-            "help"   : ("-h", "--help"),
-            "input"  : ("-i", "--input"),
-            "output" : ("-o", "--output"),
-            "dx"     : ("-d", "--dx"),
-            "mrc"    : ("-m", "--mrc"),
-            "ccp4"   : ("-p", "--ccp4"),
-            "cmap"   : ("-c", "--cmap"),
-            "thresh" : ("-t", "--threshold"),
+            "help"     : ("-h", "--help"),
+            "input"    : ("-i", "--input"),
+            "output"   : ("-o", "--output"),
+            "dx"       : ("-d", "--dx"),
+            "mrc"      : ("-m", "--mrc"),
+            "ccp4"     : ("-p", "--ccp4"),
+            "cmap"     : ("-c", "--cmap"),
+            "sparse"   : ("-s", "--sparse"),
+            "npy"      : ("-n", "--npy"),
+            "thresh"   : ("-t", "--threshold"),
+            "levels"   : ("-l", "--levels"),
+            "manifest" : ("-f", "--manifest"),
+            "jobs"     : ("-j", "--jobs"),
+            "resample" : ("-r", "--resample"),
+            "whole"    : ("-w", "--whole"),
+            "mask"     : ("-k", "--mask"),
+            "maskfile" : ("--mask-file",),
+            "profile"  : ("--profile",),
     }
     _DEFAULT_COMPARISON_THRESHOLD = 1e-5
 
@@ -19,14 +32,18 @@ class ParamHandlerVGTools(vg.ParamHandler):
     # --------------------------------------------------------------------------
     def assign_globals(self):
         self._set_help_str(
-            "usage: python3 run/vgtools.py [convert|pack|unpack|fix_cmap] [options...]",
+            "usage: python3 run/vgtools.py [convert|pack|unpack|fix_cmap|compare|mesh|score|serve] [options...]",
             "Available modes:",
             "  convert  - Convert grid files between formats.",
             "  pack     - Pack multiple grid files into a single CMAP series-file.",
             "  unpack   - Unpack a CMAP series-file into multiple grid files.",
             "  fix_cmap - Ensure that all grids in a CMAP series-file have the same resolution, interpolating them if necessary.",
-            "  compare  - Compare two grid files by printing the number of differing points and their accumulated difference.",
+            "  compare  - Compare two grid files (or folders/CMAP series-files of grids) by printing the number of differing points and other metrics.",
+            "  mesh     - Extract isosurfaces of a grid file as triangle meshes (GLB, PLY or OBJ), for fast display in the viewers.",
+            "  score    - Compute the masked sums and scores of the SMIFs of pockets (packed CMAP files) into a CSV table.",
+            "  serve    - Start a local compute server that keeps volgrids loaded in a pool of workers, for the viewer plugins to submit jobs to.",
             "Run 'python3 run/vgtools.py [mode] --help' for more details on each mode.",
+            "Every mode accepts '--profile [path]' to save a profile of the run (JSON, default: profile.json), plus its Chrome trace (.trace.json).",
         )
         if self._has_param_kwds("help") and not self._has_params_pos():
             self._exit_with_help(0)
@@ -38,6 +55,9 @@ class ParamHandlerVGTools(vg.ParamHandler):
             unpack   = self._parse_unpack,
             fix_cmap = self._parse_fix_cmap,
             compare  = self._parse_compare,
+            mesh     = self._parse_mesh,
+            score    = self._parse_score,
+            serve    = self._parse_serve,
         )
         func()
 
@@ -45,34 +65,55 @@ class ParamHandlerVGTools(vg.ParamHandler):
     # --------------------------------------------------------------------------
     def _parse_convert(self) -> None:
         self._set_help_str(
-            "usage: python3 run/vgtools.py convert [path/input/grid] [options...]",
+            "usage: python3 run/vgtools.py convert [path/input/grid...] [options...]",
+            "The inputs can be grid files, folders (all the grid files inside them) or glob patterns, e.g. 'path/**/*.dx'.",
+            "With a single input grid file, the output paths are file paths. Otherwise they are folder paths,",
+            "where every converted grid is saved with the name of its input file plus the new extension (e.g. 'x.dx' -> 'x.dx.mrc').",
             "Available options:",
-            "-h, --help  Show this help message and exit.",
-            "-d, --dx    File path where to save the converted grid in DX format.",
-            "-m, --mrc   File path where to save the converted grid in MRC format.",
-            "-p, --ccp4  File path where to save the converted grid in CCP4 format.",
-            "-c, --cmap  File path where to save the converted grid in CMAP format. The stem of the input file will be used as the CMAP key.",
+            "-h, --help      Show this help message and exit.",
+            "-f, --manifest  Text file with additional input paths, one per line (relative paths are relative to the manifest's folder).",
+            "-j, --jobs      Number of processes used to convert several grids in parallel. Default is 0 (one per CPU).",
+            "-d, --dx        Path where to save the converted grid in DX format.",
+            "-m, --mrc       Path where to save the converted grid in MRC format.",
+            "-p, --ccp4      Path where to save the converted grid in CCP4 format.",
+            "-c, --cmap      Path where to save the converted grid in CMAP format. The stem of the input file will be used as the CMAP key.",
+            "-s, --sparse    Path where to save the converted grid in the block-sparse VGS format (only non-empty bricks are stored).",
+            "-n, --npy       Path where to save the converted grid as a raw NPY array (a JSON header is saved next to it).",
         )
         if self._has_param_kwds("help"):
             self._exit_with_help(0)
 
-        vgt.PATH_CONVERT_IN = self._safe_path_file_in(
-            self._safe_get_param_pos(1,
-               err_msg = "No input grid file provided. Provide a path to the grid file as second positional argument."
-            )
-        )
+        specs = list(self._params_pos[1:])
+        if self._has_param_kwds("manifest"):
+            specs = specs + self._read_manifest(self._safe_kwd_file_in("manifest"))
+        if not specs:
+            self._exit_with_help(-1, "No input grid file provided. Provide a path to the grid file as second positional argument.")
+
+        vgt.PATHS_CONVERT_IN = self._safe_paths_grids_in(specs)
+        vgt.CONVERT_IS_BATCH = (len(specs) > 1) or not Path(specs[0]).is_file()
+        vgt.NUM_WORKERS = self._safe_kwd_int("jobs", 0)
+
+        safe_path_out = self._safe_path_folder_out if vgt.CONVERT_IS_BATCH else self._safe_path_file_out
+        def _safe_kwd_out(name: str) -> Path:
+            return safe_path_out(self._safe_get_param_kwd(name, 0))
 
         if self._has_param_kwds("dx"):
-            vgt.PATH_CONVERT_DX = self._safe_kwd_file_out("dx")
+            vgt.PATH_CONVERT_DX = _safe_kwd_out("dx")
 
         if self._has_param_kwds("mrc"):
-            vgt.PATH_CONVERT_MRC = self._safe_kwd_file_out("mrc")
+            vgt.PATH_CONVERT_MRC = _safe_kwd_out("mrc")
 
         if self._has_param_kwds("ccp4"):
-            vgt.PATH_CONVERT_CCP4 = self._safe_kwd_file_out("ccp4")
+            vgt.PATH_CONVERT_CCP4 = _safe_kwd_out("ccp4")
 
         if self._has_param_kwds("cmap"):
-            vgt.PATH_CONVERT_CMAP = self._safe_kwd_file_out("cmap")
+            vgt.PATH_CONVERT_CMAP = _safe_kwd_out("cmap")
+
+        if self._has_param_kwds("sparse"):
+            vgt.PATH_CONVERT_SPARSE = _safe_kwd_out("sparse")
+
+        if self._has_param_kwds("npy"):
+            vgt.PATH_CONVERT_NPY = _safe_kwd_out("npy")
 
 
     # --------------------------------------------------------------------------
@@ -80,9 +121,11 @@ class ParamHandlerVGTools(vg.ParamHandler):
         self._set_help_str(
             "usage: python3 run/vgtools.py pack [options...]",
             "Available options:",
-            "-h, --help    Show this help message and exit.",
-            "-i, --input   List of file paths with the input grids to be packed. At least one grid file must be provided.",
-            "-o, --output  File path where to save the packed grid in CMAP format. Must be provided.",
+            "-h, --help      Show this help message and exit.",
+            "-i, --input     List of file paths with the input grids to be packed. At least one grid file must be provided.",
+            "-o, --output    File path where to save the packed grid in CMAP format. Must be provided.",
+            "-r, --resample  Interpolate the grids whose resolution differs from the first one to its resolution (like fix_cmap).",
+            "-j, --jobs      Number of processes used to read and encode the grids in parallel. Default is 0 (one per CPU).",
         )
         if self._has_param_kwds("help"):
             self._exit_with_help(0)
@@ -93,6 +136,8 @@ class ParamHandlerVGTools(vg.ParamHandler):
         ]
 
         vgt.PATH_PACK_OUT = self._safe_kwd_file_out("output")
+        vgt.PACK_RESAMPLE = self._has_param_kwds("resample")
+        vgt.NUM_WORKERS = self._safe_kwd_int("jobs", 0)
 
 
     # --------------------------------------------------------------------------
@@ -136,26 +181,186 @@ class ParamHandlerVGTools(vg.ParamHandler):
     def _parse_compare(self) -> None:
         self._set_help_str(
             "usage: python3 run/vgtools.py compare [path/input/grid_0] [path/input/grid_1] [options...]",
+            "The inputs can also be two folders (grid files are paired by their relative path) or two CMAP series-files",
+            "(grids are paired by key). Every key of the paired CMAP files is compared, and a summary of all the pairs is printed.",
             "Available options:",
             "-h, --help       Show this help message and exit.",
-            "-t, --threshold  Threshold for comparison. Default is 1e-3.",
+            "-t, --threshold  Threshold for comparison. Default is 1e-5.",
+            "-o, --output     File path where to save a report with the metrics of every pair and whether it passed (no point differs",
+            "                 beyond the threshold). JSON, or CSV if the extension is '.csv'.",
+            "-j, --jobs       Number of processes used to compare several pairs in parallel. Default is 0 (one per CPU).",
         )
         if self._has_param_kwds("help"):
             self._exit_with_help(0)
 
-        vgt.PATH_COMPARE_IN_0 = self._safe_path_file_in(
+        vgt.PATH_COMPARE_IN_0 = self._safe_path_grid_or_folder_in(
             self._safe_get_param_pos(1,
                err_msg = "No first input grid file provided. Provide a path to the first grid file as second positional argument."
             )
         )
 
-        vgt.PATH_COMPARE_IN_1 = self._safe_path_file_in(
+        vgt.PATH_COMPARE_IN_1 = self._safe_path_grid_or_folder_in(
             self._safe_get_param_pos(2,
                err_msg = "No second input grid file provided. Provide a path to the second grid file as third positional argument."
             )
         )
 
+        if vgt.PATH_COMPARE_IN_0.is_dir() != vgt.PATH_COMPARE_IN_1.is_dir():
+            self._exit_with_help(-1, "Both inputs must be grid files or both must be folders.")
+
         vgt.THRESHOLD_COMPARE = self._safe_kwd_float("thresh", self._DEFAULT_COMPARISON_THRESHOLD)
 
+        if self._has_param_kwds("output"):
+            vgt.PATH_COMPARE_REPORT = self._safe_kwd_file_out("output")
+        vgt.NUM_WORKERS = self._safe_kwd_int("jobs", 0)
+
+
+    # --------------------------------------------------------------------------
+    def _parse_mesh(self) -> None:
+        self._set_help_str(
+            "usage: python3 run/vgtools.py mesh [path/input/grid] [options...]",
+            "Available options:",
+            "-h, --help    Show this help message and exit.",
+            "-l, --levels  Isovalues of the isosurfaces to extract. Default: the suggested isovalues of the grid statistics (one per sign of the values).",
+            "-o, --output  File path where to save the mesh. The extension sets the format (.glb, .ply or .obj). " +\
+                          "If several levels are extracted, '.iso_<level>' is added to the name of each file. " +\
+                          "Default: next to the input grid, in the MESH_FORMAT of the config.",
+        )
+        if self._has_param_kwds("help"):
+            self._exit_with_help(0)
+
+        vgt.PATH_MESH_IN = self._safe_path_file_in(
+            self._safe_get_param_pos(1,
+               err_msg = "No input grid file provided. Provide a path to the grid file as second positional argument."
+            )
+        )
+
+        if self._has_param_kwds("output"):
+            vgt.PATH_MESH_OUT = self._safe_kwd_file_out("output")
+
+        if self._has_param_kwds("levels"):
+            vgt.MESH_LEVELS = self._safe_kwd_float_list("levels")
+
+
+    # --------------------------------------------------------------------------
+    def _parse_score(self) -> None:
+        self._set_help_str(
+            "usage: python3 run/vgtools.py score [path/input/pocket.cmap...] [options...]",
+            "Every input is a packed CMAP file with the SMIF grids of a pocket (e.g. a smiffer output in pocket-sphere mode).",
+            "The inputs can be CMAP files, folders (all the CMAP files inside them) or glob patterns, e.g. 'path/**/*.cmap'.",
+            "For every SMIF, the sum of its values inside the pocket and their positive/negative parts are computed,",
+            "together with their scores: their absolute value normalized by the whole grids (see --whole) or by the pocket volume.",
+            "Available options:",
+            "-h, --help      Show this help message and exit.",
+            "-o, --output    File path where to save the CSV table, one row per pocket. Must be provided.",
+            "-w, --whole     Folder with the CMAP files of the whole structures (same file names as the inputs), used to normalize the scores.",
+            "                If not provided, the scores are normalized by the number of points of the pocket.",
+            "-k, --mask      Key suffix of the mask grid inside every CMAP file, whose nonzero points form the pocket. Default is 'trimming'.",
+            "--mask-file     Path to a grid file used as mask for all the inputs, instead of a key of every CMAP file.",
+            "-f, --manifest  Text file with additional input paths, one per line (relative paths are relative to the manifest's folder).",
+            "-j, --jobs      Number of processes used to score several pockets in parallel. Default is 0 (one per CPU).",
+        )
+        if self._has_param_kwds("help"):
+            self._exit_with_help(0)
+
+        specs = list(self._params_pos[1:])
+        if self._has_param_kwds("manifest"):
+            specs = specs + self._read_manifest(self._safe_kwd_file_in("manifest"))
+        if not specs:
+            self._exit_with_help(-1, "No input CMAP file provided. Provide a path to the CMAP file as second positional argument.")
+
+        vgt.PATHS_SCORE_IN = [p for p in self._safe_paths_grids_in(specs) if p.suffix.lower() == ".cmap"]
+        if not vgt.PATHS_SCORE_IN:
+            self._exit_with_help(-1, f"No CMAP files found in: {', '.join(specs)}.")
+
+        vgt.PATH_SCORE_OUT = self._safe_kwd_file_out("output")
+
+        if self._has_param_kwds("whole"):
+            vgt.FOLDER_SCORE_WHOLE = Path(self._safe_get_param_kwd("whole", 0))
+            if not vgt.FOLDER_SCORE_WHOLE.is_dir():
+                self._exit_with_help(-1, f"The specified folder path '{vgt.FOLDER_SCORE_WHOLE}' does not exist.")
+
+        if self._has_param_kwds("mask", "maskfile"):
+            self._exit_with_help(-1, "Provide either a mask key (--mask) or a mask file (--mask-file), not both.")
+
+        if self._has_param_kwds("mask"):
+            vgt.SCORE_MASK = self._safe_get_param_kwd("mask", 0)
+
+        if self._has_param_kwds("maskfile"):
+            vgt.PATH_SCORE_MASK = self._safe_kwd_file_in("maskfile")
+
+        vgt.NUM_WORKERS = self._safe_kwd_int("jobs", 0)
+
+
+    # --------------------------------------------------------------------------
+    def _parse_serve(self) -> None:
+        self._set_help_str(
+            "usage: python3 run/vgtools.py serve [port] [options...]",
+            f"Listen on localhost:[port] (default: {vg.JobServer.DEFAULT_PORT}) for smiffer/veins/vgtools jobs, sent as JSON lines",
+            "with the same arguments of the respective run/*.py scripts (see the JobServer docstring for the protocol).",
+            "The workers keep volgrids imported and reuse kernels, chemical tables, topologies and APBS maps between jobs.",
+            "Available options:",
+            "-h, --help  Show this help message and exit.",
+            "-j, --jobs  Number of worker processes. Default is 0 (one per CPU).",
+        )
+        if self._has_param_kwds("help"):
+            self._exit_with_help(0)
+
+        if self._has_params_pos() and len(self._params_pos) > 1:
+            try:
+                vgt.SERVER_PORT = int(self._params_pos[1])
+            except ValueError:
+                self._exit_with_help(-1, f"The port must be an integer, got '{self._params_pos[1]}'.")
+
+        vgt.NUM_WORKERS = self._safe_kwd_int("jobs", 0)
+
+
+    # --------------------------------------------------------------------------
+    def _safe_paths_grids_in(self, specs: list[str]) -> list[Path]:
+        """Expand the input specifications (grid files, folders or glob patterns) into
+        the list of grid files, without duplicates and keeping their order. Folders and
+        globs only contribute the files with a grid extension (so sidecars are skipped)."""
+        paths = []
+        for spec in specs:
+            if any(c in spec for c in "*?["):
+                matches = sorted(Path(p) for p in glob.glob(spec, recursive = True))
+                if not matches:
+                    self._exit_with_help(-1, f"The glob pattern '{spec}' didn't match any file.")
+                paths.extend(p for p in matches if _is_grid_file(p))
+            elif Path(spec).is_dir():
+                paths.extend(sorted(p for p in Path(spec).iterdir() if _is_grid_file(p)))
+            else:
+                paths.append(self._safe_path_file_in(spec))
+
+        if not paths:
+            self._exit_with_help(-1, f"No grid files found in: {', '.join(specs)}.")
+        return list(dict.fromkeys(paths))
+
+
+    # --------------------------------------------------------------------------
+    def _safe_path_grid_or_folder_in(self, path: str) -> Path:
+        if Path(path).is_dir(): return Path(path)
+        return self._safe_path_file_in(path)
+
+
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def _read_manifest(path_manifest: Path) -> list[str]:
+        """Non-empty lines of a manifest file (lines starting with '#' are ignored)."""
+        specs = []
+        for line in path_manifest.read_text().splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+            path = Path(line)
+            specs.append(str(path if path.is_absolute() else path_manifest.parent / path))
+        return specs
+
 
 # //////////////////////////////////////////////////////////////////////////////
+
+# ------------------------------------------------------------------------------
+def _is_grid_file(path: Path) -> bool:
+    return path.is_file() and (path.suffix.lower() in vg.GridIO.EXTENSIONS)
+
+
+# ------------------------------------------------------------------------------
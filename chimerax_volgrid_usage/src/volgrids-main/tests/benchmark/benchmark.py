@@ -0,0 +1,437 @@
+import os, sys, json, time, shutil, argparse, platform, subprocess, warnings
+from pathlib import Path
+
+import numpy as np
+
+### simulate having "volgrids" installed as a package, as the scripts in "run/"
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+import volgrids as vg
+
+mda = vg.lazy_import("MDAnalysis")
+
+# //////////////////////////////////////////////////////////////////////////////
+class SyntheticSystem:
+    """Protein-like or RNA-like structure of (about) `natoms` heavy atoms, with the residue and atom
+    names of the chemical tables, so that every SMIF has work to do. Residues are placed on a compact
+    globule with the density of a folded macromolecule, in chain order (neighbouring residues are close).
+    The geometry is not realistic, but it's deterministic for a given seed, so runs are comparable."""
+    VOLUME_PER_ATOM = 17.0 # Å^3 per heavy atom of a folded macromolecule
+    POCKET_RADIUS = 12.0   # Å, of the pocket sphere at the center of the globule
+    TRAJ_NOISE = 0.3       # Å, displacement of the atoms between frames
+
+    RESIDUES = {
+        "prot": {
+            "ALA": "N CA C O CB",
+            "ARG": "N CA C O CB CG CD NE CZ NH1 NH2",
+            "ASN": "N CA C O CB CG OD1 ND2",
+            "ASP": "N CA C O CB CG OD1 OD2",
+            "CYS": "N CA C O CB SG",
+            "GLN": "N CA C O CB CG CD OE1 NE2",
+            "GLU": "N CA C O CB CG CD OE1 OE2",
+            "GLY": "N CA C O",
+            "HIS": "N CA C O CB CG ND1 CD2 CE1 NE2",
+            "ILE": "N CA C O CB CG1 CG2 CD1",
+            "LEU": "N CA C O CB CG CD1 CD2",
+            "LYS": "N CA C O CB CG CD CE NZ",
+            "MET": "N CA C O CB CG SD CE",
+            "PHE": "N CA C O CB CG CD1 CD2 CE1 CE2 CZ",
+            "PRO": "N CA C O CB CG CD",
+            "SER": "N CA C O CB OG",
+            "THR": "N CA C O CB OG1 CG2",
+            "TRP": "N CA C O CB CG CD1 CD2 NE1 CE2 CE3 CZ2 CZ3 CH2",
+            "TYR": "N CA C O CB CG CD1 CD2 CE1 CE2 CZ OH",
+            "VAL": "N CA C O CB CG1 CG2",
+        },
+        "rna": {
+            "A": "P OP1 OP2 O5' C5' C4' O4' C3' O3' C2' O2' C1' N9 C8 N7 C5 C6 N6 N1 C2 N3 C4",
+            "G": "P OP1 OP2 O5' C5' C4' O4' C3' O3' C2' O2' C1' N9 C8 N7 C5 C6 O6 N1 C2 N2 N3 C4",
+            "C": "P OP1 OP2 O5' C5' C4' O4' C3' O3' C2' O2' C1' N1 C2 O2 N3 C4 N4 C5 C6",
+            "U": "P OP1 OP2 O5' C5' C4' O4' C3' O3' C2' O2' C1' N1 C2 O2 N3 C4 O4 C5 C6",
+        },
+    }
+
+    def __init__(self, moltype: str, natoms: int, seed: int = 0):
+        if moltype not in SyntheticSystem.RESIDUES:
+            raise ValueError(f"Unknown moltype '{moltype}'. Use one of: {', '.join(SyntheticSystem.RESIDUES)}.")
+        self.moltype = moltype
+        self.natoms = natoms
+        self.seed = seed
+        self.name = f"{moltype}_{natoms}"
+
+
+    # --------------------------------------------------------------------------
+    def write(self, folder: Path, nframes: int = 0) -> tuple[Path, Path | None]:
+        """Write the structure as PDB (and a trajectory of `nframes` frames as XTC, if any) in `folder`.
+        Files written before with the same parameters are reused."""
+        folder.mkdir(parents = True, exist_ok = True)
+        path_pdb = folder / f"{self.name}.pdb"
+        path_xtc = folder / f"{self.name}_{nframes}f.xtc" if nframes else None
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore") # e.g. no unit cell, or resids/serials wrapped in big systems
+            if not path_pdb.exists():
+                self._make_universe().atoms.write(str(path_pdb))
+
+            if (path_xtc is not None) and not path_xtc.exists():
+                universe = mda.Universe(str(path_pdb))
+                positions = universe.atoms.positions.copy()
+                rng = np.random.default_rng(self.seed + 1)
+                with mda.Writer(str(path_xtc), universe.atoms.n_atoms) as writer:
+                    for _ in range(nframes):
+                        universe.atoms.positions = positions + rng.normal(0, SyntheticSystem.TRAJ_NOISE, positions.shape)
+                        writer.write(universe.atoms)
+
+        return path_pdb, path_xtc
+
+
+    # --------------------------------------------------------------------------
+    def _make_universe(self) -> "mda.Universe":
+        rng = np.random.default_rng(self.seed)
+        templates = {resname: names.split() for resname, names in SyntheticSystem.RESIDUES[self.moltype].items()}
+        offsets = {resname: _get_template_offsets(len(names), rng) for resname, names in templates.items()}
+
+        ### residues until the requested number of atoms is reached (the last one may be cut)
+        atoms_per_res = np.mean([len(names) for names in templates.values()])
+        choices = rng.choice(list(templates), size = self.natoms // min(map(len, templates.values())) + 1)
+        resnames, sizes, total = [], [], 0
+        for resname in choices:
+            if total >= self.natoms: break
+            size = min(len(templates[resname]), self.natoms - total)
+            resnames.append(resname); sizes.append(size); total += size
+        nres = len(resnames)
+
+        centers = _get_globule_centers(nres, (atoms_per_res * SyntheticSystem.VOLUME_PER_ATOM) ** (1/3), rng)
+        rotations = _get_random_rotations(nres, rng)
+
+        names = [name for resname, size in zip(resnames, sizes) for name in templates[resname][:size]]
+        positions = np.concatenate([
+            offsets[resname][:size] @ rot.T + center
+            for resname, size, rot, center in zip(resnames, sizes, rotations, centers)
+        ])
+
+        universe = mda.Universe.empty(
+            self.natoms, n_residues = nres, n_segments = 1,
+            atom_resindex = np.repeat(np.arange(nres), sizes), trajectory = True,
+        )
+        universe.add_TopologyAttr("name", names)
+        universe.add_TopologyAttr("type", [name[0] for name in names])
+        universe.add_TopologyAttr("element", [name[0] for name in names])
+        universe.add_TopologyAttr("resname", resnames)
+        universe.add_TopologyAttr("resid", np.arange(1, nres + 1))
+        universe.add_TopologyAttr("chainID", ["A"] * self.natoms)
+        universe.add_TopologyAttr("segid", ["A"])
+        universe.atoms.positions = positions
+        return universe
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class BenchmarkCase:
+    """One run of `run/smiffer.py` for a synthetic system, grid spacing and mode ("whole", "ps" or "traj")."""
+    MODES = ("whole", "ps", "traj")
+
+    def __init__(self, system: SyntheticSystem, delta: float, mode: str, nframes: int):
+        if mode not in BenchmarkCase.MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Use one of: {', '.join(BenchmarkCase.MODES)}.")
+        self.system = system
+        self.delta = delta
+        self.mode = mode
+        self.nframes = nframes if (mode == "traj") else 0
+        self.key = f"{system.moltype}-{system.natoms}-{mode}-d{delta:g}"
+
+
+    # --------------------------------------------------------------------------
+    def run(self, folder_work: Path, repeats: int) -> dict:
+        """Best time (of `repeats` runs) of the whole app and of every step of its profile."""
+        path_pdb, path_xtc = self.system.write(folder_work / "_input", self.nframes)
+        folder_out = folder_work / self.key
+        path_config = folder_work / f"delta_{self.delta:g}.ini"
+        path_config.write_text(
+            f"[VOLGRIDS]\nGRID_DX = {self.delta}\nGRID_DY = {self.delta}\nGRID_DZ = {self.delta}\n"
+        )
+
+        cmd = [sys.executable, "run/smiffer.py", self.system.moltype, str(path_pdb), "-o", str(folder_out), "-c", str(path_config)]
+        if self.mode == "ps":
+            cmd += ["-rxyz", str(SyntheticSystem.POCKET_RADIUS), *(f"{c:.3f}" for c in _get_center(path_pdb))]
+        if self.mode == "traj":
+            cmd += ["-t", str(path_xtc)]
+        cmd += ["--profile", str(folder_out / "profile.json")]
+
+        result = {
+            "moltype": self.system.moltype, "natoms": self.system.natoms, "delta": self.delta,
+            "mode": self.mode, "frames": self.nframes, "repeats": repeats,
+        }
+        runs = []
+        for _ in range(repeats):
+            shutil.rmtree(folder_out, ignore_errors = True)
+            folder_out.mkdir(parents = True)
+            if path_xtc is not None: # offsets cached by MDAnalysis would only speed up the next repeats
+                for path in path_xtc.parent.glob(f".{path_xtc.name}*"): path.unlink()
+
+            t0 = time.perf_counter()
+            proc = subprocess.run(cmd, cwd = ROOT, capture_output = True, text = True, stdin = subprocess.DEVNULL)
+            app_s = time.perf_counter() - t0
+            if proc.returncode != 0:
+                result["error"] = (proc.stderr or proc.stdout).strip().splitlines()[-1:]
+                return result
+
+            with open(folder_out / "profile.json") as file:
+                profile = json.load(file)
+            runs.append((app_s, profile, proc.stdout))
+
+        app_s, profile, stdout = min(runs, key = lambda run: run[0])
+        result["app_s"] = min(run[0] for run in runs)
+        result["profile_wall_s"] = min(run[1]["wall_s"] for run in runs)
+        result["peak_rss_bytes"] = profile["peak_rss_bytes"]
+        result["grid_points"] = profile["counters"].get("grid_points")
+        result["memory_plan"] = next((line.split("Memory plan:", 1)[1].strip() for line in stdout.splitlines() if "Memory plan:" in line), None)
+        result["counters"] = profile["counters"]
+        result["timings"] = {
+            path: min(_get_timings(run[1]).get(path, np.inf) for run in runs)
+            for path in _get_timings(profile)
+        }
+        return result
+
+
+# //////////////////////////////////////////////////////////////////////////////
+class BenchmarkReport:
+    """Comparison of two result files of `benchmark.py run`, e.g. of two commits. A metric is a regression
+    if the new value exceeds the base one by more than `tolerance` (a fraction); times shorter than
+    `min_seconds` in both files are considered noise."""
+    def __init__(self, base: dict, new: dict, tolerance: float, min_seconds: float):
+        self.base = base
+        self.new = new
+        self.tolerance = tolerance
+        self.min_seconds = min_seconds
+        self.rows: list[dict] = []
+        self._compare()
+
+
+    # --------------------------------------------------------------------------
+    @property
+    def regressions(self) -> list[dict]:
+        return [row for row in self.rows if row["status"] in ("slower", "more memory", "failed")]
+
+
+    # --------------------------------------------------------------------------
+    def print(self) -> None:
+        print(f"Base: {_describe_results(self.base)}")
+        print(f"New:  {_describe_results(self.new)}")
+        print(f"Tolerance: {self.tolerance:.0%} (times under {self.min_seconds}s are ignored)\n")
+        print(f"{'case':<28} {'metric':<36} {'base':>10} {'new':>10} {'ratio':>7}  status")
+        for row in self.rows:
+            if row["status"] == "ok": continue
+            str_base, str_new = _format_value(row["base"], row["metric"]), _format_value(row["new"], row["metric"])
+            str_ratio = '-' if (row["ratio"] is None) else f"{row['ratio']:.2f}"
+            print(f"{row['case']:<28} {row['metric']:<36} {str_base:>10} {str_new:>10} {str_ratio:>7}  {row['status']}")
+
+        counts = {}
+        for row in self.rows: counts[row["status"]] = counts.get(row["status"], 0) + 1
+        print(f"\n{len(self.rows)} metrics compared: {', '.join(f'{n} {status}' for status, n in sorted(counts.items()))}.")
+
+
+    # --------------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        return {
+            "base": _describe_results(self.base), "new": _describe_results(self.new),
+            "tolerance": self.tolerance, "min_seconds": self.min_seconds,
+            "regressions": len(self.regressions), "rows": self.rows,
+        }
+
+
+    # --------------------------------------------------------------------------
+    def _compare(self) -> None:
+        cases_base, cases_new = self.base["cases"], self.new["cases"]
+        for key in sorted(set(cases_base) | set(cases_new)):
+            case_base, case_new = cases_base.get(key), cases_new.get(key)
+            if case_base is None: self._add(key, '-', None, None, "new case"); continue
+            if case_new  is None: self._add(key, '-', None, None, "missing case"); continue
+            if "error" in case_new:
+                self._add(key, '-', None, None, "failed" if ("error" not in case_base) else "failed in both")
+                continue
+            if "error" in case_base: self._add(key, '-', None, None, "fixed"); continue
+
+            if case_base.get("grid_points") != case_new.get("grid_points"):
+                self._add(key, "grid_points", case_base.get("grid_points"), case_new.get("grid_points"), "grid changed")
+
+            self._add_metric(key, "app_s", case_base["app_s"], case_new["app_s"])
+            self._add_metric(key, "peak_rss_bytes", case_base["peak_rss_bytes"], case_new["peak_rss_bytes"])
+            timings_base, timings_new = case_base["timings"], case_new["timings"]
+            for path in sorted(set(timings_base) | set(timings_new)):
+                self._add_metric(key, path, timings_base.get(path), timings_new.get(path))
+
+
+    # --------------------------------------------------------------------------
+    def _add_metric(self, case: str, metric: str, value_base: float, value_new: float) -> None:
+        if value_base is None: return self._add(case, metric, None, value_new, "new step")
+        if value_new  is None: return self._add(case, metric, value_base, None, "missing step")
+
+        is_time = metric != "peak_rss_bytes"
+        ratio = value_new / value_base if value_base else None
+        if is_time and max(value_base, value_new) < self.min_seconds:
+            status = "ok"
+        elif (ratio is not None) and (ratio > 1 + self.tolerance):
+            status = "slower" if is_time else "more memory"
+        elif (ratio is not None) and (ratio < 1 - self.tolerance):
+            status = "faster" if is_time else "less memory"
+        else:
+            status = "ok"
+        self._add(case, metric, value_base, value_new, status, ratio)
+
+
+    # --------------------------------------------------------------------------
+    def _add(self, case: str, metric: str, value_base, value_new, status: str, ratio: float = None) -> None:
+        self.rows.append({"case": case, "metric": metric, "base": value_base, "new": value_new, "ratio": ratio, "status": status})
+
+
+# ------------------------------------------------------------------------------
+def _get_template_offsets(natoms: int, rng: np.random.Generator) -> np.ndarray:
+    """Atom positions of a residue template: a random walk of bond-like steps, centered."""
+    steps = rng.normal(size = (natoms, 3))
+    steps *= 1.45 / np.linalg.norm(steps, axis = 1, keepdims = True)
+    offsets = np.cumsum(steps, axis = 0)
+    return offsets - offsets.mean(axis = 0)
+
+
+# ------------------------------------------------------------------------------
+def _get_globule_centers(nres: int, spacing: float, rng: np.random.Generator) -> np.ndarray:
+    """Centers of `nres` residues: the points of a cubic lattice closest to the origin, in serpentine
+    order (so that consecutive residues are neighbours), with some noise."""
+    radius = spacing * (3 * nres / (4 * np.pi)) ** (1/3)
+    n = int(np.ceil(radius / spacing)) + 1
+    idx = np.stack(np.meshgrid(*(np.arange(-n, n + 1),) * 3, indexing = "ij"), axis = -1).reshape(-1, 3)
+    idx = idx[np.argsort(np.linalg.norm(idx, axis = 1), kind = "stable")[:nres]]
+
+    ix, iy, iz = idx.T
+    iy_serp = np.where(ix % 2 == 0, iy, -iy)
+    iz_serp = np.where((ix + iy) % 2 == 0, iz, -iz)
+    idx = idx[np.lexsort((iz_serp, iy_serp, ix))]
+    return idx * spacing + rng.normal(0, 0.1 * spacing, idx.shape)
+
+
+# ------------------------------------------------------------------------------
+def _get_random_rotations(n: int, rng: np.random.Generator) -> np.ndarray:
+    """`n` random rotation matrices (from normalized random quaternions)."""
+    q = rng.normal(size = (n, 4))
+    w, x, y, z = (q / np.linalg.norm(q, axis = 1, keepdims = True)).T
+    return np.stack([
+        np.stack([1 - 2*(y*y + z*z), 2*(x*y - z*w), 2*(x*z + y*w)], axis = -1),
+        np.stack([2*(x*y + z*w), 1 - 2*(x*x + z*z), 2*(y*z - x*w)], axis = -1),
+        np.stack([2*(x*z - y*w), 2*(y*z + x*w), 1 - 2*(x*x + y*y)], axis = -1),
+    ], axis = 1)
+
+
+# ------------------------------------------------------------------------------
+def _get_center(path_pdb: Path) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return mda.Universe(str(path_pdb)).atoms.center_of_geometry()
+
+
+# ------------------------------------------------------------------------------
+def _get_timings(profile: dict) -> dict[str, float]:
+    """Total seconds of every step of a profile, by path without the levels that depend on the
+    mode (e.g. "run/frame/smif.stacking/stamping" -> "smif.stacking/stamping")."""
+    timings = {}
+    for path, entry in profile["summary"].items():
+        *parents, name = path.split('/')
+        key = '/'.join([p for p in parents if p not in ("run", "frame")] + [name])
+        timings[key] = timings.get(key, 0.0) + entry["total_s"]
+    return timings
+
+
+# ------------------------------------------------------------------------------
+def _get_commit() -> dict:
+    def git(*args):
+        proc = subprocess.run(["git", *args], cwd = ROOT, capture_output = True, text = True)
+        return proc.stdout.strip() if (proc.returncode == 0) else None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": None if (status is None) else bool(status)}
+
+
+# ------------------------------------------------------------------------------
+def _describe_results(results: dict) -> str:
+    commit = results.get("commit") or "unknown commit"
+    if results.get("dirty"): commit += " (dirty)"
+    return f"{commit}, {results['host']['platform']}, {results['host']['cpus']} CPUs, {len(results['cases'])} cases"
+
+
+# ------------------------------------------------------------------------------
+def _format_value(value, metric: str) -> str:
+    if value is None: return '-'
+    if metric == "peak_rss_bytes": return f"{value/1e6:.1f}MB"
+    if metric == "grid_points": return f"{value/1e6:.2f}M"
+    return f"{value:.3f}s"
+
+
+# ------------------------------------------------------------------------------
+def _run(args: argparse.Namespace) -> None:
+    folder_work = Path(args.work).resolve()
+    results = {
+        **_get_commit(), "started": time.time(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": vg.get_num_cpus()},
+        "settings": {k: v for k, v in vars(args).items() if k not in ("func", "output", "work")},
+        "cases": {},
+    }
+    path_out = Path(args.output or folder_work / f"{results['commit'] or 'results'}.json")
+    path_out.parent.mkdir(parents = True, exist_ok = True)
+
+    for moltype in args.moltypes:
+        for natoms in args.sizes:
+            system = SyntheticSystem(moltype, natoms, args.seed)
+            for delta in args.deltas:
+                for mode in args.modes:
+                    case = BenchmarkCase(system, delta, mode, args.frames)
+                    print(f">>> {case.key}", end = ' ', flush = True)
+                    result = results["cases"][case.key] = case.run(folder_work, args.repeats)
+                    if "error" in result:
+                        print(f"FAILED: {' '.join(result['error'])}", flush = True)
+                    else:
+                        print(f"{result['app_s']:.2f}s, {(result['grid_points'] or 0)/1e6:.2f}M points", flush = True)
+
+                    ### saved after every case, so that long runs can be inspected (or compared) before they end
+                    with open(path_out, 'w') as file:
+                        json.dump(results, file, indent = 2)
+    print(f">>> Results saved: {path_out}")
+
+
+# ------------------------------------------------------------------------------
+def _compare(args: argparse.Namespace) -> None:
+    with open(args.base) as file: base = json.load(file)
+    with open(args.new)  as file: new  = json.load(file)
+    report = BenchmarkReport(base, new, args.tolerance, args.min_seconds)
+    report.print()
+    if args.report is not None:
+        with open(args.report, 'w') as file:
+            json.dump(report.to_dict(), file, indent = 2)
+    if report.regressions: sys.exit(f"{len(report.regressions)} regressions beyond the tolerance.")
+
+
+# ------------------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Scaling benchmark of smiffer with synthetic protein-like and RNA-like systems.")
+    subparsers = parser.add_subparsers(required = True)
+
+    parser_run = subparsers.add_parser("run", help = "Run the benchmark and save the results as JSON.")
+    parser_run.add_argument("--sizes", type = int, nargs = '+', default = [1000, 10000, 100000, 1000000], help = "Number of atoms of the synthetic systems.")
+    parser_run.add_argument("--deltas", type = float, nargs = '+', default = [0.5, 0.25], help = "Grid spacings (GRID_DX, GRID_DY, GRID_DZ) in Å.")
+    parser_run.add_argument("--modes", nargs = '+', default = list(BenchmarkCase.MODES), choices = BenchmarkCase.MODES)
+    parser_run.add_argument("--moltypes", nargs = '+', default = list(SyntheticSystem.RESIDUES), choices = list(SyntheticSystem.RESIDUES))
+    parser_run.add_argument("--frames", type = int, default = 3, help = "Frames of the trajectories of 'traj' mode.")
+    parser_run.add_argument("--repeats", type = int, default = 1, help = "Runs of each case; the best times are kept.")
+    parser_run.add_argument("--seed", type = int, default = 0)
+    parser_run.add_argument("-w", "--work", default = "testdata/benchmark", help = "Folder of the synthetic inputs (reused between runs) and the outputs.")
+    parser_run.add_argument("-o", "--output", help = "Results file (default: '[work]/[commit].json').")
+    parser_run.set_defaults(func = _run)
+
+    parser_cmp = subparsers.add_parser("compare", help = "Compare two results files, e.g. of two commits.")
+    parser_cmp.add_argument("base")
+    parser_cmp.add_argument("new")
+    parser_cmp.add_argument("--tolerance", type = float, default = 0.10, help = "Relative change considered significant (default: 0.10).")
+    parser_cmp.add_argument("--min-seconds", type = float, default = 0.05, help = "Times under this in both files are ignored (default: 0.05).")
+    parser_cmp.add_argument("--report", help = "Also save the comparison as JSON.")
+    parser_cmp.set_defaults(func = _compare)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,30 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> BENCHMARK: Scaling of smiffer with synthetic protein-like and RNA-like systems"
+
+### the matrix can be reduced for quick checks, e.g. BENCH_SIZES="1000 10000" BENCH_DELTAS=0.5 tests/benchmark/run.sh
+### set BENCH_BASELINE to the results of another commit to get a tolerance report
+BENCH_SIZES=${BENCH_SIZES:-"1000 10000 100000 1000000"}
+BENCH_DELTAS=${BENCH_DELTAS:-"0.5 0.25"}
+BENCH_MODES=${BENCH_MODES:-"whole ps traj"}
+BENCH_MOLTYPES=${BENCH_MOLTYPES:-"prot rna"}
+BENCH_FRAMES=${BENCH_FRAMES:-3}
+BENCH_REPEATS=${BENCH_REPEATS:-1}
+BENCH_TOLERANCE=${BENCH_TOLERANCE:-0.10}
+BENCH_BASELINE=${BENCH_BASELINE:-}
+
+fout="testdata/benchmark"
+commit=$(git rev-parse --short HEAD 2> /dev/null || echo "results")
+fresults="$fout/$commit.json"
+
+# shellcheck disable=SC2086
+python3 tests/benchmark/benchmark.py run -w $fout -o "$fresults" \
+    --sizes $BENCH_SIZES --deltas $BENCH_DELTAS --modes $BENCH_MODES --moltypes $BENCH_MOLTYPES \
+    --frames "$BENCH_FRAMES" --repeats "$BENCH_REPEATS"
+
+if [ -n "$BENCH_BASELINE" ]; then
+    python3 tests/benchmark/benchmark.py compare "$BENCH_BASELINE" "$fresults" \
+        --tolerance "$BENCH_TOLERANCE" --report "$fout/$commit.report.json"
+fi
@@ -4,6 +4,7 @@ set -eu
 folder_env="testdata/env"
 folder_smiffer="testdata/smiffer"
 folder_vgtools="testdata/vgtools"
+folder_bench="testdata/benchmark"
 
 folder00="$folder_smiffer/toy_systems"
 folder01="$folder_smiffer/pocket_sphere"
@@ -14,15 +15,27 @@ folder04p="$folder_vgtools/packing"
 folder04u="$folder_vgtools/unpacking"
 folder04f="$folder_vgtools/fix_cmap"
 folder05="$folder_smiffer/ligand"
+folder06="$folder_smiffer/batch"
+folder07="$folder_smiffer/threads"
+folder08="$folder_smiffer/in_memory"
+folder09="$folder_smiffer/memory_plan"
+folder10="$folder_smiffer/profile"
 
 rm -rf $folder_env $folder00 $folder01 $folder02
 rm  -f $folder03/*.cmap
 
 rm -f $folder04c/dx* $folder04c/mrc* $folder04c/ccp4* $folder04c/cmap*
-rm -f $folder04p/2esj.cmap
+rm -rf $folder04c/batch_* $folder04c/report_batch.json
+rm -f $folder04p/2esj.cmap $folder04p/2esj.resampled.cmap $folder04p/report_series.csv
 rm -f $folder04u/1iqj.*.cmap
 rm -f $folder04f/hbdonors.fixed.cmap
+rm -f $folder_vgtools/scores.csv
+rm -rf $folder_vgtools/serve
 
 rm -f $folder05/*.cmap
+rm -rf $folder06 $folder07 $folder08 $folder09 $folder10
+
+### the synthetic inputs and the results of the benchmark are kept
+find $folder_bench -mindepth 1 -maxdepth 1 -type d ! -name _input -exec rm -rf {} + 2> /dev/null || true
 
 clear
@@ -0,0 +1,43 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST ENV 2: Startup time of the entry points (heavy dependencies must be loaded lazily)"
+
+### budgets in seconds, can be overridden e.g. for slow CI machines
+export BUDGET_SMIFFER=${BUDGET_SMIFFER:-0.8}
+export BUDGET_VGTOOLS=${BUDGET_VGTOOLS:-0.8}
+export BUDGET_VEINS=${BUDGET_VEINS:-0.8}
+export STARTUP_REPEATS=${STARTUP_REPEATS:-5}
+
+python3 - <<- EOM
+import os, sys, time, subprocess
+
+failed = []
+for name in ("smiffer", "vgtools", "veins"):
+    budget = float(os.environ[f"BUDGET_{name.upper()}"])
+    best = float("inf")
+    for _ in range(int(os.environ["STARTUP_REPEATS"])):
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, f"run/{name}.py", "--help"],
+            check = True, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL,
+        )
+        best = min(best, time.perf_counter() - t0)
+
+    ### none of the heavy dependencies should be needed just to get the app ready
+    probe = (
+        f"import sys; sys.path.insert(0, 'src'); import volgrids.{name}; "
+        "print(','.join(m for m in ('MDAnalysis', 'scipy.ndimage', 'pandas', 'h5py', 'gridData') "
+        "if m in sys.modules and not type(sys.modules[m]).__name__.startswith('_Lazy')))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", probe], check = True, capture_output = True, text = True
+    ).stdout.strip()
+
+    status = "ok" if (best <= budget) and not loaded else "FAILED"
+    print(f"{name:<8} {best:.3f}s (budget: {budget:.3f}s) eagerly loaded: {loaded or '-'} [{status}]")
+    if status != "ok": failed.append(name)
+
+if failed: sys.exit(f"Startup budget exceeded by: {', '.join(failed)}")
+EOM
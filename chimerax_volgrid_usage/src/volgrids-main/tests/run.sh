@@ -2,16 +2,24 @@
 set -eu
 
 tests/env/vgtest.sh
+tests/env/startup.sh
 
 tests/smiffer/toy_systems.sh
 tests/smiffer/pocket_sphere.sh
 tests/smiffer/whole.sh
 tests/smiffer/traj.sh
 tests/smiffer/ligand.sh
+tests/smiffer/batch.sh
+tests/smiffer/threads.sh
+tests/smiffer/in_memory.sh
+tests/smiffer/memory_plan.sh
+tests/smiffer/profile.sh
 
 tests/vgtools/convert.sh
 tests/vgtools/pack_unpack.sh
 tests/vgtools/fix_cmap.sh
 tests/vgtools/compare.sh
+tests/vgtools/score.sh
+tests/vgtools/serve.sh
 
 echo "All tests completed successfully."
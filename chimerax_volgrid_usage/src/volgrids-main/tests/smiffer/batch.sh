@@ -0,0 +1,24 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST SMIFFER 5: Benchmark, Whole mode, all the structures in a single batch run"
+
+fapbs="testdata/_input/apbs"
+fpdb="testdata/_input/pdb-nosolv"
+fout="testdata/smiffer/batch"
+rm -rf $fout; mkdir -p $fout
+
+fmanifest="$fout/manifest.csv"
+echo "structure,moltype,apbs" > $fmanifest
+
+prots=(1bg0 1eby 1ehe 1h7l 1iqj 1ofz 3dd0 3ee4 5m9w 6e9a)
+rnas=(1akx 1i9v 2esj 4f8u 5bjo 5kx9 6tf3 7oax0 7oax1 8eyv)
+for name in "${prots[@]}"; do
+    echo "$fpdb/$name.pdb,prot,$fapbs/$name.pdb.mrc" >> $fmanifest
+done
+for name in "${rnas[@]}"; do
+    echo "$fpdb/$name.pdb,rna,$fapbs/$name.pdb.mrc" >> $fmanifest
+done
+
+python3 run/smiffer.py batch $fmanifest -o $fout
@@ -0,0 +1,51 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST SMIFFER 7: SMIFs computed in memory (library API), compared to the ones saved by the app"
+
+fpdb="testdata/_input/toy_systems/peptide.pdb"
+fout="testdata/smiffer/in_memory"
+rm -rf $fout; mkdir -p $fout
+printf "[VOLGRIDS]\nOUTPUT_FORMAT=vg.GridFormat.NPY\n" > $fout/npy.ini
+
+python3 run/smiffer.py prot $fpdb -o $fout -c $fout/npy.ini
+
+python3 - <<- EOM
+import sys, threading
+from pathlib import Path
+sys.path.insert(0, "src")
+import numpy as np
+import volgrids as vg
+import volgrids.smiffer as sm
+
+ctx = sm.AppSmiffer.make_context()
+ctx.sm.CURRENT_MOLTYPE = sm.MolType.PROT
+ms = sm.MolSystemSmiffer(Path("$fpdb"), ctx = ctx)
+grids = sm.SmifOperations.compute_smifs(ms)
+assert grids, "no grids computed"
+
+with ctx.activate():
+    for title, grid in grids.items():
+        saved = vg.GridIO.read_npy(Path("$fout") / f"peptide.{title}.npy")
+        ### same criterion as "vgtools compare": no point differing by more than its default threshold
+        status = "ok" if np.allclose(np.asarray(saved.grid), grid.grid, rtol = 0, atol = 1e-5) else "FAILED"
+        print(f"...>>> {title}: {status}")
+        assert status == "ok"
+
+    ### a grid queued for the background writer is read-only until it's written
+    vg.GRID_WRITER = vg.GridWriter(1)
+    busy = threading.Event()
+    vg.GRID_WRITER.submit(busy.wait) # the writer waits, so the grid stays queued
+    grid = grids["stacking"]
+    grid.save_data(Path("$fout"), "queued")
+    try:
+        grid.grid[0,0,0] = 0
+        status = "FAILED (modified while queued)"
+    except ValueError:
+        busy.set()
+        vg.GRID_WRITER.close()
+        status = "ok" if grid.grid.flags.writeable else "FAILED (still read-only)"
+    print(f"...>>> queued grid is read-only: {status}")
+    assert status == "ok"
+EOM
@@ -0,0 +1,57 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST SMIFFER 8: memory plan for a small MEMORY_BUDGET (must not wait for input)"
+
+fpdb="testdata/_input/toy_systems/peptide.pdb"
+fout="testdata/smiffer/memory_plan"
+rm -rf $fout; mkdir -p $fout
+printf "[VOLGRIDS]\nMEMORY_BUDGET=0.004\n" > $fout/budget.ini
+
+python3 run/smiffer.py prot $fpdb -o $fout -c $fout/budget.ini < /dev/null | tee $fout/log.txt
+grep -q "Memory plan:.*float16.*coarser deltas" $fout/log.txt
+
+printf "[VOLGRIDS]\nMEMORY_BUDGET=0.004\nOUTPUT_FORMAT=vg.GridFormat.NPY\n" > $fout/budget_npy.ini
+python3 run/smiffer.py prot $fpdb -o $fout -c $fout/budget_npy.ini < /dev/null > /dev/null
+
+python3 - <<- EOM
+import sys
+from pathlib import Path
+sys.path.insert(0, "src")
+import numpy as np
+import volgrids as vg
+import volgrids.smiffer as sm
+
+### chunked trimming gives the same masks
+ctx = sm.AppSmiffer.make_context()
+ctx.sm.CURRENT_MOLTYPE = sm.MolType.PROT
+ctx.sm.PS_INFO = (6.0, 0.0, 0.0, 0.0)
+masks = []
+for chunk_points in (0, 1000):
+    ms = sm.MolSystemSmiffer(Path("$fpdb"), ctx = ctx)
+    ms.memory_plan.chunk_points = chunk_points
+    with ctx.activate():
+        trimmer = sm.Trimmer.init_infer_dists(ms)
+        trimmer.trim()
+    masks.append(trimmer.get_mask("mid").grid)
+status = "ok" if np.array_equal(*masks) else "FAILED"
+print(f"...>>> chunked trimming: {status}")
+assert status == "ok"
+
+### the float16 grids of the plan are still written as FLOAT_DTYPE
+dtypes = {np.load(path, mmap_mode = "r").dtype for path in Path("$fout").glob("*.npy")} - {np.dtype(bool)} # the trimming masks
+status = "ok" if dtypes == {np.dtype(ctx.vg.FLOAT_DTYPE)} else "FAILED"
+print(f"...>>> npy files written as FLOAT_DTYPE: {status} ({', '.join(map(str, dtypes))})")
+assert status == "ok"
+
+### without an explicit MEMORY_BUDGET (its share is tiny here), only the actions that keep the results are taken
+ctx.vg.MEMORY_BUDGET = 0
+ctx.vg.MEMORY_BUDGET_SHARES = 10**9
+ms = sm.MolSystemSmiffer(Path("$fpdb"), ctx = ctx)
+plan = ms.memory_plan
+status = "ok" if (not plan.fits) and (plan.dtype == ctx.vg.FLOAT_DTYPE) and \
+    not any(a.startswith(("float16", "coarser")) for a in plan.actions) else "FAILED"
+print(f"...>>> default budget keeps the results: {status} ({plan.describe()})")
+assert status == "ok"
+EOM
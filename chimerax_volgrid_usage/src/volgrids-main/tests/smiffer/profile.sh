@@ -0,0 +1,66 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST SMIFFER 9: --profile exports the spans and counters of the run"
+
+fpdb="testdata/_input/toy_systems/peptide.pdb"
+fout="testdata/smiffer/profile"
+rm -rf $fout; mkdir -p $fout
+
+python3 run/smiffer.py prot $fpdb -o $fout --profile $fout/profile.json
+
+python3 - <<- EOM
+import json
+
+with open("$fout/profile.json") as file:
+    profile = json.load(file)
+with open("$fout/profile.trace.json") as file:
+    trace = json.load(file)
+
+checks = {
+    "config span":   "config" in profile["summary"],
+    "trimming span": "run/trimming/occupancy" in profile["summary"],
+    "smif spans":    "run/smif.stacking/stamping" in profile["summary"],
+    "stamps":        profile["counters"].get("particles_stamped", 0) > 0,
+    "bytes written": profile["counters"].get("bytes_written", 0) > 0,
+    "chrome trace":  any(e["ph"] == "X" for e in trace["traceEvents"]),
+}
+for name, ok in checks.items():
+    print(f"...>>> {name}: {'ok' if ok else 'FAILED'}")
+assert all(checks.values())
+EOM
+
+
+echo
+echo ">>> TEST SMIFFER 10: the memory plan estimates the peak RSS of the run"
+
+### small deltas, so that the grids and kernels dominate the RSS of the interpreter and libraries,
+### and synchronous writes, so that the grids held by the writer don't depend on the speed of the disk
+printf "[VOLGRIDS]\nGRID_DX=0.1\nGRID_DY=0.1\nGRID_DZ=0.1\nUSE_FIXED_DELTAS=true\nWRITER_QUEUE_SIZE=0\n" > $fout/fine.ini
+python3 run/smiffer.py prot $fpdb -o $fout -c $fout/fine.ini --profile $fout/profile_fine.json
+
+python3 - <<- EOM
+import sys, json
+from pathlib import Path
+sys.path.insert(0, "src")
+import volgrids.smiffer as sm
+
+with open("$fout/profile_fine.json") as file:
+    profile = json.load(file)
+
+### the RSS of the run is measured from the end of the topology span (libraries imported, structure loaded)
+span = next(s for s in profile["spans"] if s["path"] == "topology")
+t_topology = span["start_s"] + span["duration_s"]
+rss_before = max(rss for t,rss in profile["rss_samples"] if t <= t_topology)
+rss_run = profile["peak_rss_bytes"] - rss_before
+
+ctx = sm.AppSmiffer.make_context(Path("$fout/fine.ini"))
+ctx.sm.CURRENT_MOLTYPE = sm.MolType.PROT
+plan = sm.MolSystemSmiffer(Path("$fpdb"), ctx = ctx).memory_plan
+
+ratio = plan.peak / rss_run
+status = "ok" if 0.75 <= ratio <= 1.5 else "FAILED"
+print(f"...>>> estimate {plan.peak/1e6:.1f} MB, peak RSS of the run {rss_run/1e6:.1f} MB: {status}")
+assert status == "ok"
+EOM
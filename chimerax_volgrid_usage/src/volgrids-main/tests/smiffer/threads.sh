@@ -0,0 +1,46 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST SMIFFER 6: Apps with different arguments and configs, run at the same time in threads of one process"
+
+fpdb="testdata/_input/toy_systems/peptide.pdb"
+fout="testdata/smiffer/threads"
+rm -rf $fout; mkdir -p $fout/whole $fout/pocket $fout/whole_seq
+printf "[VOLGRIDS]\nOUTPUT_FORMAT=vg.GridFormat.MRC\n" > $fout/mrc.ini
+
+python3 run/smiffer.py prot $fpdb -o $fout/whole_seq
+
+python3 - <<- EOM
+import sys, threading
+sys.path.insert(0, "src")
+import volgrids.smiffer as sm
+
+jobs = [
+    ["prot", "$fpdb", "-o", "$fout/whole"],
+    ["prot", "$fpdb", "-o", "$fout/pocket", "-rxyz", "6", "8", "5", "0", "-c", "$fout/mrc.ini"],
+]
+errors = []
+def run(args):
+    try: sm.AppSmiffer.from_cli(args).run()
+    except BaseException as e: errors.append(e)
+
+threads = [threading.Thread(target = run, args = (args,)) for args in jobs]
+for thread in threads: thread.start()
+for thread in threads: thread.join()
+if errors: raise errors[0]
+
+### each app must have used its own output folder and format, and left the module defaults untouched
+from pathlib import Path
+assert sorted(p.name for p in Path("$fout/whole").iterdir()) == ["peptide.cmap"]
+assert any(p.suffix == ".mrc" for p in Path("$fout/pocket").iterdir())
+assert sm.FOLDER_OUT is None and sm.PS_INFO is None
+
+### an app created in this thread is its current context only while it's initialized or run
+app = sm.AppSmiffer.from_cli(["prot", "$fpdb", "-o", "$fout/whole_seq"])
+assert (sm.FOLDER_OUT is None) and (app.ctx.sm.FOLDER_OUT is not None)
+app.run()
+assert sm.FOLDER_OUT is None
+EOM
+
+python3 run/vgtools.py compare $fout/whole/peptide.cmap $fout/whole_seq/peptide.cmap
@@ -46,3 +46,8 @@ path_grid0="$fc/1iqj.stk.mrc"
 path_grid1="$fp/2esj.stk.mrc"
 
 python3 run/vgtools.py compare "$path_grid0" "$path_grid1"
+
+
+############################# FOLDERS AND SERIES-FILES (REPORTS)
+python3 run/vgtools.py compare "$fc/batch_cmap" "$fc/batch_cmap" -o "$fc/report_batch.json" --jobs 2; echo
+python3 run/vgtools.py compare "$fp/2esj.cmap" "$fp/2esj.cmap" -o "$fp/report_series.csv"
@@ -46,3 +46,18 @@ python3 run/vgtools.py convert "$path_ccp4_input" \
 python3 run/vgtools.py convert "$path_cmap_input" \
     --dx "$path_cmap_to_dx"     --mrc "$path_cmap_to_mrc" \
     --ccp4 "$path_cmap_to_ccp4" --cmap "$path_cmap_to_cmap"
+
+echo
+echo ">>> TEST VGTOOLS 0b: Batch conversion (glob input, one output folder per format)"
+
+python3 run/vgtools.py convert "$folder/1iqj.stk.*" \
+    --mrc "$folder/batch_mrc"   --cmap "$folder/batch_cmap" --jobs 2
+
+### one output per input and format: inputs that only differ in their extension must not overwrite each other
+for fmt in mrc cmap; do
+    n_out=$(find "$folder/batch_$fmt" -name "1iqj.stk.*.$fmt" | wc -l)
+    if [ "$n_out" -ne 4 ]; then
+        echo "...>>> batch_$fmt: expected 4 converted grids, found $n_out"
+        exit 1
+    fi
+done
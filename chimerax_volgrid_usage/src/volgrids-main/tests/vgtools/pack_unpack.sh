@@ -15,6 +15,37 @@ path_out="$fp/2esj.cmap"
 # shellcheck disable=SC2086
 python3 run/vgtools.py pack -i $paths_in -o "$path_out"
 
+# shellcheck disable=SC2086
+python3 run/vgtools.py pack -i $paths_in -o "$fp/2esj.resampled.cmap" --resample --jobs 2
+
+
+############################# PACKED DATA, read back with plain h5py
+### the chunks pre-encoded by "pack" must give the same datasets as the h5py writer used by "convert",
+### including the all-zero chunks, which "pack" doesn't store (HDF5 reads them as the fill value 0)
+for path_in in $paths_in; do
+    python3 run/vgtools.py convert "$path_in" --cmap "$path_in.cmap"
+done
+
+python3 - <<- EOM
+import h5py
+import numpy as np
+
+nskipped = 0
+with h5py.File("$path_out", 'r') as h5:
+    for path_in in "$paths_in".split():
+        key = path_in.rsplit('.', 1)[0].replace('/', '_')
+        with h5py.File(f"{path_in}.cmap", 'r') as h5_ref:
+            expected = next(iter(h5_ref["Chimera"].values()))["data_zyx"]
+            packed = h5["Chimera"][key]["data_zyx"]
+            nchunks = np.prod([-(-n // c) for n,c in zip(packed.shape, packed.chunks)])
+            nskipped += nchunks - packed.id.get_num_chunks()
+            same = (packed.chunks == expected.chunks) and np.array_equal(packed[()], expected[()])
+            print(f"...>>> {key}: {'ok' if same else 'FAILED'}")
+            assert same
+
+assert nskipped > 0, "no all-zero chunks were tested"
+EOM
+
 
 ############################# UNPACKING
 path_in="$fu/1iqj.cmap"
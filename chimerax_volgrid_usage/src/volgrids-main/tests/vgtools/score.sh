@@ -0,0 +1,62 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST VGTOOLS 4: Scoring pockets (run after the smiffer pocket_sphere and whole tests)"
+
+folder="testdata/smiffer"
+
+python3 run/vgtools.py score "$folder/pocket_sphere" -w "$folder/whole" -o "testdata/vgtools/scores.csv" --jobs 2
+
+### a mask file (here, the trimming grid of the first pocket) gives the same scores as the mask key,
+### and a file named like the mask key doesn't change what is scored
+path_pocket=$(ls "$folder"/pocket_sphere/*.cmap | head -n 1)
+fout="testdata/vgtools/score_mask"
+rm -rf $fout; mkdir -p $fout/cwd
+touch $fout/cwd/trimming
+
+python3 - <<- EOM
+import sys
+from pathlib import Path
+sys.path.insert(0, "src")
+import volgrids as vg
+import volgrids.vgtools as vgt
+
+ctx = vgt.AppVGTools.make_context()
+with ctx.activate():
+    key = next(k for k in vg.GridIO.get_cmap_keys("$path_pocket") if k.endswith(".trimming"))
+    vg.GridIO.write_mrc("$fout/mask.mrc", vg.GridIO.read_cmap("$path_pocket", key))
+EOM
+
+python3 run/vgtools.py score "$path_pocket" -w "$folder/whole" -o "$fout/scores_key.csv"
+python3 run/vgtools.py score "$path_pocket" -w "$folder/whole" -o "$fout/scores_file.csv" --mask-file "$fout/mask.mrc"
+
+python3 - <<- EOM
+import os, sys, csv, math
+from pathlib import Path
+sys.path.insert(0, "src")
+import volgrids.vgtools as vgt
+
+def read_row(path):
+    with open(path) as file:
+        return next(csv.DictReader(file))
+
+def same_row(row_0, row_1): # row_1 may have more columns (e.g. the scores of the trimming key, when it isn't the mask)
+    return all(
+        (k in row_1) and ((v == row_1[k]) or math.isclose(float(v), float(row_1[k]), rel_tol = 1e-6)) for k,v in row_0.items()
+    )
+
+row_key = read_row("$fout/scores_key.csv")
+status = "ok" if same_row(row_key, read_row("$fout/scores_file.csv")) else "FAILED"
+print(f"...>>> --mask-file: {status}")
+assert status == "ok"
+
+path_pocket, folder_whole = Path("$path_pocket").resolve(), Path("$folder/whole").resolve()
+ctx = vgt.AppVGTools.make_context()
+os.chdir("$fout/cwd")
+with ctx.activate():
+    row_cwd = vgt.VGOperations.score(path_pocket, folder_whole, "trimming")
+status = "ok" if same_row(row_key, {k: str(v) for k,v in row_cwd.items()}) else "FAILED"
+print(f"...>>> mask key with a file of the same name in the working directory: {status}")
+assert status == "ok"
+EOM
@@ -0,0 +1,53 @@
+#!/bin/bash
+set -eu
+
+echo
+echo ">>> TEST VGTOOLS 5: Job server"
+
+port=47899
+fout="testdata/vgtools/serve"
+rm -rf $fout; mkdir -p $fout
+
+python3 run/vgtools.py serve $port --jobs 2 &
+pid_server=$!
+trap "kill $pid_server 2> /dev/null || true" EXIT
+
+python3 - <<- EOM
+import sys, time
+sys.path.insert(0, "src")
+import volgrids as vg
+
+client = vg.JobClient($port)
+for _ in range(300):
+    if client.is_available(): break
+    time.sleep(0.1)
+else:
+    sys.exit("The job server didn't start.")
+
+jobs = [
+    ("smiffer", ["prot", "testdata/_input/toy_systems/peptide.pdb", "-o", "$fout/whole"]),
+    ("smiffer", ["prot", "testdata/_input/toy_systems/peptide.pdb", "-o", "$fout/pocket", "-rxyz", "6", "8", "5", "0"]),
+    ("smiffer", ["prot", "testdata/_input/toy_systems/peptide.pdb", "-o", "$fout/whole_again"]),
+    ("vgtools", ["compare", "$fout/whole/peptide.cmap", "$fout/whole_again/peptide.cmap"]),
+]
+for app, args in jobs:
+    for event in client.run(app, args):
+        if event["event"] == "output": print(event["line"])
+    if not event.get("ok"): sys.exit(f"Job failed: {app} {args}: {event['error']}")
+
+### requests without the token of the server are refused
+import json, socket
+with socket.create_connection((vg.JobServer.HOST, $port)) as sock:
+    sock.sendall(b'{"op": "run", "app": "smiffer", "args": ["-h"]}\n')
+    event = json.loads(sock.makefile('r').readline())
+if event["event"] != "error": sys.exit(f"A request without token was accepted: {event}")
+if (vg.JobServer.get_path_token($port).stat().st_mode & 0o077) != 0: sys.exit("The token file is readable by other users.")
+
+### operations that never finish are rejected instead of taking a worker forever
+events = list(client.run("vgtools", ["serve", "$((port + 1))"]))
+if events[-1]["event"] != "error": sys.exit(f"A blocking job was accepted: {events}")
+
+client.shutdown()
+EOM
+
+wait $pid_server
@@ -10,9 +10,15 @@ Cartesian (x, y, z) order. Mixing these two orderings up (e.g. multiplying a
 swaps the X and Z axes -- a bug present in parts of the original scripts this
 package replaces. All index<->coordinate conversions go through
 `indices_to_xyz` / `xyz_to_voxel_index` below to avoid repeating that mistake.
+
+Grids saved by volgrids in its NPY format (raw array + JSON header) are read
+with `load_npy` as zero-copy memory maps; `load_grid` picks the reader from
+the file extension.
 """
 
+import json
 from dataclasses import dataclass
+from pathlib import Path
 
 import mrcfile
 import numpy as np
@@ -62,6 +68,32 @@ def load_mrc(path) -> Grid:
     return Grid(data=data, voxel_size=voxel_size, origin=origin)
 
 
+def load_npy(path) -> Grid:
+    """Load a volgrids NPY grid (``grid.npy`` + ``grid.npy.json`` header).
+
+    The array is memory-mapped read-only, so no copy is made: volgrids stores
+    it in (x, y, z) order and the (z, y, x) ``data`` is a transposed view.
+    Callers that need to modify the data must copy it first.
+    """
+    path = Path(path)
+    header = json.loads(path.with_name(f"{path.name}.json").read_text())
+    data = np.load(path, mmap_mode="r")
+    if header.get("axis_order", "xyz").lower() == "xyz":
+        data = data.transpose(2, 1, 0)
+    return Grid(
+        data=data,
+        voxel_size=np.asarray(header["deltas"], dtype=np.float64),
+        origin=np.asarray(header["origin"], dtype=np.float64),
+    )
+
+
+def load_grid(path) -> Grid:
+    """Load an MRC/CCP4 or volgrids NPY grid, based on the file extension."""
+    if Path(path).suffix.lower() == ".npy":
+        return load_npy(path)
+    return load_mrc(path)
+
+
 def save_mrc(path, data: np.ndarray, grid: Grid) -> None:
     out = np.asarray(data, dtype=np.float32)
     with mrcfile.new(str(path), overwrite=True) as mrc:
@@ -19,7 +19,7 @@ import tempfile
 from pathlib import Path
 
 from . import fields, hotspots, hbond_pockets, refine, unique_pockets
-from .mrc_io import load_mrc, save_mrc
+from .mrc_io import load_grid, save_mrc
 from .structure import load_structure
 from .isovalues import pick_isovalues
 from .residues import non_canonical_residue_selectors
@@ -56,7 +56,7 @@ def _run(pdb_path: Path, out_dir: Path, work_dir: Path) -> list:
     apbs_cache = fields.compute_apbs(local_pdb)
     whole_paths = fields.compute_whole_structure_fields(
         local_pdb, apbs_cache, work_dir / "fields_whole")
-    field_data = {name: load_mrc(path) for name, path in whole_paths.items()}
+    field_data = {name: load_grid(path) for name, path in whole_paths.items()}
     if "apbs" not in field_data:
         raise RuntimeError("APBS field was not generated; cannot continue")
     grid = field_data["apbs"]
@@ -77,7 +77,7 @@ def _run(pdb_path: Path, out_dir: Path, work_dir: Path) -> list:
     if residue_selectors:
         hb_paths = fields.compute_hbond_subset_fields(
             local_pdb, residue_selectors, apbs_cache, work_dir / "fields_hbond")
-        hb_field_data = {name: load_mrc(path) for name, path in hb_paths.items()}
+        hb_field_data = {name: load_grid(path) for name, path in hb_paths.items()}
         hb_apbs = hb_field_data.get("apbs")
         if hb_apbs is not None and hb_apbs.shape == grid.shape:
             hbond_sites = hbond_pockets.find_hbond_sites(hb_field_data)
@@ -6,6 +6,7 @@ Based on the ChimeraX Smiffer Tool functionality
 import os
 import sys
 import json
+import socket
 import subprocess
 import threading
 from functools import partial
@@ -25,6 +26,13 @@ from pymol import cmd
 from pymol.Qt import QtWidgets, QtCore, QtGui
 
 
+# Port of the optional volgrids job server (see SmifferWorker.run_in_server)
+SERVER_PORT = 47810
+
+# Smiffer options followed by a path (see SmifferDialog.build_smiffer_command)
+PATH_OPTIONS = ("-o", "-t", "-a", "-b", "-c")
+
+
 class SmifferPyMOLPlugin:
     """Main PyMOL Smiffer Plugin class"""
 
@@ -838,6 +846,9 @@ class SmifferWorker(QtCore.QThread):
     def run(self):
         """Run the smiffer command"""
         try:
+            if self.run_in_server():
+                return
+
             self.process = subprocess.Popen(
                 self.command,
                 cwd=self.working_dir,
@@ -868,6 +879,16 @@ class SmifferWorker(QtCore.QThread):
         finally:
             self.finished.emit()
 
+    def get_server_args(self):
+        """Smiffer arguments of the command, with the paths made absolute as the subprocess
+        would resolve them (relative to working_dir), since the server has its own working directory."""
+        args = list(self.command[2:])
+        path_indices = [1] + [i + 1 for i, arg in enumerate(args) if arg in PATH_OPTIONS]  # [1]: input structure
+        for i in path_indices:
+            if i < len(args):
+                args[i] = os.path.abspath(os.path.join(self.working_dir, args[i]))
+        return args
+
     def stop(self):
         """Stop the running process"""
         self.should_stop = True
@@ -875,6 +896,57 @@ class SmifferWorker(QtCore.QThread):
             self.process.terminate()
             self.process.wait()
 
+    def run_in_server(self):
+        """Submit the job to a running volgrids job server (started with
+        `python3 run/vgtools.py serve`), which avoids starting a new Python process.
+        Returns False if no server is listening, or if it runs another volgrids install
+        than the one of smiffer_path, so that the job runs as a subprocess."""
+        port = int(os.environ.get("VOLGRIDS_SERVER_PORT", SERVER_PORT))
+        try:
+            # Written by the server, readable only by the user that started it
+            with open(os.path.join(os.path.expanduser("~"), ".volgrids", f"server_{port}.token")) as file:
+                token = file.read().strip()
+            sock = socket.create_connection(("127.0.0.1", port), timeout=1.0)
+        except OSError:
+            return False
+
+        with sock:
+            events = sock.makefile("r", encoding="utf-8")
+            # run/smiffer.py imports the volgrids package from ../src
+            expected = os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(self.command[1])), os.pardir, "src", "volgrids"))
+            try:
+                sock.sendall((json.dumps({"op": "ping", "token": token}) + "\n").encode())
+                installed = json.loads(events.readline() or "{}").get("volgrids")
+            except (OSError, ValueError):
+                return False
+            if (installed is None) or (os.path.normcase(installed) != os.path.normcase(expected)):
+                self.output.emit(f"Not using the volgrids server on port {port}: it runs {installed}, not {expected}")
+                return False
+
+            self.output.emit(f"Submitting job to the volgrids server on port {port}")
+            sock.settimeout(None)
+            request = {"op": "run", "app": "smiffer", "args": self.get_server_args(), "token": token}
+            sock.sendall((json.dumps(request) + "\n").encode())
+            for line in events:
+                event = json.loads(line)
+                if self.should_stop:
+                    break
+                if event["event"] == "output" and event["line"].strip():
+                    self.output.emit(event["line"].strip())
+                elif event["event"] == "error":
+                    self.error.emit(f"Smiffer server error: {event['error']}")
+                    break
+                elif event["event"] == "done":
+                    if event["ok"]:
+                        self.output.emit("Smiffer calculation completed successfully!")
+                    else:
+                        self.error.emit(f"Smiffer failed: {event['error']}")
+                    break
+
+        if self.should_stop:
+            self.output.emit("Smiffer calculation stopped by user (the server finishes the job in the background).")
+        return True
+
 
 # Plugin initialization and registration
 plugin_instance = None